@@ -1,28 +1,42 @@
-from crewai import Agent, Task, Crew, Process
 from custom_llm import OllamaLLM
+from config.output_schemas import OutputSchemas
 import json
-from typing import Dict, Any
+from typing import Dict, Any, TYPE_CHECKING
+from agents.strategy_engine import build_investment_strategy
+from lazy_imports import lazy_import
+from tools.chart_patterns import key_levels
 
-# Import all necessary tools
-from tools.tech_stats_analyzer import yf_tech_analysis
-from tools.tech_indicator_analyzer import yf_fundamental_analysis
-from tools.market_view_analyzer import sentiment_analysis
-from tools.market_analyzer import competitor_analysis
-from tools.risk_analyzer import risk_assessment
+if TYPE_CHECKING:
+    from crewai import Crew
 
+yf = lazy_import("yfinance")
 
-def create_crew(stock_symbol: str) -> Crew:
+
+def create_crew(stock_symbol: str, narrative: bool = False) -> "Crew":
     """
     Create a crew of AI agents for comprehensive stock analysis.
 
     Args:
         stock_symbol (str): The stock ticker symbol to analyze
+        narrative (bool): Include the LLM strategist for a narrative strategy.
+            By default no strategist round-trip is made; run_crew_analysis
+            then adds the deterministic strategy engine's output instead.
 
     Returns:
         Crew: A configured CrewAI crew ready for analysis
     """
-    # Initialize the Ollama LLM with the specified model
-    llm = OllamaLLM(model_name="llama3.2:3b")
+    # CrewAI and the tools (ta, scipy, textblob, ...) are only needed once a
+    # crew is actually built, so they are imported here rather than at startup
+    from crewai import Agent, Task, Crew, Process
+    from tools.tech_stats_analyzer import yf_tech_analysis
+    from tools.tech_indicator_analyzer import yf_fundamental_analysis
+    from tools.market_view_analyzer import sentiment_analysis
+    from tools.market_analyzer import competitor_analysis
+    from tools.comovement_analyzer import comovement_analysis
+    from tools.risk_analyzer import risk_assessment
+
+    # Each agent gets an Ollama LLM constrained to the JSON schema of its task
+    model_name = "llama3.2:3b"
 
     # Define the Stock Market Researcher Agent
     researcher = Agent(
@@ -31,8 +45,8 @@ def create_crew(stock_symbol: str) -> Crew:
         backstory="""You're an experienced stock market researcher with a talent for 
         uncovering market patterns and analyzing company fundamentals. You always 
         provide analysis in clear, structured JSON format.""",
-        tools=[yf_tech_analysis, yf_fundamental_analysis, competitor_analysis],
-        llm=llm,
+        tools=[yf_tech_analysis, yf_fundamental_analysis, competitor_analysis, comovement_analysis],
+        llm=OllamaLLM(model_name=model_name, schema=OutputSchemas.RESEARCH),
         verbose=True
     )
 
@@ -44,7 +58,7 @@ def create_crew(stock_symbol: str) -> Crew:
         and risk assessment. You provide detailed analysis in JSON format with clear 
         metrics and insights.""",
         tools=[yf_tech_analysis, yf_fundamental_analysis, risk_assessment],
-        llm=llm,
+        llm=OllamaLLM(model_name=model_name, schema=OutputSchemas.RISK),
         verbose=True
     )
 
@@ -56,7 +70,7 @@ def create_crew(stock_symbol: str) -> Crew:
         skilled at gauging market emotions and their impact on stock performance. 
         You format all outputs as structured JSON.""",
         tools=[sentiment_analysis],
-        llm=llm,
+        llm=OllamaLLM(model_name=model_name, schema=OutputSchemas.SENTIMENT),
         verbose=True
     )
 
@@ -68,7 +82,7 @@ def create_crew(stock_symbol: str) -> Crew:
         investment plans. You always present recommendations in clear JSON format 
         with specific actions and risk considerations.""",
         tools=[],  # No specific tools needed for strategy formulation
-        llm=llm,
+        llm=OllamaLLM(model_name=model_name, schema=OutputSchemas.STRATEGY),
         verbose=True
     )
 
@@ -131,10 +145,16 @@ def create_crew(stock_symbol: str) -> Crew:
         agent=strategist
     )
 
+    agents = [researcher, sentiment_analyst, analyst]
+    tasks = [research_task, sentiment_task, analysis_task]
+    if narrative:
+        agents.append(strategist)
+        tasks.append(strategy_task)
+
     # Create and return the configured Crew
     crew = Crew(
-        agents=[researcher, sentiment_analyst, analyst, strategist],
-        tasks=[research_task, sentiment_task, analysis_task, strategy_task],
+        agents=agents,
+        tasks=tasks,
         process=Process.sequential,
         verbose=2  # Enable verbose output for debugging
     )
@@ -142,10 +162,34 @@ def create_crew(stock_symbol: str) -> Crew:
     return crew
 
 
-from crewai import Agent, Task, Crew, Process
-from custom_llm import OllamaLLM
-import json
-import yfinance as yf
+def run_crew_analysis(ticker: str, narrative: bool = False) -> str:
+    """
+    Run the agent crew and merge the task outputs into one JSON report.
+
+    Without ``narrative`` the crew has no strategist, so the investment
+    strategy comes from the deterministic strategy engine.
+    """
+    try:
+        result = create_crew(ticker, narrative=narrative).kickoff()
+
+        # Newer CrewAI returns every task's output, older versions only the last one
+        outputs = [task.raw for task in getattr(result, "tasks_output", None) or []] or [str(result)]
+        report: Dict[str, Any] = {}
+        for output in outputs:
+            try:
+                parsed = json.loads(output)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(parsed, dict):
+                report.update(parsed)
+
+        if not narrative or "investment_strategy" not in report:
+            stock = yf.Ticker(ticker)
+            report["investment_strategy"] = strategy_from_history(stock.history(period="1y"), stock.info)
+        return json.dumps(report, indent=2, default=str)
+    except Exception as e:
+        print(f"Crew analysis error: {e}")
+        return json.dumps({"error": str(e)})
 
 
 def run_analysis(ticker: str) -> str:
@@ -171,11 +215,13 @@ def run_analysis(ticker: str) -> str:
         52W Low: ${info.get('fiftyTwoWeekLow')}
         Beta: {info.get('beta')}"""
 
-        llm = OllamaLLM(model_name="llama3.2-vision")
+        llm = OllamaLLM(model_name="llama3.2-vision", schema=OutputSchemas.ANALYSIS)
         response = llm.create_chat_completion(f"{chart_prompt}\n{data_prompt}\nProvide analysis in JSON format")
 
         try:
             parsed = json.loads(response)
+            if isinstance(parsed, dict) and "investment_strategy" not in parsed:
+                parsed["investment_strategy"] = strategy_from_history(stock_data, info)
             return json.dumps(parsed, indent=2)
         except:
             # Fallback with real stock data
@@ -201,8 +247,42 @@ def run_analysis(ticker: str) -> str:
                         "pe_ratio_analysis": str(info.get('trailingPE')),
                         "market_cap_assessment": f"${info.get('marketCap'):,.0f}"
                     }
-                }
+                },
+                "investment_strategy": strategy_from_history(stock_data, info)
             })
     except Exception as e:
         print(f"Analysis error: {e}")
-        return json.dumps({"error": str(e)})
\ No newline at end of file
+        return json.dumps({"error": str(e)})
+
+
+def strategy_from_history(stock_data, info: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds the rule-based strategy from the price history and info already fetched."""
+    close = stock_data['Close']
+    returns = close.pct_change().dropna()
+
+    # Same peak/trough levels as yf_tech_analysis
+    support_levels, resistance_levels = key_levels(close.values)
+
+    tech_data = {
+        "current_price": close.iloc[-1],
+        "sma_50": close.rolling(window=50).mean().iloc[-1],
+        "sma_200": close.rolling(window=200).mean().iloc[-1],
+        "support_levels": support_levels,
+        "resistance_levels": resistance_levels
+    }
+    risk_data = {"value_at_risk_95": returns.quantile(0.05) if len(returns) else None}
+
+    fundamental_data = {"target_price": info.get('targetMeanPrice')}
+
+    return build_investment_strategy(tech_data, fundamental_data, risk_data)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the agent crew analysis for one ticker.")
+    parser.add_argument("ticker", help="Stock ticker symbol, e.g. AAPL")
+    parser.add_argument("--narrative", action="store_true",
+                        help="Let the LLM strategist write the investment strategy")
+    args = parser.parse_args()
+    print(run_crew_analysis(args.ticker.upper(), narrative=args.narrative))
@@ -4,7 +4,10 @@ from tools.tech_stats_analyzer import yf_tech_analysis
 from tools.tech_indicator_analyzer import yf_fundamental_analysis
 from tools.risk_analyzer import risk_assessment
 from tools.market_analyzer import competitor_analysis
+from tools.comovement_analyzer import comovement_analysis
 from tools.market_view_analyzer import sentiment_analysis
+from agents.strategy_engine import build_investment_strategy
+from custom_llm import OllamaLLM
 
 class OllamaAgent:
     def __init__(self, model_name="tinyllama"):
@@ -29,13 +32,14 @@ class OllamaAgent:
             formatted_prompt += f"{role}: {content}\n"
         return formatted_prompt
 
-def run_analysis(ticker: str) -> str:  # Returns a string that can be parsed as JSON
+def run_analysis(ticker: str, narrative: bool = False) -> str:  # Returns a string that can be parsed as JSON
     try:
         # Collect all the raw analysis data
         tech_data = yf_tech_analysis(ticker)
         fundamental_data = yf_fundamental_analysis(ticker)
         risk_data = risk_assessment(ticker)
         competitor_data = competitor_analysis(ticker)
+        comovement_data = comovement_analysis(ticker)
         sentiment_data = sentiment_analysis(ticker)
 
         # Format the data to match the expected structure
@@ -66,7 +70,9 @@ def run_analysis(ticker: str) -> str:  # Returns a string that can be parsed as
                 "max_drawdown": risk_data["max_drawdown"]
             },
             "competitor_analysis": competitor_data["competitors"],
-            "investment_strategy": generate_investment_strategy(tech_data, fundamental_data, risk_data, sentiment_data)
+            "comovement_analysis": comovement_data["windows"],
+            "investment_strategy": generate_investment_strategy(tech_data, fundamental_data, risk_data, sentiment_data,
+                                                                narrative=narrative)
         }
 
         return json.dumps(analysis_result)
@@ -80,11 +86,22 @@ def run_analysis(ticker: str) -> str:  # Returns a string that can be parsed as
             "sentiment_analysis": "Analysis failed",
             "risk_assessment": "Analysis failed",
             "competitor_analysis": "Analysis failed",
+            "comovement_analysis": "Analysis failed",
             "investment_strategy": "Unable to generate strategy due to analysis failure"
         }
         return json.dumps(error_result)
 
-def generate_investment_strategy(tech_data, fundamental_data, risk_data, sentiment_data):
-    # This would ideally use Ollama for generating the strategy
-    # For now, we'll return a placeholder
-    return "Investment strategy generation not yet implemented with Ollama"
\ No newline at end of file
+def generate_investment_strategy(tech_data, fundamental_data, risk_data, sentiment_data,
+                                 narrative: bool = False):
+    # Levels and actions come from the deterministic rule engine; the LLM is
+    # only asked to explain them when a narrative is requested
+    strategy = build_investment_strategy(tech_data, fundamental_data, risk_data, sentiment_data)
+
+    if narrative:
+        llm = OllamaLLM(model_name="llama3.2:3b")
+        strategy["narrative"] = llm.complete(
+            "Explain this investment strategy to a retail investor in a short paragraph. "
+            "Do not change any of the numbers.\n" + json.dumps(strategy)
+        )
+
+    return strategy
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""Strategy Engine Module
+
+Deterministic, rule-based investment strategy built from the numeric outputs
+the analysis tools already produce. It returns the same structure the
+strategist agent is asked for (recommendation, entry_points, exit_points,
+risk_management), so reports can be generated without an LLM round-trip and
+the same inputs always give the same strategy.
+
+Inputs (all optional, missing values simply disable the rules that need them):
+    - tech_data: yf_tech_analysis / intraday_tech_analysis output
+    - fundamental_data: yf_fundamental_analysis output
+    - risk_data: risk_assessment output
+    - sentiment_data: sentiment_analysis output
+
+Example:
+    ```python
+    strategy = build_investment_strategy(tech_data, fundamental_data, risk_data, sentiment_data)
+    print(strategy['recommendation']['action'])
+    ```
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.strategy_config import StrategyConfig
+
+
+def _num(data: Optional[Dict[str, Any]], key: str) -> Optional[float]:
+    """Reads a finite float from ``data``; anything else becomes None."""
+    if not isinstance(data, dict):
+        return None
+    try:
+        value = float(data.get(key))
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _levels(data: Optional[Dict[str, Any]], key: str) -> List[float]:
+    if not isinstance(data, dict):
+        return []
+    levels = []
+    for value in data.get(key) or []:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(value):
+            levels.append(value)
+    return levels
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def score_signals(
+        tech_data: Optional[Dict[str, Any]],
+        fundamental_data: Optional[Dict[str, Any]],
+        sentiment_data: Optional[Dict[str, Any]]
+) -> Tuple[float, float, List[str]]:
+    """
+    Scores the directional signals.
+
+    Returns:
+        Tuple[float, float, List[str]]: (weighted score, maximum attainable
+            score given the available inputs, human-readable signal list)
+    """
+    weights = StrategyConfig.WEIGHTS
+    score = 0.0
+    max_score = 0.0
+    signals = []
+
+    price = _num(tech_data, "current_price")
+    sma_50 = _num(tech_data, "sma_50")
+    sma_200 = _num(tech_data, "sma_200")
+    rsi = _num(tech_data, "rsi")
+    macd = _num(tech_data, "macd")
+    sentiment = _num(sentiment_data, "overall_sentiment")
+    target = _num(fundamental_data, "target_price")
+
+    if price is not None and sma_50 is not None:
+        max_score += weights["price_vs_sma_50"]
+        if price > sma_50:
+            score += weights["price_vs_sma_50"]
+            signals.append("Price above 50-day SMA")
+        else:
+            score -= weights["price_vs_sma_50"]
+            signals.append("Price below 50-day SMA")
+
+    if sma_50 is not None and sma_200 is not None:
+        max_score += weights["sma_crossover"]
+        if sma_50 > sma_200:
+            score += weights["sma_crossover"]
+            signals.append("50-day SMA above 200-day SMA (golden cross regime)")
+        else:
+            score -= weights["sma_crossover"]
+            signals.append("50-day SMA below 200-day SMA (death cross regime)")
+
+    if rsi is not None:
+        max_score += weights["rsi"]
+        if rsi < StrategyConfig.RSI_OVERSOLD:
+            score += weights["rsi"]
+            signals.append(f"RSI oversold ({rsi:.1f})")
+        elif rsi > StrategyConfig.RSI_OVERBOUGHT:
+            score -= weights["rsi"]
+            signals.append(f"RSI overbought ({rsi:.1f})")
+
+    if macd is not None:
+        max_score += weights["macd"]
+        if macd > 0:
+            score += weights["macd"]
+            signals.append("MACD above signal line")
+        elif macd < 0:
+            score -= weights["macd"]
+            signals.append("MACD below signal line")
+
+    if sentiment is not None:
+        max_score += weights["sentiment"]
+        if sentiment > StrategyConfig.SENTIMENT_THRESHOLD:
+            score += weights["sentiment"]
+            signals.append(f"Positive sentiment ({sentiment:.2f})")
+        elif sentiment < -StrategyConfig.SENTIMENT_THRESHOLD:
+            score -= weights["sentiment"]
+            signals.append(f"Negative sentiment ({sentiment:.2f})")
+
+    if price is not None and target is not None:
+        max_score += weights["analyst_target"]
+        if target >= price * (1 + StrategyConfig.ANALYST_UPSIDE):
+            score += weights["analyst_target"]
+            signals.append(f"Analyst target ${target:,.2f} implies upside")
+        elif target <= price:
+            score -= weights["analyst_target"]
+            signals.append(f"Analyst target ${target:,.2f} at or below price")
+
+    return score, max_score, signals
+
+
+def _stop_distance(price: float, risk_data: Optional[Dict[str, Any]],
+                   atr: Optional[float]) -> Tuple[float, str]:
+    """Stop distance below entry as a fraction of price, and what it is based on."""
+    var_95 = _num(risk_data, "value_at_risk_95")
+    if var_95 is not None and var_95 < 0:
+        return abs(var_95) * StrategyConfig.STOP_VAR_MULTIPLIER, "95% VaR"
+    if atr is not None and atr > 0:
+        return atr * StrategyConfig.STOP_ATR_MULTIPLIER / price, "ATR"
+    return StrategyConfig.DEFAULT_STOP_PCT, "default"
+
+
+def build_investment_strategy(
+        tech_data: Optional[Dict[str, Any]],
+        fundamental_data: Optional[Dict[str, Any]] = None,
+        risk_data: Optional[Dict[str, Any]] = None,
+        sentiment_data: Optional[Dict[str, Any]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Derives a recommendation, entry/exit levels and stop rules from tool outputs.
+
+    Args:
+        tech_data (Dict): Technical analysis output. ``current_price`` is required
+            for price levels; everything else is optional.
+        fundamental_data (Dict, optional): Fundamental analysis output.
+        risk_data (Dict, optional): Risk assessment output.
+        sentiment_data (Dict, optional): Sentiment analysis output.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: A dictionary containing:
+            - recommendation: action (BUY/HOLD/SELL), score, confidence, signals
+            - entry_points: primary and secondary entry prices with their basis
+            - exit_points: take-profit target, secondary target and basis
+            - risk_management: stop loss, stop basis, position size, risk/reward
+    """
+    score, max_score, signals = score_signals(tech_data, fundamental_data, sentiment_data)
+
+    if score >= StrategyConfig.ACTION_THRESHOLD:
+        action = "BUY"
+    elif score <= -StrategyConfig.ACTION_THRESHOLD:
+        action = "SELL"
+    else:
+        action = "HOLD"
+
+    strategy = {
+        "recommendation": {
+            "action": action,
+            "score": round(score, 2),
+            "confidence": round(abs(score) / max_score, 2) if max_score else 0.0,
+            "signals": signals
+        },
+        "entry_points": {"primary": None, "secondary": None, "basis": None},
+        "exit_points": {"take_profit": None, "secondary_target": None, "basis": None},
+        "risk_management": {
+            "stop_loss": None,
+            "stop_basis": None,
+            "max_position_pct": None,
+            "risk_reward_ratio": None
+        }
+    }
+
+    price = _num(tech_data, "current_price")
+    if price is None or price <= 0:
+        return strategy
+
+    atr = _num(tech_data, "atr")
+    sma_50 = _num(tech_data, "sma_50")
+    supports = sorted(level for level in _levels(tech_data, "support_levels") if level < price)
+    resistances = sorted(level for level in _levels(tech_data, "resistance_levels") if level > price)
+
+    # Entries: buy pullbacks to the nearest support, otherwise at market
+    if supports:
+        entry, entry_basis = supports[-1], "nearest support"
+    else:
+        entry, entry_basis = price, "market"
+    secondary_entry = supports[-2] if len(supports) > 1 else (
+        sma_50 if sma_50 is not None and sma_50 < entry else None)
+
+    # Exits: nearest resistance above price, otherwise an ATR multiple
+    if resistances:
+        target, target_basis = resistances[0], "nearest resistance"
+        secondary_target = resistances[1] if len(resistances) > 1 else None
+    elif atr is not None and atr > 0:
+        target, target_basis = price + atr * StrategyConfig.TARGET_ATR_MULTIPLIER, "ATR projection"
+        secondary_target = None
+    else:
+        target, target_basis, secondary_target = None, None, None
+
+    stop_pct, stop_basis = _stop_distance(entry, risk_data, atr)
+    stop_loss = entry * (1 - stop_pct)
+    risk = entry - stop_loss
+    position = min(StrategyConfig.RISK_PER_TRADE / (risk / entry), StrategyConfig.MAX_POSITION)
+    if action == "SELL":
+        position = 0.0
+
+    strategy["entry_points"] = {
+        "primary": _round(entry),
+        "secondary": _round(secondary_entry),
+        "basis": entry_basis
+    }
+    strategy["exit_points"] = {
+        "take_profit": _round(target),
+        "secondary_target": _round(secondary_target),
+        "basis": target_basis
+    }
+    strategy["risk_management"] = {
+        "stop_loss": _round(stop_loss),
+        "stop_basis": stop_basis,
+        "max_position_pct": round(position * 100, 2),
+        "risk_reward_ratio": round((target - entry) / risk, 2) if target is not None and risk > 0 else None
+    }
+
+    return strategy
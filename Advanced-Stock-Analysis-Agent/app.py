@@ -1,9 +1,13 @@
 import streamlit as st
-import yfinance as yf
-import plotly.graph_objs as go
-from agentic_orchestrator import run_analysis
 import json
-import streamlit as st
+from lazy_imports import lazy_import
+
+# Heavy modules are bound lazily: Streamlit re-executes this script on every
+# interaction, and nothing below is needed until a ticker is analyzed
+yf = lazy_import("yfinance")
+go = lazy_import("plotly.graph_objs")
+orchestrator = lazy_import("agentic_orchestrator")
+intraday = lazy_import("streaming.registry")
 
 def main():
     st.set_page_config(layout="wide", page_title="Stock Analysis")
@@ -53,11 +57,22 @@ def main():
 
     # Keep original functionality, just enhance the visual presentation
     stock_symbol = st.text_input("Enter Stock Symbol:", "AAPL", help="Example: AAPL, GOOGL, MSFT")
+    intraday_mode = st.checkbox("Intraday mode (live 1-minute bars)")
+    crew_mode = st.checkbox("Full agent crew analysis (slower)")
+    narrative = st.checkbox("Narrative strategy from the LLM strategist", disabled=not crew_mode,
+                            help="By default the strategy comes from the rule-based strategy engine")
+
+    if intraday_mode:
+        show_intraday(stock_symbol)
+        return
 
     if st.button("Analyze Stock"):
         # Your existing analysis code remains unchanged
         with st.spinner("Analyzing..."):
-            result = run_analysis(stock_symbol)
+            if crew_mode:
+                result = orchestrator.run_crew_analysis(stock_symbol, narrative=narrative)
+            else:
+                result = orchestrator.run_analysis(stock_symbol)
 
         # Rest of your code stays exactly the same, just with better styling applied
         analysis = json.loads(result)
@@ -131,5 +146,35 @@ def main():
             st.metric("Beta", round(info.get('beta', 0), 2))
 
 
+def show_intraday(stock_symbol: str):
+    """Renders live intraday technicals from the shared streaming engine."""
+    intraday.follow_ticker(stock_symbol)
+
+    st.button("Refresh")  # any interaction reruns the script and re-reads the engine
+
+    try:
+        snapshot = intraday.get_intraday_engine().snapshot(stock_symbol)
+    except ValueError:
+        st.info("Waiting for the first intraday bars...")
+        return
+
+    st.header("Intraday Signals")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Last Price", f"${snapshot['current_price']:,.2f}")
+        st.metric("Bars Buffered", snapshot['bars'])
+    with col2:
+        st.metric("RSI", "N/A" if snapshot['rsi'] is None else round(snapshot['rsi'], 2))
+        st.metric("MACD Diff", "N/A" if snapshot['macd'] is None else round(snapshot['macd'], 4))
+    with col3:
+        st.metric("ATR", "N/A" if snapshot['atr'] is None else round(snapshot['atr'], 4))
+        st.metric("Momentum", "N/A" if snapshot['momentum'] is None else round(snapshot['momentum'], 4))
+
+    st.subheader("Chart Patterns")
+    st.write(snapshot['identified_patterns'] or "No chart patterns identified")
+    st.subheader("Key Levels")
+    st.write({"support": snapshot['support_levels'], "resistance": snapshot['resistance_levels']})
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
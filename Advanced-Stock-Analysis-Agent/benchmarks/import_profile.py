@@ -0,0 +1,105 @@
+"""Import Profile Benchmark
+
+Measures cold-start import cost of the stock agent modules in a fresh
+interpreter using ``python -X importtime`` and reports where the time goes,
+grouped by top-level package. Run it before and after dependency changes to
+catch heavy imports creeping back onto the startup path.
+
+Usage:
+    ```bash
+    python benchmarks/import_profile.py                   # profile `import app`
+    python benchmarks/import_profile.py -m agentic_orchestrator -m tools.tech_stats_analyzer
+    python benchmarks/import_profile.py --top 15 --json
+    ```
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:       412 |       1723 |   yfinance"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def profile_module(module: str) -> Dict[str, object]:
+    """
+    Imports ``module`` in a fresh interpreter and parses the ``-X importtime`` trace.
+
+    Returns:
+        Dict containing:
+            - module (str): Profiled module
+            - ok (bool): Whether the import succeeded
+            - error (str): Last stderr line when the import failed
+            - total_ms (float): Cumulative import time of ``module`` itself
+            - by_package (Dict[str, float]): Self time per top-level package in ms
+            - modules_imported (int): Number of modules imported
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+    by_package: Dict[str, float] = defaultdict(float)
+    total_us = 0
+    count = 0
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        count += 1
+        by_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == module:
+            total_us = int(cumulative_us)
+
+    errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": errors[-1] if proc.returncode and errors else None,
+        "total_ms": round(total_us / 1000, 1),
+        "by_package": dict(sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)),
+        "modules_imported": count,
+    }
+
+
+def print_report(results: List[Dict[str, object]], top: int) -> None:
+    for result in results:
+        print(f"\n== import {result['module']}")
+        if not result["ok"]:
+            print(f"   FAILED: {result['error']}")
+        print(f"   total: {result['total_ms']:.1f} ms, {result['modules_imported']} modules")
+        print(f"   {'package':<28} {'self ms':>10}")
+        for package, ms in list(result["by_package"].items())[:top]:
+            print(f"   {package:<28} {ms:>10.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile cold-start import time.")
+    parser.add_argument("-m", "--module", action="append",
+                        help="Module to import (repeatable). Defaults to app.")
+    parser.add_argument("--top", type=int, default=10, help="Packages to list per module.")
+    parser.add_argument("--json", action="store_true", help="Emit JSON instead of a table.")
+    args = parser.parse_args()
+
+    results = [profile_module(module) for module in (args.module or ["app"])]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results, args.top)
+
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+class OutputSchemas:
+    # JSON schemas passed to Ollama's `format` option. Each agent declares the
+    # schema its task asks for, so generation is constrained to it and the
+    # streamed output can be validated while it is produced.
+
+    RESEARCH = {
+        "type": "object",
+        "properties": {
+            "technical_analysis": {
+                "type": "object",
+                "properties": {
+                    "indicators": {"type": "object"},
+                    "patterns": {"type": "object"},
+                    "trends": {"type": "object"}
+                },
+                "required": ["indicators", "patterns", "trends"]
+            },
+            "fundamental_analysis": {
+                "type": "object",
+                "properties": {
+                    "metrics": {"type": "object"},
+                    "growth": {"type": "object"},
+                    "valuation": {"type": "object"}
+                },
+                "required": ["metrics", "growth", "valuation"]
+            }
+        },
+        "required": ["technical_analysis", "fundamental_analysis"]
+    }
+
+    SENTIMENT = {
+        "type": "object",
+        "properties": {
+            "sentiment_analysis": {
+                "type": "object",
+                "properties": {
+                    "news_sentiment": {"type": "object"},
+                    "social_media_sentiment": {"type": "object"},
+                    "overall_sentiment": {"type": "object"}
+                },
+                "required": ["news_sentiment", "social_media_sentiment", "overall_sentiment"]
+            }
+        },
+        "required": ["sentiment_analysis"]
+    }
+
+    RISK = {
+        "type": "object",
+        "properties": {
+            "risk_assessment": {
+                "type": "object",
+                "properties": {
+                    "market_risks": {"type": "object"},
+                    "company_risks": {"type": "object"},
+                    "financial_risks": {"type": "object"}
+                },
+                "required": ["market_risks", "company_risks", "financial_risks"]
+            }
+        },
+        "required": ["risk_assessment"]
+    }
+
+    STRATEGY = {
+        "type": "object",
+        "properties": {
+            "investment_strategy": {
+                "type": "object",
+                "properties": {
+                    "recommendation": {"type": "object"},
+                    "entry_points": {"type": "object"},
+                    "exit_points": {"type": "object"},
+                    "risk_management": {"type": "object"}
+                },
+                "required": ["recommendation", "entry_points", "exit_points", "risk_management"]
+            }
+        },
+        "required": ["investment_strategy"]
+    }
+
+    # Shape of the report produced by agentic_orchestrator.run_analysis
+    ANALYSIS = {
+        "type": "object",
+        "properties": {
+            "technical_analysis": {
+                "type": "object",
+                "properties": {
+                    "price_trend": {"type": "string", "enum": ["BULLISH", "BEARISH", "NEUTRAL"]},
+                    "key_levels": {
+                        "type": "object",
+                        "properties": {
+                            "support": {"type": "number"},
+                            "resistance": {"type": "number"}
+                        },
+                        "required": ["support", "resistance"]
+                    },
+                    "moving_averages": {"type": "object"}
+                },
+                "required": ["price_trend", "key_levels", "moving_averages"]
+            },
+            "fundamental_analysis": {
+                "type": "object",
+                "properties": {
+                    "valuation": {"type": "string"},
+                    "key_metrics": {"type": "object"}
+                },
+                "required": ["valuation", "key_metrics"]
+            },
+            "chart_patterns": {"type": "array", "items": {"type": "string"}},
+            "sentiment_analysis": {"type": "object"},
+            "risk_assessment": {"type": "object"}
+        },
+        "required": ["technical_analysis", "fundamental_analysis"]
+    }
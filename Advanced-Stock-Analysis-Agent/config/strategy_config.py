@@ -0,0 +1,27 @@
+class StrategyConfig:
+    # Signal thresholds
+    RSI_OVERSOLD = 30
+    RSI_OVERBOUGHT = 70
+    SENTIMENT_THRESHOLD = 0.1
+    ANALYST_UPSIDE = 0.10  # target price at least 10% above current price
+
+    # Signal weights; the recommendation is the sign of their weighted sum
+    WEIGHTS = {
+        "price_vs_sma_50": 1.0,
+        "sma_crossover": 1.0,
+        "rsi": 1.0,
+        "macd": 0.5,
+        "sentiment": 1.0,
+        "analyst_target": 0.5
+    }
+
+    # Score at or beyond which BUY / SELL is issued instead of HOLD
+    ACTION_THRESHOLD = 1.5
+
+    # Risk management
+    STOP_VAR_MULTIPLIER = 2.0  # stop distance as a multiple of the 95% daily VaR
+    STOP_ATR_MULTIPLIER = 2.0  # used when VaR is unavailable
+    TARGET_ATR_MULTIPLIER = 3.0  # used when no resistance level is above price
+    RISK_PER_TRADE = 0.01  # fraction of capital risked between entry and stop
+    MAX_POSITION = 0.10  # cap on position size as a fraction of capital
+    DEFAULT_STOP_PCT = 0.05  # last resort when neither VaR nor ATR is known
@@ -1,12 +1,23 @@
 from typing import Optional, List, Any, Dict
-import ollama
+import json
+from json_stream import IncrementalJSONValidator, JSONPrefixError, missing_required
+from lazy_imports import lazy_import
+
+ollama = lazy_import("ollama")
 
 class OllamaLLM:
-    def __init__(self, model_name: str = "llama3.2:3b"):
+    def __init__(self, model_name: str = "llama3.2:3b", schema: Optional[Dict[str, Any]] = None,
+                 max_retries: int = 2):
         self.model_name = model_name
+        self.schema = schema
+        self.max_retries = max_retries
         self._verbose = True
 
     def create_chat_completion(self, prompt: str, **kwargs) -> str:
+        schema = kwargs.get("schema", self.schema)
+        if schema is not None:
+            return self._create_constrained_completion(prompt, schema)
+
         try:
             response = ollama.chat(
                 model=self.model_name,
@@ -18,6 +29,58 @@ class OllamaLLM:
             print(f"Ollama chat completion error: {e}")
             return str(e)
 
+    def _create_constrained_completion(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """
+        Streams a completion constrained to ``schema`` via Ollama's ``format`` option.
+
+        The stream is validated as it arrives; a malformed prefix or an
+        unexpected top-level key aborts the generation immediately and the
+        request is retried, up to ``max_retries`` times. Failures come back
+        as plain text, never JSON, so callers' ``json.loads`` fallbacks run.
+        """
+        allowed_keys = schema.get("properties", {}).keys() if schema.get("type") == "object" else None
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            validator = IncrementalJSONValidator(allowed_keys=allowed_keys)
+            parts = []
+            stream = None
+            try:
+                stream = ollama.chat(
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    format=schema,
+                    stream=True,
+                    # Retries sample deterministically; the first failure was
+                    # most likely a sampling excursion
+                    options={"temperature": 0} if attempt else None
+                )
+                for chunk in stream:
+                    piece = chunk['message']['content']
+                    validator.feed(piece)
+                    parts.append(piece)
+                    if validator.complete:
+                        break
+
+                validator.finish()
+                text = "".join(parts).strip()
+                missing = missing_required(schema, json.loads(text))
+                if missing:
+                    raise JSONPrefixError(f"missing required fields: {', '.join(missing)}")
+                return text
+            except ValueError as e:
+                # JSONPrefixError from the validator, or a JSONDecodeError on the result
+                last_error = e
+                print(f"Ollama JSON attempt {attempt + 1} aborted after {validator.position} chars: {e}")
+            except Exception as e:
+                print(f"Ollama chat completion error: {e}")
+                return f"Ollama chat completion error: {e}"
+            finally:
+                if stream is not None and hasattr(stream, "close"):
+                    stream.close()
+
+        return f"No valid JSON after {self.max_retries + 1} attempts: {last_error}"
+
     def complete(self, prompt: str, **kwargs) -> str:
         return self.create_chat_completion(prompt, **kwargs)
 
@@ -33,4 +96,4 @@ class OllamaLLM:
 
     @model_name.setter
     def model_name(self, value: str):
-        self._model_name = value
\ No newline at end of file
+        self._model_name = value
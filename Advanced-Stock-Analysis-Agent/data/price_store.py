@@ -0,0 +1,113 @@
+"""Price Store Module
+
+Process-wide cache of daily closing prices. Symbols that are not cached (or
+whose entry has expired) are fetched together in one batched
+``yf.download`` call, so asking for a few thousand peers costs a handful of
+HTTP requests instead of one ``Ticker.history`` round-trip per symbol.
+
+Example:
+    ```python
+    closes = price_store.get_closes(["AAPL", "MSFT", "XLK"], period="1y")
+    print(closes.tail())
+    ```
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+
+from lazy_imports import lazy_import
+
+yf = lazy_import("yfinance")
+
+
+class PriceStore:
+    """
+    LRU cache of closing-price series keyed by (ticker, period).
+
+    Args:
+        ttl_seconds (float, optional): Age after which a series is refetched.
+            Defaults to 900.
+        max_entries (int, optional): Maximum cached series. Defaults to 8192.
+        batch_size (int, optional): Symbols per ``yf.download`` call. Defaults to 200.
+    """
+
+    def __init__(self, ttl_seconds: float = 900.0, max_entries: int = 8192, batch_size: int = 200):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[float, pd.Series]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_cached(self, key: Tuple[str, str], now: float):
+        entry = self._cache.get(key)
+        if entry is None or now - entry[0] > self.ttl_seconds:
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key: Tuple[str, str], series: pd.Series, now: float) -> None:
+        self._cache[key] = (now, series)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _download(self, tickers: List[str], period: str) -> Dict[str, pd.Series]:
+        fetched = {}
+        for start in range(0, len(tickers), self.batch_size):
+            batch = tickers[start:start + self.batch_size]
+            try:
+                data = yf.download(batch, period=period, auto_adjust=True,
+                                   progress=False, threads=True, group_by="column")
+            except Exception as e:
+                print(f"Warning: price download failed for {len(batch)} symbols: {str(e)}")
+                continue
+            if data is None or data.empty:
+                continue
+
+            closes = data["Close"]
+            if isinstance(closes, pd.Series):
+                closes = closes.to_frame(batch[0])
+            for ticker in batch:
+                if ticker in closes and closes[ticker].notna().any():
+                    fetched[ticker] = closes[ticker].dropna()
+        return fetched
+
+    def get_closes(self, tickers: Iterable[str], period: str = "1y") -> pd.DataFrame:
+        """
+        Returns a date-indexed DataFrame of closing prices, one column per ticker.
+
+        Symbols that could not be fetched are omitted from the result.
+        """
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        now = time.time()
+
+        series: Dict[str, pd.Series] = {}
+        with self._lock:
+            for ticker in tickers:
+                cached = self._get_cached((ticker, period), now)
+                if cached is not None:
+                    series[ticker] = cached
+
+        missing = [t for t in tickers if t not in series]
+        if missing:
+            fetched = self._download(missing, period)
+            with self._lock:
+                for ticker, closes in fetched.items():
+                    self._put((ticker, period), closes, now)
+            series.update(fetched)
+
+        if not series:
+            return pd.DataFrame()
+        return pd.DataFrame({t: series[t] for t in tickers if t in series}).sort_index()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+# Create a singleton instance
+price_store = PriceStore()
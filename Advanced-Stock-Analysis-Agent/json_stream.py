@@ -0,0 +1,218 @@
+"""JSON Stream Module
+
+Incremental JSON validation for streamed LLM output. The validator consumes
+text chunk by chunk and raises as soon as the prefix can no longer be the
+start of a valid JSON document (prose before the opening brace, a missing
+comma, an unexpected top-level key, ...), so a bad generation can be aborted
+and retried after a few tokens instead of after the full completion.
+
+Example:
+    ```python
+    validator = IncrementalJSONValidator(allowed_keys={"risk_assessment"})
+    for chunk in stream:
+        validator.feed(chunk)  # raises JSONPrefixError on a malformed prefix
+    ```
+"""
+
+import re
+import string
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class JSONPrefixError(ValueError):
+    """Raised when streamed text cannot be completed into valid JSON."""
+
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = set("0123456789+-.eE")
+_NUMBER = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?$")
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+_ESCAPES = set('"\\/bfnrt')
+
+
+class IncrementalJSONValidator:
+    """
+    Character-level JSON syntax checker that can be fed partial input.
+
+    Args:
+        allowed_keys (Iterable[str], optional): If given, any top-level object
+            key outside this set is rejected as soon as the key is closed.
+        require_object (bool, optional): Reject documents whose root is not an
+            object. Defaults to True.
+    """
+
+    def __init__(self, allowed_keys: Optional[Iterable[str]] = None, require_object: bool = True):
+        self.allowed_keys = set(allowed_keys) if allowed_keys is not None else None
+        self.require_object = require_object
+        self.position = 0
+
+        self._stack: List[str] = []
+        self._state = "value"
+        self._in_key = False
+        self._key: List[str] = []
+        self._escape = False
+        self._unicode_left = 0
+        self._literal = ""
+        self._literal_pos = 0
+        self._number: List[str] = []
+
+    @property
+    def complete(self) -> bool:
+        """True once the root value has been closed."""
+        return self._state == "done"
+
+    def feed(self, text: str) -> None:
+        for ch in text:
+            self._step(ch)
+            self.position += 1
+
+    def finish(self) -> None:
+        """Validates end of input; raises if the document is incomplete."""
+        if self._state == "number" and not self._stack:
+            self._close_number()
+        if self._state != "done":
+            raise JSONPrefixError(f"unexpected end of input at offset {self.position}")
+
+    def _fail(self, ch: str, expected: str) -> None:
+        raise JSONPrefixError(f"unexpected {ch!r} at offset {self.position}, expected {expected}")
+
+    def _end_value(self) -> None:
+        self._state = "comma_or_end" if self._stack else "done"
+
+    def _close_number(self) -> None:
+        number = "".join(self._number)
+        if not _NUMBER.match(number):
+            raise JSONPrefixError(f"invalid number {number!r} before offset {self.position}")
+        self._end_value()
+
+    def _step(self, ch: str) -> None:
+        state = self._state
+
+        if state == "string":
+            self._string_char(ch)
+            return
+
+        if state == "number":
+            if ch in _NUMBER_CHARS:
+                self._number.append(ch)
+                return
+            self._close_number()
+            state = self._state
+
+        if state == "literal":
+            if ch != self._literal[self._literal_pos]:
+                self._fail(ch, repr(self._literal[self._literal_pos]))
+            self._literal_pos += 1
+            if self._literal_pos == len(self._literal):
+                self._end_value()
+            return
+
+        if ch in _WHITESPACE:
+            return
+
+        if state in ("value", "value_or_end"):
+            if state == "value_or_end" and ch == "]":
+                self._stack.pop()
+                self._end_value()
+            elif not self._stack and self.require_object and ch != "{":
+                self._fail(ch, "'{'")
+            else:
+                self._start_value(ch)
+        elif state in ("key_or_end", "key"):
+            if state == "key_or_end" and ch == "}":
+                self._stack.pop()
+                self._end_value()
+            elif ch == '"':
+                self._state = "string"
+                self._in_key = True
+                self._key = []
+            else:
+                self._fail(ch, "object key")
+        elif state == "colon":
+            if ch != ":":
+                self._fail(ch, "':'")
+            self._state = "value"
+        elif state == "comma_or_end":
+            top = self._stack[-1]
+            if ch == ",":
+                self._state = "key" if top == "{" else "value"
+            elif (ch == "}" and top == "{") or (ch == "]" and top == "["):
+                self._stack.pop()
+                self._end_value()
+            else:
+                self._fail(ch, "',' or closing bracket")
+        else:  # done
+            self._fail(ch, "end of input")
+
+    def _start_value(self, ch: str) -> None:
+        if ch == "{":
+            self._stack.append("{")
+            self._state = "key_or_end"
+        elif ch == "[":
+            self._stack.append("[")
+            self._state = "value_or_end"
+        elif ch == '"':
+            self._state = "string"
+            self._in_key = False
+        elif ch == "-" or ch.isdigit():
+            self._number = [ch]
+            self._state = "number"
+        elif ch in _LITERALS:
+            self._literal = _LITERALS[ch]
+            self._literal_pos = 1
+            self._state = "literal"
+        else:
+            self._fail(ch, "a JSON value")
+
+    def _string_char(self, ch: str) -> None:
+        if self._unicode_left:
+            if ch not in string.hexdigits:
+                self._fail(ch, "hex digit")
+            self._unicode_left -= 1
+        elif self._escape:
+            if ch == "u":
+                self._unicode_left = 4
+            elif ch not in _ESCAPES:
+                self._fail(ch, "escape character")
+            self._escape = False
+        elif ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            if self._in_key:
+                self._close_key()
+            else:
+                self._end_value()
+            return
+        elif ord(ch) < 0x20:
+            self._fail(ch, "escaped control character")
+
+        if self._in_key:
+            self._key.append(ch)
+
+    def _close_key(self) -> None:
+        self._in_key = False
+        self._state = "colon"
+        if self.allowed_keys is not None and len(self._stack) == 1:
+            key = "".join(self._key)
+            if key not in self.allowed_keys:
+                raise JSONPrefixError(f"unexpected top-level key {key!r} at offset {self.position}")
+
+
+def missing_required(schema: Dict[str, Any], value: Any, path: str = "") -> List[str]:
+    """
+    Returns the dotted paths of required object properties missing from ``value``.
+
+    Only ``required`` / ``properties`` of nested objects are checked; this is a
+    completeness check for parsed output, not a full JSON-schema validator.
+    """
+    if schema.get("type") != "object" or not isinstance(value, dict):
+        return []
+
+    missing = []
+    properties = schema.get("properties", {})
+    for key in schema.get("required", []):
+        if key not in value:
+            missing.append(f"{path}{key}")
+        elif key in properties:
+            missing.extend(missing_required(properties[key], value[key], f"{path}{key}."))
+    return missing
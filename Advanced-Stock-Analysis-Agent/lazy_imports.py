@@ -0,0 +1,56 @@
+"""Lazy Imports Module
+
+Defers heavy third-party imports (yfinance, ta, scipy, textblob, bs4, plotly,
+crewai) until an attribute of the module is first used. Modules that bind
+``yf = lazy_import("yfinance")`` at import time cost nothing until ``yf.Ticker``
+is actually called, which keeps container cold start and the first Streamlit
+render fast.
+
+Example:
+    ```python
+    yf = lazy_import("yfinance")
+    stock = yf.Ticker("AAPL")  # yfinance is imported here
+    ```
+"""
+
+import importlib
+import sys
+import threading
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule:
+    """Proxy that imports ``name`` on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str):
+    """
+    Returns ``name`` if it is already imported, otherwise a proxy that imports it on first use.
+
+    Args:
+        name (str): Absolute module name, e.g. "scipy.signal".
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
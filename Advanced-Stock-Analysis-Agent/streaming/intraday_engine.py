@@ -0,0 +1,281 @@
+"""Intraday Engine Module
+
+Aggregates a tick/bar stream into per-ticker ring buffers and keeps the
+technical indicators used by ``yf_tech_analysis`` up to date as data arrives.
+
+Recursive indicators (MACD, RSI, ATR) are carried as O(1) state that is
+committed when a bar closes; the currently forming bar is folded in on read
+without mutating that state. Window indicators (SMAs, Bollinger bands,
+volatility, momentum) are computed over the bounded ring buffer, and chart
+pattern flags are refreshed once per closed bar. Memory per ticker is fixed
+by ``capacity`` regardless of session length.
+
+Example:
+    ```python
+    engine = IntradayEngine(bar_seconds=60, capacity=390)
+    engine.run(FileReplaySource("captures/aapl.csv"))
+    print(engine.snapshot("AAPL"))
+    ```
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from streaming.ring_buffer import BarRingBuffer
+from streaming.sources import Bar, BarSource, Event, Tick
+from tools.chart_patterns import identify_chart_patterns, key_levels
+
+
+REGULAR_SESSION_SECONDS = 6.5 * 60 * 60
+TRADING_DAYS = 252
+
+
+def _ema_step(prev: Optional[float], value: float, span: int) -> float:
+    if prev is None:
+        return value
+    alpha = 2.0 / (span + 1)
+    return prev + alpha * (value - prev)
+
+
+def _wilder_step(prev: Optional[float], value: float, window: int) -> float:
+    if prev is None:
+        return value
+    return prev + (value - prev) / window
+
+
+class _IndicatorState:
+    """Committed recursive-indicator state; advanced once per closed bar."""
+
+    __slots__ = ("ema_fast", "ema_slow", "macd_signal", "avg_gain", "avg_loss",
+                 "atr", "prev_close", "bars")
+
+    def __init__(self):
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_signal = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.atr = None
+        self.prev_close = None
+        self.bars = 0
+
+    def step(self, high: float, low: float, close: float) -> "_IndicatorState":
+        """Returns the state after one more bar, leaving ``self`` untouched."""
+        nxt = _IndicatorState()
+        nxt.bars = self.bars + 1
+        nxt.prev_close = close
+
+        nxt.ema_fast = _ema_step(self.ema_fast, close, 12)
+        nxt.ema_slow = _ema_step(self.ema_slow, close, 26)
+        nxt.macd_signal = _ema_step(self.macd_signal, nxt.ema_fast - nxt.ema_slow, 9)
+
+        if self.prev_close is None:
+            nxt.avg_gain, nxt.avg_loss = self.avg_gain, self.avg_loss
+            true_range = high - low
+        else:
+            change = close - self.prev_close
+            nxt.avg_gain = _wilder_step(self.avg_gain, max(change, 0.0), 14)
+            nxt.avg_loss = _wilder_step(self.avg_loss, max(-change, 0.0), 14)
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        nxt.atr = _wilder_step(self.atr, true_range, 14)
+
+        return nxt
+
+    def rsi(self) -> Optional[float]:
+        if self.bars < 15 or self.avg_gain is None:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+    def macd_diff(self) -> Optional[float]:
+        if self.bars < 26 + 9 - 1:
+            return None
+        return (self.ema_fast - self.ema_slow) - self.macd_signal
+
+
+class _TickerStream:
+    """Ring buffer plus incremental state for one ticker."""
+
+    def __init__(self, capacity: int):
+        self.bars = BarRingBuffer(capacity)
+        self.state = _IndicatorState()
+        self.open_bar_ts: Optional[float] = None
+        self.patterns: List[str] = []
+        self.support_levels: List[float] = []
+        self.resistance_levels: List[float] = []
+
+
+class IntradayEngine:
+    """
+    Maintains live technicals for any number of tickers from an event stream.
+
+    Args:
+        bar_seconds (int, optional): Bar width used when aggregating ticks.
+            Defaults to 60.
+        capacity (int, optional): Bars kept per ticker. Defaults to 390.
+        peak_distance (int, optional): Minimum bar distance between peaks for
+            support/resistance and pattern detection. Defaults to 20, matching
+            the daily analysis.
+    """
+
+    def __init__(self, bar_seconds: int = 60, capacity: int = 390, peak_distance: int = 20):
+        if bar_seconds <= 0:
+            raise ValueError("bar_seconds must be positive")
+
+        self.bar_seconds = bar_seconds
+        self.capacity = capacity
+        self.peak_distance = peak_distance
+        self._streams: Dict[str, _TickerStream] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tickers(self) -> List[str]:
+        with self._lock:
+            return sorted(self._streams)
+
+    def _stream(self, ticker: str) -> _TickerStream:
+        ticker = ticker.upper()  # snapshot() looks tickers up upper-cased
+        stream = self._streams.get(ticker)
+        if stream is None:
+            stream = self._streams[ticker] = _TickerStream(self.capacity)
+        return stream
+
+    def _close_open_bar(self, stream: _TickerStream) -> None:
+        last = stream.bars.last()
+        stream.state = stream.state.step(last["high"], last["low"], last["close"])
+        self._refresh_levels(stream)
+
+    def _refresh_levels(self, stream: _TickerStream) -> None:
+        close = stream.bars.view("close")
+        stream.support_levels, stream.resistance_levels = key_levels(close, distance=self.peak_distance)
+        stream.patterns = identify_chart_patterns(close)
+
+    def on_tick(self, tick: Tick) -> None:
+        """Folds a trade into the bar covering its timestamp."""
+        bar_ts = math.floor(tick.timestamp / self.bar_seconds) * self.bar_seconds
+
+        with self._lock:
+            stream = self._stream(tick.ticker)
+
+            if stream.open_bar_ts is None or bar_ts > stream.open_bar_ts:
+                if stream.open_bar_ts is not None:
+                    self._close_open_bar(stream)
+                stream.bars.append(bar_ts, tick.price, tick.price, tick.price, tick.price, tick.size)
+                stream.open_bar_ts = bar_ts
+                return
+
+            if bar_ts < stream.open_bar_ts:
+                return  # late print for an already closed bar
+
+            last = stream.bars.last()
+            stream.bars.update_last(
+                max(last["high"], tick.price),
+                min(last["low"], tick.price),
+                tick.price,
+                last["volume"] + tick.size,
+            )
+
+    def on_bar(self, bar: Bar) -> None:
+        """Appends a bar, or replaces the open bar when the timestamp repeats."""
+        with self._lock:
+            stream = self._stream(bar.ticker)
+
+            if stream.open_bar_ts is not None and bar.timestamp == stream.open_bar_ts:
+                stream.bars.update_last(bar.high, bar.low, bar.close, bar.volume)
+                return
+
+            if stream.open_bar_ts is not None and bar.timestamp < stream.open_bar_ts:
+                return
+
+            if stream.open_bar_ts is not None:
+                self._close_open_bar(stream)
+            stream.bars.append(bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume)
+            stream.open_bar_ts = bar.timestamp
+
+    def on_event(self, event: Event) -> None:
+        if isinstance(event, Tick):
+            self.on_tick(event)
+        else:
+            self.on_bar(event)
+
+    def run(self, source: BarSource, max_events: Optional[int] = None) -> int:
+        """
+        Consumes events from ``source`` until it is exhausted.
+
+        Returns:
+            int: Number of events processed.
+        """
+        processed = 0
+        for event in source:
+            self.on_event(event)
+            processed += 1
+            if max_events is not None and processed >= max_events:
+                break
+        return processed
+
+    def start(self, source: BarSource) -> threading.Thread:
+        """Runs ``source`` on a daemon thread so callers can keep reading snapshots."""
+        thread = threading.Thread(target=self.run, args=(source,), daemon=True,
+                                  name="intraday-engine")
+        thread.start()
+        return thread
+
+    def snapshot(self, ticker: str) -> Dict[str, Union[str, float, int, List, None]]:
+        """
+        Returns the current technical picture for ``ticker``.
+
+        The result uses the same keys as ``yf_tech_analysis`` so it can be
+        consumed by the same agents. The forming bar is included in every value
+        except the pattern flags and support/resistance levels, which are
+        refreshed when a bar closes.
+        """
+        with self._lock:
+            stream = self._streams.get(ticker.upper())
+            if stream is None or not len(stream.bars):
+                raise ValueError(f"No intraday data for ticker {ticker}")
+
+            last = stream.bars.last()
+            live = stream.state.step(last["high"], last["low"], last["close"])
+            close = stream.bars.view("close").copy()
+            patterns = list(stream.patterns)
+            support = list(stream.support_levels)
+            resistance = list(stream.resistance_levels)
+            bar_count = len(stream.bars)
+
+        current = float(close[-1])
+        sma_20 = _tail_mean(close, 20)
+        std_20 = float(close[-20:].std()) if len(close) >= 20 else None
+
+        bars_per_day = REGULAR_SESSION_SECONDS / self.bar_seconds
+        returns = np.diff(close[-21:]) / close[-21:-1] if len(close) >= 21 else None
+
+        return {
+            "ticker": ticker.upper(),
+            "bar_seconds": self.bar_seconds,
+            "bars": bar_count,
+            "as_of": last["timestamp"],
+            "current_price": current,
+            "sma_50": _tail_mean(close, 50),
+            "sma_200": _tail_mean(close, 200),
+            "rsi": live.rsi(),
+            "macd": live.macd_diff(),
+            "bollinger_hband": float(current > sma_20 + 2 * std_20) if std_20 is not None else None,
+            "bollinger_lband": float(current < sma_20 - 2 * std_20) if std_20 is not None else None,
+            "atr": live.atr if live.bars >= 14 else None,
+            "volatility": float(returns.std(ddof=1) * np.sqrt(TRADING_DAYS * bars_per_day))
+            if returns is not None else None,
+            "momentum": float(current - close[-21]) if len(close) >= 21 else None,
+            "support_levels": support,
+            "resistance_levels": resistance,
+            "identified_patterns": patterns
+        }
+
+
+def _tail_mean(values: np.ndarray, window: int) -> Optional[float]:
+    if len(values) < window:
+        return None
+    return float(values[-window:].mean())
@@ -0,0 +1,47 @@
+"""Intraday Registry Module
+
+Process-wide ``IntradayEngine`` and the background sources feeding it. Kept
+separate from the CrewAI tool wrapper so the Streamlit app can follow tickers
+without importing CrewAI.
+"""
+
+import threading
+from typing import Dict, Optional
+
+from streaming.intraday_engine import IntradayEngine
+from streaming.sources import BarSource, YFinancePollingSource
+
+
+_engine = IntradayEngine(bar_seconds=60, capacity=390)
+_sources: Dict[str, BarSource] = {}
+_sources_lock = threading.Lock()
+
+
+def get_intraday_engine() -> IntradayEngine:
+    """Returns the process-wide intraday engine."""
+    return _engine
+
+
+def follow_ticker(ticker: str, source: Optional[BarSource] = None) -> None:
+    """
+    Starts feeding ``ticker`` into the shared engine if it is not already followed.
+
+    Args:
+        ticker (str): Symbol to follow.
+        source (BarSource, optional): Event source to use instead of the default
+            yfinance 1-minute poller, e.g. a ``FileReplaySource`` in testing.
+    """
+    ticker = ticker.upper()
+    with _sources_lock:
+        if ticker in _sources:
+            return
+        _sources[ticker] = source or YFinancePollingSource([ticker])
+        _engine.start(_sources[ticker])
+
+
+def unfollow_ticker(ticker: str) -> None:
+    """Stops the source feeding ``ticker``; already buffered bars are kept."""
+    with _sources_lock:
+        source = _sources.pop(ticker.upper(), None)
+    if source is not None:
+        source.close()
@@ -0,0 +1,98 @@
+"""Ring Buffer Module
+
+Fixed-capacity OHLCV storage for intraday bars. Each ticker owns one buffer
+backed by preallocated NumPy arrays, so memory stays constant no matter how
+long a trading session runs: once the buffer is full the oldest bar is
+overwritten.
+
+Example:
+    ```python
+    buf = BarRingBuffer(capacity=390)
+    buf.append(1706189400.0, 191.2, 191.5, 191.0, 191.4, 12000)
+    closes = buf.view("close")
+    ```
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+class BarRingBuffer:
+    """
+    Fixed-size circular buffer of OHLCV bars.
+
+    Args:
+        capacity (int): Maximum number of bars retained. Defaults to 390
+            (one regular US session of 1-minute bars).
+    """
+
+    def __init__(self, capacity: int = 390):
+        if not isinstance(capacity, int):
+            raise TypeError("capacity must be an integer")
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self._data: Dict[str, np.ndarray] = {
+            field: np.zeros(capacity, dtype=np.float64) for field in FIELDS
+        }
+        self._head = 0  # index the next bar will be written to
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_full(self) -> bool:
+        return self._size == self.capacity
+
+    def append(self, timestamp: float, open_: float, high: float, low: float,
+               close: float, volume: float) -> None:
+        """Appends a completed or newly opened bar, evicting the oldest when full."""
+        i = self._head
+        self._data["timestamp"][i] = timestamp
+        self._data["open"][i] = open_
+        self._data["high"][i] = high
+        self._data["low"][i] = low
+        self._data["close"][i] = close
+        self._data["volume"][i] = volume
+
+        self._head = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def update_last(self, high: float, low: float, close: float, volume: float) -> None:
+        """Overwrites the high/low/close/volume of the most recent bar in place."""
+        if not self._size:
+            raise IndexError("update_last on empty buffer")
+
+        i = (self._head - 1) % self.capacity
+        self._data["high"][i] = high
+        self._data["low"][i] = low
+        self._data["close"][i] = close
+        self._data["volume"][i] = volume
+
+    def last(self) -> Optional[Dict[str, float]]:
+        """Returns the most recent bar as a dict, or None if the buffer is empty."""
+        if not self._size:
+            return None
+
+        i = (self._head - 1) % self.capacity
+        return {field: float(self._data[field][i]) for field in FIELDS}
+
+    def view(self, field: str) -> np.ndarray:
+        """
+        Returns one field in chronological order (oldest first).
+
+        The result is a copy only when the buffer has wrapped; otherwise it is
+        a read-only slice of the underlying storage.
+        """
+        arr = self._data[field]
+        if not self.is_full:
+            out = arr[:self._size]
+            out.flags.writeable = False
+            return out
+        return np.concatenate((arr[self._head:], arr[:self._head]))
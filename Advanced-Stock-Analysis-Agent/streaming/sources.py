@@ -0,0 +1,190 @@
+"""Market Data Sources Module
+
+Pluggable tick/bar sources for the intraday engine. A source is any iterable
+of ``Tick`` or ``Bar`` events; the engine does not care where they come from.
+
+Sources:
+    - FileReplaySource: Replays a CSV or JSONL capture, optionally paced in
+      (scaled) real time. Intended for testing and offline reproduction.
+    - YFinancePollingSource: Polls yfinance 1-minute bars and emits only bars
+      it has not emitted before.
+
+File format:
+    Tick rows need ``ticker, timestamp, price`` and optionally ``size``.
+    Bar rows need ``ticker, timestamp, open, high, low, close`` and
+    optionally ``volume``. Timestamps are epoch seconds or ISO-8601 strings.
+
+Example:
+    ```python
+    source = FileReplaySource("captures/aapl_2024-01-25.csv")
+    for event in source:
+        print(event)
+    ```
+"""
+
+import csv
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Union
+
+from lazy_imports import lazy_import
+
+yf = lazy_import("yfinance")
+
+
+@dataclass(frozen=True)
+class Tick:
+    ticker: str
+    timestamp: float
+    price: float
+    size: float = 0.0
+
+
+@dataclass(frozen=True)
+class Bar:
+    ticker: str
+    timestamp: float
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+
+
+Event = Union[Tick, Bar]
+
+
+class BarSource:
+    """Base class for intraday event sources."""
+
+    def __iter__(self) -> Iterator[Event]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Releases any resources held by the source."""
+
+
+def _parse_timestamp(value: Union[str, float, int]) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _row_to_event(row: dict) -> Event:
+    ticker = str(row["ticker"]).upper()
+    timestamp = _parse_timestamp(row["timestamp"])
+
+    if row.get("price") not in (None, ""):
+        return Tick(ticker, timestamp, float(row["price"]), float(row.get("size") or 0))
+
+    return Bar(
+        ticker,
+        timestamp,
+        float(row["open"]),
+        float(row["high"]),
+        float(row["low"]),
+        float(row["close"]),
+        float(row.get("volume") or 0),
+    )
+
+
+class FileReplaySource(BarSource):
+    """
+    Replays recorded ticks or bars from a CSV or JSONL file.
+
+    Args:
+        path (str): Path to a ``.csv`` or ``.jsonl`` capture.
+        speed (float, optional): Replay speed relative to the recorded clock.
+            0 (default) replays as fast as possible; 1.0 is real time.
+    """
+
+    def __init__(self, path: str, speed: float = 0.0):
+        if speed < 0:
+            raise ValueError("speed must be >= 0")
+        self.path = path
+        self.speed = speed
+
+    def _rows(self) -> Iterator[dict]:
+        with open(self.path, "r", newline="") as f:
+            if self.path.endswith(".jsonl"):
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+            else:
+                yield from csv.DictReader(f)
+
+    def __iter__(self) -> Iterator[Event]:
+        first_ts = None
+        started = time.monotonic()
+
+        for row in self._rows():
+            event = _row_to_event(row)
+
+            if self.speed:
+                if first_ts is None:
+                    first_ts = event.timestamp
+                due = (event.timestamp - first_ts) / self.speed
+                delay = due - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+            yield event
+
+
+class YFinancePollingSource(BarSource):
+    """
+    Polls yfinance for 1-minute bars and yields each new bar once.
+
+    Only the current day is requested on every poll, so a refresh never
+    reloads more than one session of data per ticker.
+
+    Args:
+        tickers (Iterable[str]): Symbols to follow.
+        interval (str, optional): yfinance bar interval. Defaults to "1m".
+        poll_seconds (float, optional): Delay between polls. Defaults to 60.
+        max_polls (int, optional): Stop after this many polls. None runs forever.
+    """
+
+    def __init__(self, tickers: Iterable[str], interval: str = "1m",
+                 poll_seconds: float = 60.0, max_polls: Optional[int] = None):
+        self.tickers: List[str] = [t.upper() for t in tickers]
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.max_polls = max_polls
+        self._last_emitted = {ticker: 0.0 for ticker in self.tickers}
+        self._stopped = False
+
+    def close(self) -> None:
+        self._stopped = True
+
+    def _poll(self, ticker: str) -> Iterator[Bar]:
+        history = yf.Ticker(ticker).history(period="1d", interval=self.interval)
+        # The last row is still forming; emit it as a bar anyway, the engine
+        # treats a repeated timestamp as an update of the open bar.
+        for ts, row in history.iterrows():
+            timestamp = ts.timestamp()
+            if timestamp < self._last_emitted[ticker]:
+                continue
+            self._last_emitted[ticker] = timestamp
+            yield Bar(ticker, timestamp, float(row["Open"]), float(row["High"]),
+                      float(row["Low"]), float(row["Close"]), float(row["Volume"]))
+
+    def __iter__(self) -> Iterator[Event]:
+        polls = 0
+        while not self._stopped:
+            for ticker in self.tickers:
+                try:
+                    yield from self._poll(ticker)
+                except Exception as e:
+                    print(f"Warning: intraday poll failed for {ticker}: {str(e)}")
+
+            polls += 1
+            if self.max_polls is not None and polls >= self.max_polls:
+                return
+            time.sleep(self.poll_seconds)
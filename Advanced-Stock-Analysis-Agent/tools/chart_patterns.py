@@ -0,0 +1,61 @@
+"""Chart Patterns Module
+
+Peak/trough based chart pattern detection shared by the daily technical
+analysis tool and the intraday engine. Kept free of the CrewAI and ``ta``
+imports so the intraday path does not pay for them.
+"""
+
+from lazy_imports import lazy_import
+
+signal = lazy_import("scipy.signal")
+
+
+def identify_chart_patterns(data):
+    """Chart patterns in a price DataFrame (its 'Close' column) or an array of closes."""
+    patterns = []
+    close = data['Close'].values if hasattr(data, "columns") else data
+
+    # Head and Shoulders pattern
+    if is_head_and_shoulders(close):
+        patterns.append("Head and Shoulders")
+
+    # Double Top pattern
+    if is_double_top(close):
+        patterns.append("Double Top")
+
+    # Double Bottom pattern
+    if is_double_bottom(close):
+        patterns.append("Double Bottom")
+
+    return patterns
+
+def key_levels(close, count=3, distance=20):
+    """Support and resistance: the last ``count`` troughs and peaks of the close series."""
+    peaks, _ = signal.find_peaks(close, distance=distance)
+    troughs, _ = signal.find_peaks(-close, distance=distance)
+    return close[troughs][-count:].tolist(), close[peaks][-count:].tolist()
+
+def is_head_and_shoulders(close):
+    # Simplified head and shoulders detection
+    peaks, _ = signal.find_peaks(close, distance=20)
+    if len(peaks) >= 3:
+        left_shoulder, head, right_shoulder = peaks[-3], peaks[-2], peaks[-1]
+        if close[head] > close[left_shoulder] and close[head] > close[right_shoulder]:
+            return True
+    return False
+
+def is_double_top(close):
+    # Simplified double top detection
+    peaks, _ = signal.find_peaks(close, distance=20)
+    if len(peaks) >= 2:
+        if abs(close[peaks[-1]] - close[peaks[-2]]) / close[peaks[-2]] < 0.03:
+            return True
+    return False
+
+def is_double_bottom(close):
+    # Simplified double bottom detection
+    troughs, _ = signal.find_peaks(-close, distance=20)
+    if len(troughs) >= 2:
+        if abs(close[troughs[-1]] - close[troughs[-2]]) / close[troughs[-2]] < 0.03:
+            return True
+    return False
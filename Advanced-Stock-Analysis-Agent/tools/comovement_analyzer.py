@@ -0,0 +1,223 @@
+"""Co-movement Analyzer Module
+
+Rolling return correlations and betas between a stock and its peers or
+sector ETF, complementing the static ``.info`` comparison done by
+``competitor_analysis``.
+
+All windows are derived from one set of cumulative sums (count, sum, sum of
+squares and cross products) over the aligned return matrix, so each
+additional window or peer costs a vectorised difference rather than a full
+recomputation. Missing observations are handled pairwise. Prices come from
+the shared ``price_store``, which batches downloads, so the peer universe can
+grow to a few thousand symbols.
+
+Example:
+    ```python
+    result = comovement_analysis("AAPL", peers=["MSFT", "GOOGL", "XLK", "TLT"])
+    print(result['windows']['60']['top_correlated'])
+    ```
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from crewai.tools import tool
+
+from data.price_store import price_store
+from lazy_imports import lazy_import
+
+yf = lazy_import("yfinance")
+
+
+SECTOR_ETFS = {
+    "Technology": "XLK",
+    "Financial Services": "XLF",
+    "Healthcare": "XLV",
+    "Consumer Cyclical": "XLY",
+    "Consumer Defensive": "XLP",
+    "Energy": "XLE",
+    "Industrials": "XLI",
+    "Basic Materials": "XLB",
+    "Utilities": "XLU",
+    "Real Estate": "XLRE",
+    "Communication Services": "XLC"
+}
+
+DEFAULT_WINDOWS = (20, 60, 120)
+
+
+def _prefix_sum(values: np.ndarray) -> np.ndarray:
+    """Cumulative sum along time with a leading zero row."""
+    out = np.zeros((values.shape[0] + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+def cumulative_moments(target: np.ndarray, peers: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Prefix sums needed for rolling covariance between ``target`` and each peer column.
+
+    Args:
+        target (np.ndarray): Target returns, shape (T,). NaN marks a missing day.
+        peers (np.ndarray): Peer returns, shape (T, N). NaN marks a missing day.
+
+    Returns:
+        Dict[str, np.ndarray]: Prefix sums of shape (T + 1, N) for the pairwise
+            observation count and the first and second moments.
+    """
+    valid = ~np.isnan(peers) & ~np.isnan(target)[:, None]
+
+    # Demeaning does not change covariances but keeps the sums well conditioned
+    x = np.where(valid, peers - np.nanmean(peers, axis=0), 0.0)
+    y = np.where(valid, (target - np.nanmean(target))[:, None], 0.0)
+
+    return {
+        "n": _prefix_sum(valid.astype(np.float64)),
+        "x": _prefix_sum(x),
+        "y": _prefix_sum(y),
+        "xx": _prefix_sum(x * x),
+        "yy": _prefix_sum(y * y),
+        "xy": _prefix_sum(x * y)
+    }
+
+
+def rolling_correlation_beta(
+        moments: Dict[str, np.ndarray],
+        window: int,
+        min_periods: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling correlation and beta from precomputed prefix sums.
+
+    Beta is the target's sensitivity to each peer (cov(target, peer) / var(peer)).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (correlation, beta), each of shape
+            (T - window + 1, N); row i covers observations i .. i + window - 1.
+            Windows with fewer than ``min_periods`` pairwise observations are NaN.
+    """
+    if min_periods is None:
+        min_periods = max(3, int(window * 0.8))
+
+    def window_sum(key: str) -> np.ndarray:
+        prefix = moments[key]
+        return prefix[window:] - prefix[:-window]
+
+    n = window_sum("n")
+    sx, sy = window_sum("x"), window_sum("y")
+    sxx, syy, sxy = window_sum("xx"), window_sum("yy"), window_sum("xy")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        correlation = cov / np.sqrt(var_x * var_y)
+        beta = cov / var_x
+
+    insufficient = n < min_periods
+    correlation[insufficient] = np.nan
+    beta[insufficient] = np.nan
+    return np.clip(correlation, -1.0, 1.0), beta
+
+
+def _ranked(names: List[str], correlation: np.ndarray, beta: np.ndarray,
+            top_n: int, descending: bool) -> List[Dict[str, Union[str, float]]]:
+    order = np.argsort(correlation)
+    order = order[~np.isnan(correlation[order])]
+    if descending:
+        order = order[::-1]
+    return [
+        {"ticker": names[i], "correlation": round(float(correlation[i]), 4),
+         "beta": round(float(beta[i]), 4)}
+        for i in order[:top_n]
+    ]
+
+
+@tool
+def comovement_analysis(
+        ticker: str,
+        peers: Optional[List[str]] = None,
+        windows: Sequence[int] = DEFAULT_WINDOWS,
+        period: str = "1y",
+        top_n: int = 5
+) -> Dict[str, Union[str, int, Dict]]:
+    """
+    Computes rolling return correlations and betas between a stock and its peers.
+
+    Args:
+        ticker (str): The stock ticker symbol to analyze (e.g., "AAPL").
+        peers (List[str], optional): Peer symbols to compare against. Defaults to
+            the eleven SPDR sector ETFs plus SPY.
+        windows (Sequence[int], optional): Rolling windows in trading days.
+            Defaults to (20, 60, 120).
+        period (str, optional): Price history to load. Defaults to "1y".
+        top_n (int, optional): Names to return per ranking. Defaults to 5.
+
+    Returns:
+        Dict containing:
+            - ticker (str): Analyzed stock symbol
+            - sector_etf (str): Sector ETF used as the sector benchmark, if known
+            - peers_analyzed (int): Peers with usable price history
+            - windows (Dict[str, Dict]): Per window, the latest correlation/beta
+              against the sector ETF plus the top correlated and most
+              anti-correlated peers
+
+    Raises:
+        ValueError: If no price history is available for ticker
+        TypeError: If windows or top_n are invalid
+    """
+    if not isinstance(top_n, int) or top_n <= 0:
+        raise TypeError("top_n must be a positive integer")
+    windows = sorted({int(w) for w in windows})
+    if not windows or windows[0] < 2:
+        raise TypeError("windows must be integers >= 2")
+
+    ticker = ticker.upper()
+    try:
+        sector_etf = SECTOR_ETFS.get(yf.Ticker(ticker).info.get('sector'))
+    except Exception:
+        sector_etf = None
+
+    universe = [p.upper() for p in (peers or list(SECTOR_ETFS.values()) + ["SPY"])]
+    if sector_etf and sector_etf not in universe:
+        universe.append(sector_etf)
+    universe = [p for p in dict.fromkeys(universe) if p != ticker]
+
+    closes = price_store.get_closes([ticker] + universe, period=period)
+    if ticker not in closes:
+        raise ValueError(f"Could not fetch price history for ticker {ticker}")
+
+    returns = closes.pct_change(fill_method=None).iloc[1:]
+    names = [p for p in universe if p in returns]
+    target = returns[ticker].to_numpy(dtype=np.float64)
+    peer_returns = returns[names].to_numpy(dtype=np.float64)
+
+    moments = cumulative_moments(target, peer_returns)
+
+    results = {}
+    for window in windows:
+        if window > len(target):
+            continue
+        correlation, beta = rolling_correlation_beta(moments, window)
+        latest_corr, latest_beta = correlation[-1], beta[-1]
+
+        entry = {
+            "top_correlated": _ranked(names, latest_corr, latest_beta, top_n, descending=True),
+            "anti_correlated": _ranked(names, latest_corr, latest_beta, top_n, descending=False)
+        }
+        if sector_etf in names:
+            i = names.index(sector_etf)
+            entry["sector_etf"] = {
+                "correlation": None if np.isnan(latest_corr[i]) else round(float(latest_corr[i]), 4),
+                "beta": None if np.isnan(latest_beta[i]) else round(float(latest_beta[i]), 4),
+                "correlation_average": None if np.all(np.isnan(correlation[:, i]))
+                else round(float(np.nanmean(correlation[:, i])), 4)
+            }
+        results[str(window)] = entry
+
+    return {
+        "ticker": ticker,
+        "sector_etf": sector_etf,
+        "peers_analyzed": len(names),
+        "windows": results
+    }
@@ -0,0 +1,39 @@
+"""Intraday Analyzer Module
+
+Exposes the live intraday technicals maintained by ``IntradayEngine`` as a
+CrewAI tool. A single process-wide engine is fed by a background yfinance
+polling thread per followed ticker, so repeated calls during the trading day
+read in-memory state instead of reloading history.
+
+Example:
+    ```python
+    follow_ticker("AAPL")
+    result = intraday_tech_analysis("AAPL")
+    print(result['rsi'], result['identified_patterns'])
+    ```
+"""
+
+from crewai.tools import tool
+
+from streaming.registry import follow_ticker, get_intraday_engine
+
+
+@tool
+def intraday_tech_analysis(ticker: str):
+    """
+    Returns live intraday technical analysis for a stock from streaming 1-minute bars.
+
+    Args:
+        ticker (str): The stock ticker symbol.
+
+    Returns:
+        dict: Same keys as yf_tech_analysis (current_price, sma_50, sma_200, rsi,
+            macd, bollinger bands, atr, volatility, momentum, support/resistance
+            levels, identified_patterns) plus bar_seconds, bars and as_of.
+            Indicators that do not have enough bars yet are None.
+    """
+    follow_ticker(ticker)
+    try:
+        return get_intraday_engine().snapshot(ticker)
+    except ValueError:
+        return {"ticker": ticker.upper(), "status": "warming up", "bars": 0}
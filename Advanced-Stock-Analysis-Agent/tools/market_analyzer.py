@@ -25,11 +25,12 @@ Version: 2.0.0
 Last Updated: 2024-01-27
 """
 
-import yfinance as yf
 from crewai.tools import tool
 from typing import Dict, List, Optional, Union
-import pandas as pd
 import numpy as np
+from lazy_imports import lazy_import
+
+yf = lazy_import("yfinance")
 
 
 @tool
@@ -32,15 +32,15 @@ Version: 2.0.0
 Last Updated: 2024-01-27
 """
 
-import yfinance as yf
 from crewai.tools import tool
-from textblob import TextBlob
-import requests
-from bs4 import BeautifulSoup
 from typing import Dict, List, Optional, Union
 import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
+from lazy_imports import lazy_import
+
+yf = lazy_import("yfinance")
+textblob = lazy_import("textblob")
 
 
 @tool
@@ -149,7 +149,7 @@ def analyze_news_articles(
     analyzed_articles = []
 
     for article in news:
-        blob = TextBlob(article['title'] + " " + article.get('description', ''))
+        blob = textblob.TextBlob(article['title'] + " " + article.get('description', ''))
 
         analyzed_articles.append({
             "date": datetime.fromtimestamp(article['providerPublishTime']),
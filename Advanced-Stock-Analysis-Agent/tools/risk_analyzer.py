@@ -1,7 +1,8 @@
-import yfinance as yf
 import numpy as np
-from scipy import stats
 from crewai.tools import tool
+from lazy_imports import lazy_import
+
+yf = lazy_import("yfinance")
 
 @tool
 def risk_assessment(ticker: str, benchmark: str = "^GSPC", period: str = "5y"):
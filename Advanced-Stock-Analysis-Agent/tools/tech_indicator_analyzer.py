@@ -1,5 +1,7 @@
-import yfinance as yf
 from crewai.tools import tool
+from lazy_imports import lazy_import
+
+yf = lazy_import("yfinance")
 
 @tool
 def yf_fundamental_analysis(ticker: str):
@@ -1,36 +1,231 @@
-import os
+import asyncio
+import contextvars
 import json
-from typing import List, Generator
-from langchain_groq import ChatGroq
-from langchain_community.llms import Ollama
-from langchain_core.messages import SystemMessage, AIMessage, HumanMessage
+import queue
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, List, Generator, Optional, Tuple
+from langchain_core.messages import BaseMessage, SystemMessage, AIMessage, HumanMessage, ToolMessage
 from utils import get_latest_messages, load_settings, format_error_response
-from tools import estimate_wait_time
-from constants import UrgencyLevel, ModelType
+from tools import check_symptoms, estimate_wait_time, get_available_slots, get_medical_history, schedule_appointment
+from constants import UrgencyLevel, ModelType, AppointmentType
+from triage_lexicon import get_lexicon
+from emergency_detector import is_emergency
+from router_classifier import classify_locally
+from router_cache import normalize_query, router_cache
+from llm_clients import llm_clients
+from streaming import StreamTiming, atimed_stream, chunk_text, timed_stream
+from conversation import ConversationContext
+from audit_log import audit_log
+import metrics
+
+# Tools the EXPENSIVE tier may call; independent calls in one turn run in parallel.
+# get_medical_history takes no patient ID: it reads the patient bound to the session.
+TRIAGE_TOOLS = [check_symptoms, get_available_slots, schedule_appointment, get_medical_history,
+                estimate_wait_time]
+_TOOLS_BY_NAME = {t.name: t for t in TRIAGE_TOOLS}
+# Lexicon fast paths answered without any model call
+ANSWER_FAST_PATHS = ("estimate_wait_time", "assess_symptoms")
+# Fast paths that only answer when the model fails: today's free slots of that type
+FALLBACK_FAST_PATHS = {"schedule_in_person": AppointmentType.IN_PERSON,
+                       "schedule_virtual": AppointmentType.VIRTUAL}
+_tool_pool = ThreadPoolExecutor(max_workers=int(load_settings()['system'].get('tool_workers', 8)),
+                                thread_name_prefix="tool")
 
 
 def decide_model_from_prompt(messages: List[dict]) -> str:
     """
-    Uses a lightweight model to determine if the medical inquiry needs the more powerful model
+    Decides whether the medical inquiry needs the more powerful model.
+    Red flags from the emergency detector and lexicon phrases are checked
+    first, then the shared decision cache and the local classifier; the LLM
+    router is only called when the classifier is not confident.
+    """
+    started = time.perf_counter()
+    route, source = _decide(messages)
+    _record_route(route, source, started)
+    return route
+
+
+def decide_model_speculatively(messages: List[dict], context: Optional[ConversationContext] = None
+                               ) -> Tuple[str, Optional["Speculation"]]:
+    """
+    Like decide_model_from_prompt, but when only the LLM router can decide,
+    the CHEAP model starts answering while the router runs. Returns the route
+    and, if it is CHEAP, the speculation to pass to prompt_ai so its buffered
+    tokens are used; on an EXPENSIVE route the speculation is cancelled and
+    counted as wasted.
     """
+    started = time.perf_counter()
+    decided = _decide_fast(messages)
+    if decided is not None or get_lexicon().fast_path(messages[-1].content) in ANSWER_FAST_PATHS:
+        # Decided locally, or answered without a model: nothing to overlap
+        route, source = decided or _decide_with_llm(messages)
+        _record_route(route, source, started)
+        return route, None
+
+    speculation = Speculation(messages, context)
+    route, source = _decide_with_llm(messages)
+    _record_route(route, source, started, speculative=True)
+    if route == ModelType.BASIC.value:
+        metrics.SPECULATIONS.inc(outcome="committed")
+        return route, speculation
+
+    speculation.cancel()
+    metrics.SPECULATIONS.inc(outcome="wasted")
+    return route, None
+
+
+def speculation_enabled() -> bool:
+    return bool(load_settings().get("router", {}).get("speculation", {}).get("enabled", False))
+
+
+def _record_route(route: str, source: str, started: float, speculative: bool = False) -> None:
+    metrics.ROUTER_LATENCY.observe(time.perf_counter() - started, source=source)
+    metrics.ROUTING_DECISIONS.inc(source=source, tier=route)
+    if speculative:
+        audit_log.record("routing", route=route, source=source, speculative=True)
+    else:
+        audit_log.record("routing", route=route, source=source)
+
+
+def _decide(messages: List[dict]) -> Tuple[str, str]:
+    """(route, which stage decided it)"""
+    return _decide_fast(messages) or _decide_with_llm(messages)
+
+
+def _decide_fast(messages: List[dict]) -> Optional[Tuple[str, str]]:
+    """The local stages: emergency check, lexicon, decision cache and classifier"""
+    if is_emergency(messages[-1].content):
+        return ModelType.ADVANCED.value, "emergency"
+
+    # Keyword routing: one automaton pass over the latest message
+    route = get_lexicon().route(messages[-1].content)
+    if route:
+        return route, "lexicon"
+
+    key = normalize_query(messages[-1].content)
+    # Messages made only of stopwords/punctuation have no meaningful key
+    cache = router_cache if key else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached:
+            return cached, "cache"
+
+    route = classify_locally(messages[-1].content)
+    if route is None:
+        # Only the LLM router can decide; reuse its decision for the same recent turns
+        cached = router_cache.get(_context_key(messages)) if key and router_cache is not None else None
+        return (cached, "cache") if cached else None
+    if cache is not None:
+        cache.put(key, route)
+    return route, "classifier"
+
+
+def _context_key(messages: List[dict]) -> str:
+    """
+    Cache key for an LLM routing decision. The router reads the latest turns,
+    so a reply like "yes" is keyed on the conversation it answers, never on
+    the message alone (which is how local decisions are keyed).
+    """
+    turns = [normalize_query(m.content) for m in messages[-3:] if not isinstance(m, SystemMessage)]
+    return "llm:" + " | ".join(turns)
+
+
+def _decide_with_llm(messages: List[dict]) -> Tuple[str, str]:
+    route = _route_with_llm(messages)
+    if route is None:
+        # Default to CHEAP for basic queries if LLM fails; not cached
+        metrics.FALLBACKS.inc(reason="router_default")
+        return ModelType.BASIC.value, "default"
+
+    # Messages made only of stopwords/punctuation have no meaningful key
+    if normalize_query(messages[-1].content) and router_cache is not None:
+        router_cache.put(_context_key(messages), route)
+    return route, "llm"
+
+
+def _route_with_llm(messages: List[dict]) -> Optional[str]:
+    """Ask the router LLM for CHEAP/EXPENSIVE; None if the call fails"""
     settings = load_settings()
-    router = Ollama(model=os.getenv('OLLAMA_MODEL'))
     latest_messages = get_latest_messages(messages)
-
     router_prompt = settings['prompts'][
                         'router_prompt'] + f"\n\nRecent conversation:\n{latest_messages}\n\nOutput only: CHEAP or EXPENSIVE"
 
-    response = router.invoke(router_prompt)
-    return response.strip()
+    try:
+        response = llm_clients.ollama().invoke(router_prompt)
+        cleaned_response = response.strip().upper()
+        return ModelType.BASIC.value if ModelType.BASIC.value in cleaned_response else ModelType.ADVANCED.value
+    except Exception as e:
+        print(f"Router LLM error: {str(e)}")
+        metrics.ERRORS.inc(component="router_llm")
+        return None
 
 
-def prompt_ai(messages: List[dict], router_decided_model: str, nested_calls: int = 0) -> Generator[str, None, None]:
+class Speculation:
+    """
+    A CHEAP-tier reply started before the route is known. A background
+    thread reads the stream into a queue; nothing reaches the patient until
+    the route is CHEAP and prompt_ai drains it.
+    """
+    _END = object()
+
+    def __init__(self, messages: List[dict], context: Optional[ConversationContext] = None):
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._cancelled = threading.Event()
+        self.started = time.perf_counter()
+        model_input = _model_input(ModelType.BASIC.value, messages, context)
+        threading.Thread(target=self._run, args=(model_input,), name="speculation", daemon=True).start()
+
+    def _run(self, model_input: Any) -> None:
+        chunks = None
+        try:
+            chunks = _model_for(ModelType.BASIC.value).stream(model_input)
+            for chunk in chunks:
+                if self._cancelled.is_set():
+                    break
+                text = chunk_text(chunk)
+                if text:
+                    self._queue.put(text)
+        except Exception as e:
+            self._queue.put(e)
+        finally:
+            # Closing the stream drops the connection, so Ollama stops generating
+            if chunks is not None and hasattr(chunks, "close"):
+                chunks.close()
+            self._queue.put(self._END)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def drain(self) -> Generator[str, None, None]:
+        """Buffered tokens first, then the rest of the stream as it arrives"""
+        try:
+            while True:
+                item = self._queue.get()
+                if item is self._END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.cancel()
+
+
+def prompt_ai(messages: List[dict], router_decided_model: str, nested_calls: int = 0,
+              timing: Optional[StreamTiming] = None,
+              context: Optional[ConversationContext] = None,
+              speculation: Optional[Speculation] = None) -> Generator[str, None, None]:
     """
     Main function to handle medical inquiries and tool usage
     Args:
         messages: List of conversation messages
         router_decided_model: Model type decision from router
         nested_calls: Counter for nested function calls
+        timing: Optional StreamTiming filled in with the model's time to first token
+        context: Optional bounded conversation context sent instead of the latest message
+        speculation: CHEAP reply already started by decide_model_speculatively
     Yields:
         str: Response chunks
     """
@@ -39,33 +234,154 @@ def prompt_ai(messages: List[dict], router_decided_model: str, nested_calls: int
         yield format_error_response(Exception(), "nested_calls")
         return
 
-    latest_message = messages[-1].content.lower()
+    fast_path = get_lexicon().fast_path(messages[-1].content)
 
     # Handle common queries directly with tools
-    if "wait time" in latest_message:
-        wait_time_result = estimate_wait_time(UrgencyLevel.ROUTINE)
-        yield wait_time_result
+    if fast_path == "estimate_wait_time":
+        yield estimate_wait_time.invoke({"urgency_level": UrgencyLevel.ROUTINE})
         return
 
-    if "assess" in latest_message and "symptoms" in latest_message:
+    if fast_path == "assess_symptoms":
         yield "I'll help assess your symptoms. Please describe your specific symptoms, how long you've had them, and their severity (mild/moderate/severe)."
         return
 
     try:
-        if router_decided_model.lower() == ModelType.BASIC:
-            # Use Ollama for basic queries
-            ai_agent = Ollama(model=os.getenv('OLLAMA_MODEL'))
-            for chunk in ai_agent.stream(messages[-1].content):
-                yield str(chunk)
+        model_input = _model_input(router_decided_model, messages, context)
+        timing = timing or StreamTiming(router_decided_model.upper())
+        if speculation is not None:
+            # The model was asked while the router ran, not when draining starts
+            timing.started = speculation.started
+            chunks = speculation.drain()
+        elif router_decided_model.upper() == ModelType.BASIC:
+            chunks = _model_for(router_decided_model).stream(model_input)
         else:
-            # Use Groq for complex medical queries
-            groq = ChatGroq(
-                api_key=os.getenv('GROQ_API_KEY'),
-                model_name=os.getenv('GROQ_MODEL')
-            )
-            system_msg = settings['prompts']['system_message']
-            response = SystemMessage(content=system_msg)
-            yield response.content
+            chunks = stream_with_tools(model_input, nested_calls)
+        yield from timed_stream(chunks, timing)
+
+    except Exception as e:
+        metrics.ERRORS.inc(component=f"model_{router_decided_model.lower()}")
+        fallback = _fallback_answer(fast_path)
+        yield fallback if fallback is not None else format_error_response(e, "medical")
+
+
+async def aprompt_ai(messages: List[dict], router_decided_model: str,
+                     timing: Optional[StreamTiming] = None,
+                     context: Optional[ConversationContext] = None) -> AsyncGenerator[str, None]:
+    """Async counterpart of prompt_ai for the HTTP API; same fast paths, streamed with astream()"""
+    fast_path = get_lexicon().fast_path(messages[-1].content)
+    if fast_path == "estimate_wait_time":
+        yield await asyncio.to_thread(estimate_wait_time.invoke, {"urgency_level": UrgencyLevel.ROUTINE})
+        return
+
+    if fast_path == "assess_symptoms":
+        yield "I'll help assess your symptoms. Please describe your specific symptoms, how long you've had them, and their severity (mild/moderate/severe)."
+        return
+
+    try:
+        model_input = _model_input(router_decided_model, messages, context)
+        if router_decided_model.upper() == ModelType.BASIC:
+            chunks = _model_for(router_decided_model).astream(model_input)
+        else:
+            chunks = astream_with_tools(model_input)
+        async for text in atimed_stream(chunks, timing or StreamTiming(router_decided_model.upper())):
+            yield text
+
+    except Exception as e:
+        metrics.ERRORS.inc(component=f"model_{router_decided_model.lower()}")
+        fallback = await asyncio.to_thread(_fallback_answer, fast_path)
+        yield fallback if fallback is not None else format_error_response(e, "medical")
+
 
+def _fallback_answer(fast_path: Optional[str]) -> Optional[str]:
+    """Tool answer for a scheduling request when the model is unavailable, or None"""
+    appointment_type = FALLBACK_FAST_PATHS.get(fast_path)
+    if appointment_type is None:
+        return None
+    metrics.FALLBACKS.inc(reason="model_tool_answer")
+    slots = get_available_slots.invoke({"appointment_type": appointment_type,
+                                        "preferred_date": datetime.now().strftime("%Y-%m-%d")})
+    return f"The assistant is unavailable right now. These {appointment_type} appointments are free today:\n\n{slots}"
+
+
+def stream_with_tools(model_input: List[BaseMessage], nested_calls: int = 0) -> Generator[str, None, None]:
+    """
+    EXPENSIVE-tier agent loop. The model's text is streamed as it arrives;
+    when a turn asks for tools, all of its calls run in parallel and their
+    results go back in one round. After max_nested_calls rounds the model
+    is called without tools so it has to answer.
+    """
+    conversation = list(model_input)
+    while True:
+        turn = None
+        for chunk in _groq_for_round(nested_calls).stream(conversation):
+            turn = chunk if turn is None else turn + chunk
+            text = chunk_text(chunk)
+            if text:
+                yield text
+        if turn is None or not turn.tool_calls:
+            return
+        metrics.TOOL_ROUNDS.inc()
+        conversation.append(AIMessage(content=turn.content, tool_calls=turn.tool_calls))
+        conversation.extend(_run_tool_calls(turn.tool_calls))
+        nested_calls += 1
+
+
+async def astream_with_tools(model_input: List[BaseMessage], nested_calls: int = 0) -> AsyncGenerator[str, None]:
+    """Async counterpart of stream_with_tools; tool calls run in the default executor"""
+    conversation = list(model_input)
+    while True:
+        turn = None
+        async for chunk in _groq_for_round(nested_calls).astream(conversation):
+            turn = chunk if turn is None else turn + chunk
+            text = chunk_text(chunk)
+            if text:
+                yield text
+        if turn is None or not turn.tool_calls:
+            return
+        metrics.TOOL_ROUNDS.inc()
+        conversation.append(AIMessage(content=turn.content, tool_calls=turn.tool_calls))
+        conversation.extend(await asyncio.gather(*(asyncio.to_thread(_call_tool, call) for call in turn.tool_calls)))
+        nested_calls += 1
+
+
+def _groq_for_round(nested_calls: int):
+    groq = llm_clients.groq()
+    if nested_calls >= load_settings()['system']['max_nested_calls']:
+        return groq
+    return groq.bind_tools(TRIAGE_TOOLS)
+
+
+def _run_tool_calls(tool_calls: List[Dict[str, Any]]) -> List[ToolMessage]:
+    """Run one turn's tool calls concurrently; results keep the calls' order"""
+    if len(tool_calls) == 1:
+        return [_call_tool(tool_calls[0])]
+    # copy_context keeps the audit session binding in the pool threads
+    futures = [_tool_pool.submit(contextvars.copy_context().run, _call_tool, call) for call in tool_calls]
+    return [future.result() for future in futures]
+
+
+def _call_tool(call: Dict[str, Any]) -> ToolMessage:
+    tool = _TOOLS_BY_NAME.get(call["name"])
+    if tool is None:
+        return ToolMessage(content=f"Unknown tool: {call['name']}", tool_call_id=call["id"], status="error")
+    try:
+        return ToolMessage(content=str(tool.invoke(call["args"])), tool_call_id=call["id"])
     except Exception as e:
-        yield format_error_response(e, "medical")
\ No newline at end of file
+        # Returned to the model rather than raised, so it can answer without the tool
+        return ToolMessage(content=f"Tool error: {str(e)}", tool_call_id=call["id"], status="error")
+
+
+def _model_for(router_decided_model: str):
+    """Ollama for basic queries, Groq for complex medical queries"""
+    if router_decided_model.upper() == ModelType.BASIC:
+        return llm_clients.ollama()
+    return llm_clients.groq()
+
+
+def _model_input(router_decided_model: str, messages: List[dict], context: Optional[ConversationContext]):
+    if router_decided_model.upper() == ModelType.BASIC:
+        return context.as_prompt() if context else messages[-1].content
+    if context:
+        return context.build_messages()
+    system_msg = load_settings()['prompts']['system_message']
+    return [SystemMessage(content=system_msg), HumanMessage(content=messages[-1].content)]
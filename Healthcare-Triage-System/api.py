@@ -0,0 +1,343 @@
+"""
+Async HTTP API for the triage assistant.
+
+Sessions are held in memory and every reply is streamed as server-sent
+events, so one event loop serves hundreds of concurrent conversations.
+Blocking work (the LLM router fallback, tools, the database) runs in a
+bounded thread pool. Each model tier has its own concurrency limit with a
+bounded wait queue: when a tier's queue is full new messages get
+503 + Retry-After instead of piling up.
+
+Events on POST /sessions/{id}/messages:
+    route      {"model": "CHEAP" | "EXPENSIVE"}
+    emergency  {"red_flags": [...], "text": "..."}   (before any model call)
+    token      {"text": "..."}
+    done       {"model": ..., "ttft": ..., "total": ..., "routing": ..., "response_ttft": ...}
+               ttft and total are the model's own times; routing runs from
+               message arrival to the route decision and response_ttft from
+               message arrival to the first token
+    error      {"status": 409 | 503, "detail": "..."}
+
+The clinic side drives the live triage queue that wait estimates come from:
+POST /queue/next calls in the most urgent waiting patient, POST
+/queue/{ticket_id}/complete ends their visit and DELETE /queue/{ticket_id}
+removes a patient who left. Patients join it through the check_symptoms tool.
+
+GET /metrics serves routing, model and tool metrics in the Prometheus text
+format (see metrics.py).
+
+Usage:
+    uvicorn api:app --host 0.0.0.0 --port 8000
+"""
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel, Field
+from ai_router import aprompt_ai, decide_model_from_prompt
+from audit_log import audit_log, bind_session
+from config_service import config_service
+from constants import ModelType
+from conversation import ConversationContext
+from database import db
+from emergency_detector import assess as assess_emergency, emergency_response, emergency_triage_record
+from llm_clients import llm_clients
+from medical_history import bind_patient, prefetch_in_background as prefetch_medical_history
+import metrics
+from streaming import StreamTiming, latency_summary
+from triage_queue import triage_queue
+
+
+class TierBusy(Exception):
+    def __init__(self, tier: str, retry_after: int):
+        super().__init__(f"{tier} tier is at capacity")
+        self.tier = tier
+        self.retry_after = retry_after
+
+
+class TierLimiter:
+    """
+    At most `max_concurrent` streams of one model tier at a time, with up to
+    `max_waiting` more queued. Beyond that, or after waiting
+    `wait_timeout` seconds, requests are turned away with TierBusy.
+    """
+
+    def __init__(self, tier: str, max_concurrent: int, max_waiting: int, wait_timeout: float):
+        self.tier = tier
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @property
+    def full(self) -> bool:
+        return self.running + self.waiting >= self.max_concurrent + self.max_waiting
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, int(self.wait_timeout // 2))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self.full:
+            self.rejected += 1
+            raise TierBusy(self.tier, self.retry_after)
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise TierBusy(self.tier, self.retry_after)
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self.running, "waiting": self.waiting, "rejected": self.rejected,
+                "max_concurrent": self.max_concurrent, "max_waiting": self.max_waiting}
+
+
+@dataclass
+class Session:
+    id: str
+    context: ConversationContext
+    patient_id: Optional[str] = None
+    messages: List[BaseMessage] = field(default_factory=list)
+    busy: bool = False
+    last_active: float = field(default_factory=time.monotonic)
+
+
+class SessionStore:
+    """In-memory sessions; idle ones are dropped after `ttl` seconds"""
+
+    def __init__(self, max_sessions: int, ttl: float):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: Dict[str, Session] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, system_prompt: str, patient_id: Optional[str] = None) -> Session:
+        if len(self._sessions) >= self.max_sessions:
+            self.evict_idle()
+            if len(self._sessions) >= self.max_sessions:
+                raise HTTPException(503, "Too many active sessions", headers={"Retry-After": "30"})
+        session = Session(uuid.uuid4().hex, ConversationContext(system_prompt), patient_id)
+        session.messages.append(SystemMessage(content=system_prompt))
+        self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise HTTPException(404, f"Unknown session: {session_id}")
+        session.last_active = time.monotonic()
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self) -> int:
+        cutoff = time.monotonic() - self.ttl
+        idle = [s.id for s in self._sessions.values() if s.last_active < cutoff and not s.busy]
+        for session_id in idle:
+            del self._sessions[session_id]
+        return len(idle)
+
+
+def api_settings() -> Mapping[str, Any]:
+    return config_service.settings.get("api", {})
+
+
+def build_limiters(settings: Mapping[str, Any]) -> Dict[str, TierLimiter]:
+    tiers = settings.get("tiers", {})
+    limiters = {}
+    for tier in (ModelType.BASIC.value, ModelType.ADVANCED.value):
+        tier_settings = tiers.get(tier.lower(), {})
+        limiters[tier] = TierLimiter(tier, int(tier_settings.get("max_concurrent", 16)),
+                                     int(tier_settings.get("max_waiting", 128)),
+                                     float(tier_settings.get("wait_timeout_seconds", 30)))
+    return limiters
+
+
+async def _evict_idle_sessions(store: SessionStore) -> None:
+    while True:
+        await asyncio.sleep(60)
+        store.evict_idle()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = api_settings()
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=int(settings.get("worker_threads", 64)), thread_name_prefix="api-worker"))
+    app.state.sessions = SessionStore(int(settings.get("max_sessions", 2000)),
+                                      float(settings.get("session_ttl_seconds", 3600)))
+    app.state.limiters = build_limiters(settings)
+    llm_clients.warm_up_in_background()
+    prefetch_medical_history()
+    evictor = asyncio.create_task(_evict_idle_sessions(app.state.sessions))
+    yield
+    evictor.cancel()
+
+
+app = FastAPI(title="Healthcare Triage API", lifespan=lifespan)
+
+
+class SessionIn(BaseModel):
+    # Set by the client application once it has identified the patient
+    # (kiosk check-in, portal login); never taken from the conversation
+    patient_id: Optional[str] = Field(default=None, min_length=1, max_length=64)
+
+
+class MessageIn(BaseModel):
+    text: str = Field(min_length=1, max_length=4000)
+
+
+def sse(event: str, data: Mapping[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def reply_events(request: Request, session: Session, text: str) -> AsyncIterator[str]:
+    """Run one patient message through the emergency check, router and model, as SSE"""
+    if session.busy:
+        yield sse("error", {"status": 409, "detail": "A reply is already streaming for this session"})
+        return
+
+    session.busy = True
+    received = time.perf_counter()
+    bind_session(session.id)
+    bind_patient(session.patient_id)
+    parts: List[str] = []
+    try:
+        session.messages.append(HumanMessage(content=text))
+        session.context.add(session.messages[-1])
+        audit_log.record("message", text=text, channel="api")
+
+        # Red flags get the emergency response at once, before any model call;
+        # the model still answers the message (routed to EXPENSIVE)
+        assessment = assess_emergency(text)
+        if assessment.emergency:
+            parts.append(emergency_response() + "\n\n")
+            metrics.EMERGENCY_FAST_PATH.inc()
+            audit_log.record("emergency", red_flags=assessment.red_flags,
+                             findings=[asdict(f) for f in assessment.findings])
+            yield sse("emergency", {"red_flags": assessment.red_flags, "text": parts[0]})
+            await asyncio.to_thread(db.add_triage_records, [emergency_triage_record(assessment, session.patient_id)])
+
+        model = await asyncio.to_thread(decide_model_from_prompt, session.messages)
+        yield sse("route", {"model": model})
+
+        timing = StreamTiming(model, received=received)
+        try:
+            async with request.app.state.limiters[model].slot():
+                async for chunk in aprompt_ai(session.messages, model, timing=timing, context=session.context):
+                    parts.append(chunk)
+                    yield sse("token", {"text": chunk})
+        except TierBusy as e:
+            metrics.API_REJECTIONS.inc(tier=e.tier)
+            yield sse("error", {"status": 503, "detail": str(e), "retry_after": e.retry_after})
+            return
+
+        latency = {"ttft": timing.ttft, "total": timing.total, "routing": timing.routing,
+                   "response_ttft": timing.response_ttft}
+        audit_log.record("response", model=model, text="".join(parts), channel="api", **latency)
+        yield sse("done", {"model": model, **latency})
+    finally:
+        # Also reached when the client disconnects mid-stream: keep what was said
+        if parts:
+            session.messages.append(AIMessage(content="".join(parts)))
+            session.context.add(session.messages[-1])
+        session.busy = False
+
+
+@app.post("/sessions", status_code=201)
+async def create_session(request: Request, body: Optional[SessionIn] = None) -> Dict[str, str]:
+    system_prompt = config_service.settings["prompts"]["system_message"]
+    session = request.app.state.sessions.create(system_prompt, body.patient_id if body else None)
+    return {"session_id": session.id}
+
+
+@app.get("/sessions/{session_id}/messages")
+async def get_messages(request: Request, session_id: str) -> List[Dict[str, str]]:
+    session = request.app.state.sessions.get(session_id)
+    return [{"role": "patient" if isinstance(m, HumanMessage) else "assistant", "text": m.content}
+            for m in session.messages if not isinstance(m, SystemMessage)]
+
+
+@app.post("/sessions/{session_id}/messages")
+async def post_message(request: Request, session_id: str, message: MessageIn) -> StreamingResponse:
+    session = request.app.state.sessions.get(session_id)
+    if session.busy:
+        raise HTTPException(409, "A reply is already streaming for this session")
+    # Turn work away up front when both tiers are saturated; the tier is only
+    # known after routing, so a single full tier is reported as an error event
+    limiters = request.app.state.limiters.values()
+    if all(limiter.full for limiter in limiters):
+        retry_after = max(limiter.retry_after for limiter in limiters)
+        metrics.API_REJECTIONS.inc(tier="all")
+        raise HTTPException(503, "The triage service is at capacity", headers={"Retry-After": str(retry_after)})
+
+    return StreamingResponse(reply_events(request, session, message.text), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(request: Request, session_id: str) -> None:
+    if not request.app.state.sessions.delete(session_id):
+        raise HTTPException(404, f"Unknown session: {session_id}")
+
+
+@app.post("/queue/next")
+async def start_next_patient() -> Dict[str, Any]:
+    ticket = triage_queue.start_next()
+    if ticket is None:
+        raise HTTPException(404, "No patients waiting")
+    return ticket.to_dict()
+
+
+@app.post("/queue/{ticket_id}/complete", status_code=204)
+async def complete_visit(ticket_id: int) -> None:
+    try:
+        triage_queue.complete(ticket_id)
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+
+
+@app.delete("/queue/{ticket_id}", status_code=204)
+async def cancel_ticket(ticket_id: int) -> None:
+    if not triage_queue.cancel(ticket_id):
+        raise HTTPException(404, f"Ticket {ticket_id} is not waiting")
+
+
+@app.get("/health")
+async def health(request: Request) -> Dict[str, Any]:
+    return {
+        "sessions": len(request.app.state.sessions),
+        "tiers": {tier: limiter.stats() for tier, limiter in request.app.state.limiters.items()},
+        "latency": latency_summary(),
+        "queue": triage_queue.snapshot()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
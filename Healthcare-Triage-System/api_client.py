@@ -0,0 +1,45 @@
+import json
+from typing import Any, Dict, Iterator, Optional, Tuple
+import httpx
+
+
+class TriageAPIClient:
+    """
+    Client for the triage HTTP API (api.py), used by the Streamlit UI when
+    TRIAGE_API_URL is set and by the load-test harness. One pooled httpx
+    client is shared by every call.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 120, client: Optional[httpx.Client] = None):
+        self.base_url = base_url.rstrip("/")
+        self._client = client or httpx.Client(timeout=httpx.Timeout(timeout, connect=5))
+
+    def create_session(self, patient_id: Optional[str] = None) -> str:
+        response = self._client.post(f"{self.base_url}/sessions",
+                                     json={"patient_id": patient_id} if patient_id else None)
+        response.raise_for_status()
+        return response.json()["session_id"]
+
+    def delete_session(self, session_id: str) -> None:
+        self._client.delete(f"{self.base_url}/sessions/{session_id}")
+
+    def stream_message(self, session_id: str, text: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Send a patient message and yield (event, data) pairs as the reply streams in"""
+        with self._client.stream("POST", f"{self.base_url}/sessions/{session_id}/messages",
+                                 json={"text": text}) as response:
+            if response.status_code != 200:
+                response.read()
+                yield "error", {"status": response.status_code, "detail": response.json().get("detail"),
+                                "retry_after": response.headers.get("Retry-After")}
+                return
+
+            event = "message"
+            for line in response.iter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[len("data:"):])
+                    event = "message"
+
+    def close(self) -> None:
+        self._client.close()
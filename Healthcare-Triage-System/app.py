@@ -1,310 +1,74 @@
 import streamlit as st
 from datetime import datetime, timedelta
-import json
 import os
-from typing import List, Dict, Optional
-from langchain_groq import ChatGroq
-from langchain_community.llms import Ollama
-from langchain_core.tools import tool
+import time
+import uuid
+from dataclasses import asdict
+from typing import Dict
 from langchain_core.messages import SystemMessage, AIMessage, HumanMessage, ToolMessage
 import pytz
-from enum import Enum
-
-
-# Enums for standardization
-class UrgencyLevel(str, Enum):
-    ROUTINE = "routine"
-    URGENT = "urgent"
-    EMERGENCY = "emergency"
-
-
-class AppointmentType(str, Enum):
-    VIRTUAL = "virtual"
-    IN_PERSON = "in-person"
-    SPECIALIST = "specialist"
+from constants import ModelType, ErrorMessages
+from ai_router import decide_model_from_prompt, decide_model_speculatively, prompt_ai, speculation_enabled
+from llm_clients import llm_clients
+from streaming import StreamTiming
+from conversation import ConversationContext
+from chat_history import chat_history
+from database import db
+from emergency_detector import assess as assess_emergency, emergency_response, emergency_triage_record
+from audit_log import audit_log, bind_session
+from api_client import TriageAPIClient
+from medical_history import prefetch_in_background as prefetch_medical_history
+import metrics
 
 
 # Environment and configuration
-groq_api_key = os.getenv('GROQ_API_KEY')
-groq_model = os.getenv('GROQ_MODEL')
 ollama_model = os.getenv('OLLAMA_MODEL')
 timezone = pytz.timezone('America/New_York')
-
-# Mock database for healthcare system
-mock_healthcare_db = {
-    "appointments": [],
-    "triage_records": [],
-    "available_slots": {
-        "virtual": ["09:00", "10:00", "14:00", "15:00"],
-        "in-person": ["11:00", "13:00", "16:00"],
-        "specialist": ["10:30", "14:30"]
-    },
-    "symptoms_history": []
-}
-
-
-# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-# Healthcare Triage Tools
-# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-
-@tool
-def check_symptoms(symptoms: List[str], duration: str, severity: str) -> str:
-    """
-    Records and analyzes patient symptoms
-    Args:
-        symptoms: List of reported symptoms
-        duration: How long symptoms have been present
-        severity: Perceived severity (mild/moderate/severe)
-    Returns:
-        str: Initial assessment and recommendations
-    """
-    symptom_record = {
-        "id": len(mock_healthcare_db["symptoms_history"]) + 1,
-        "symptoms": symptoms,
-        "duration": duration,
-        "severity": severity,
-        "recorded_at": str(datetime.now(timezone)),
-    }
-    mock_healthcare_db["symptoms_history"].append(symptom_record)
-
-    # Basic severity check for demonstration
-    if severity.lower() == "severe" or any(urgent in [s.lower() for s in symptoms]
-                                           for urgent in ["chest pain", "difficulty breathing", "severe pain"]):
-        return "URGENT: Please seek immediate medical attention or call emergency services."
-
-    return json.dumps({
-        "assessment": "Symptoms recorded and assessed",
-        "record_id": symptom_record["id"],
-        "recommendation": "Based on initial assessment, scheduling a consultation is recommended."
-    })
-
-
-@tool
-def schedule_appointment(
-        appointment_type: AppointmentType,
-        preferred_date: str,
-        symptoms_record_id: Optional[int] = None
-) -> str:
-    """
-    Schedules a healthcare appointment
-    Args:
-        appointment_type: Type of appointment needed
-        preferred_date: Preferred date for appointment
-        symptoms_record_id: Optional reference to recorded symptoms
-    Returns:
-        str: Appointment confirmation or available slots
-    """
-    try:
-        date_obj = datetime.strptime(preferred_date, "%Y-%m-%d").date()
-
-        # Mock appointment scheduling logic
-        appointment = {
-            "id": len(mock_healthcare_db["appointments"]) + 1,
-            "type": appointment_type,
-            "date": preferred_date,
-            "time": mock_healthcare_db["available_slots"][appointment_type][0],
-            "symptoms_record_id": symptoms_record_id,
-            "scheduled_at": str(datetime.now(timezone))
-        }
-
-        mock_healthcare_db["appointments"].append(appointment)
-        mock_healthcare_db["available_slots"][appointment_type].pop(0)
-
-        return json.dumps({
-            "status": "confirmed",
-            "appointment_details": appointment,
-            "instructions": "Please arrive 15 minutes before your appointment time."
-        })
-    except Exception as e:
-        return f"Error scheduling appointment: {str(e)}"
-
-
-@tool
-def get_medical_history(patient_id: str) -> str:
-    """
-    Retrieves patient's medical history (mock data)
-    Args:
-        patient_id: Patient's identifier
-    Returns:
-        str: JSON string of medical history
-    """
-    # Mock medical history - in real implementation, this would query a secure database
-    return json.dumps({
-        "recent_visits": ["2024-01-15: Regular checkup", "2023-12-01: Flu symptoms"],
-        "ongoing_conditions": ["Mild hypertension"],
-        "allergies": ["Penicillin"],
-        "current_medications": ["Lisinopril 10mg daily"]
-    })
-
-
-@tool
-def estimate_wait_time(urgency_level: UrgencyLevel) -> str:
-    """
-    Estimates current wait time based on urgency
-    Args:
-        urgency_level: Level of medical urgency
-    Returns:
-        str: Estimated wait time
-    """
-    wait_times = {
-        UrgencyLevel.ROUTINE: "2-3 hours",
-        UrgencyLevel.URGENT: "30-45 minutes",
-        UrgencyLevel.EMERGENCY: "Immediate attention"
-    }
-    return json.dumps({
-        "urgency": urgency_level,
-        "estimated_wait": wait_times[urgency_level],
-        "note": "Wait times are estimates and may vary based on current patient volume"
-    })
+# With TRIAGE_API_URL set, replies come from the async API (api.py) instead of in-process
+triage_api = TriageAPIClient(os.environ['TRIAGE_API_URL']) if os.getenv('TRIAGE_API_URL') else None
 
 
-# Available functions mapping
-available_functions = {
-    "check_symptoms": check_symptoms,
-    "schedule_appointment": schedule_appointment,
-    "get_medical_history": get_medical_history,
-    "estimate_wait_time": estimate_wait_time
-}
+def latency_caption(response_ttft: float, routing: float, ttft: float, total: float) -> str:
+    """First token as the patient saw it, split into router and model time"""
+    return (f"First token {response_ttft:.2f}s after your message "
+            f"(router {routing:.2f}s · model first token {ttft:.2f}s) · model complete in {total:.2f}s")
 
 
-# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-# Enhanced AI Router for Healthcare
-# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def reply_via_api(prompt: str) -> str:
+    """Stream the reply for one message from the triage API; routing and auditing happen server-side"""
+    if "api_session_id" not in st.session_state:
+        st.session_state["api_session_id"] = triage_api.create_session()
 
-def get_latest_messages(messages: List[dict], num_messages: int = 3) -> str:
-    """Gets the latest n messages from the conversation history"""
-    return "\n\n".join([message.content for message in messages[-num_messages:]])
+    done = {}
+    banner = []
 
+    def text_events():
+        for event, data in triage_api.stream_message(st.session_state.api_session_id, prompt):
+            if event == "route":
+                yield ("🔵 Using Ollama Model for Simple Query\n\n" if data["model"] == ModelType.BASIC
+                       else "🔴 Using Groq Model for Complex Query\n\n")
+            elif event == "emergency":
+                st.error(data["text"])
+                banner.append(data["text"])
+            elif event == "token":
+                yield data["text"]
+            elif event == "done":
+                done.update(data)
+            elif event == "error":
+                yield f"\n\n{ErrorMessages.GENERIC_ERROR} ({data['detail']})"
 
-def decide_model_from_prompt(messages: List[dict]) -> str:
-    """
-    Strict router to determine query complexity
-    """
-    router = Ollama(model=ollama_model)
-    latest_message = messages[-1].content.lower()
+    response_text = st.write_stream(text_events())
+    if done.get("ttft") is not None:
+        st.caption(latency_caption(done["response_ttft"], done["routing"], done["ttft"], done["total"]))
+    return "".join(banner) + response_text
 
-    # First check for explicit simple queries
-    simple_queries = [
-        "routine checkup",
-        "schedule appointment",
-        "wait time",
-        "office hours",
-        "where is",
-        "directions",
-        "mild cold",
-        "registration",
-    ]
-
-    # If any simple query patterns match, return CHEAP immediately
-    if any(phrase in latest_message for phrase in simple_queries):
-        return "CHEAP"
-
-    # Check for complex/emergency patterns
-    complex_queries = [
-        "severe",
-        "emergency",
-        "chest pain",
-        "difficulty breathing",
-        "multiple symptoms",
-        "drug interaction",
-        "mental health",
-        "suicidal",
-        "confusion",
-        "elderly",
-        "pregnancy",
-    ]
-
-    # If any complex patterns match, route to EXPENSIVE
-    if any(phrase in latest_message for phrase in complex_queries):
-        return "EXPENSIVE"
-
-    # For anything else, use the LLM router as backup
-    router_prompt = """
-    Classify this medical query as either 'CHEAP' (simple) or 'EXPENSIVE' (complex).
-
-    CHEAP = routine/administrative tasks like:
-    - Scheduling routine checkups
-    - Basic appointments
-    - Wait times
-    - Location/hours
-    - Simple symptoms
-
-    EXPENSIVE = medical complexity like:
-    - Multiple symptoms
-    - Severe conditions
-    - Mental health
-    - Complex conditions
-    - Emergencies
-
-    Query: {latest_message}
-
-    Output exactly one word - CHEAP or EXPENSIVE:"""
-
-    try:
-        response = router.invoke(router_prompt.format(latest_message=latest_message))
-        cleaned_response = response.strip().upper()
-        return "CHEAP" if "CHEAP" in cleaned_response else "EXPENSIVE"
-    except Exception as e:
-        print(f"Router LLM error: {str(e)}")
-        # Default to CHEAP for basic queries if LLM fails
-        return "CHEAP"
-
-
-def prompt_ai(messages: List[dict], router_decided_model: str, nested_calls: int = 0):
-    """
-    Enhanced function to handle medical inquiries with visible model routing
-    """
-    if nested_calls > 3:
-        yield "Error: Too many nested calls. Please try rephrasing your question."
-        return
-
-    latest_message = messages[-1].content.lower()
-
-    # Handle simple queries directly
-    simple_queries = {
-        "wait time": (estimate_wait_time, {"urgency_level": UrgencyLevel.ROUTINE}),
-        "schedule": (schedule_appointment, {"appointment_type": AppointmentType.VIRTUAL,
-                                            "preferred_date": datetime.now().strftime("%Y-%m-%d")}),
-        "routine checkup": (schedule_appointment, {"appointment_type": AppointmentType.IN_PERSON,
-                                                   "preferred_date": datetime.now().strftime("%Y-%m-%d")})
-    }
-
-    # First yield the routing decision with clear indication
-    if router_decided_model.lower() == "cheap":
-        yield "🔵 Using Ollama Model for Simple Query\n\n"
-
-        # Try to use Ollama
-        try:
-            ai_agent = Ollama(model=ollama_model)
-            response = ai_agent.invoke(messages[-1].content)
-            yield str(response)
-        except Exception as e:
-            yield f"Error with Ollama model: {str(e)}\n"
-            yield "Falling back to basic response handler...\n"
-
-            # Handle basic queries with tools
-            for key, (tool_func, params) in simple_queries.items():
-                if key in latest_message:
-                    try:
-                        result = tool_func(**params)
-                        yield str(result)
-                        return
-                    except Exception as tool_error:
-                        yield f"Error using tool: {str(tool_error)}"
-
-    else:
-        yield "🔴 Using Groq Model for Complex Query\n\n"
-        try:
-            groq_agent = ChatGroq(
-                api_key=groq_api_key,
-                model_name=groq_model
-            )
-            response = groq_agent.invoke(messages[-1].content)
-            yield str(response)
-        except Exception as e:
-            yield f"Error with Groq model: {str(e)}\nPlease consult a healthcare provider for complex medical questions."
 
 def main():
+    # Load the basic model while the page renders; no-op after the first run
+    llm_clients.warm_up_in_background(ollama_model)
+    metrics.start_metrics_server()
+    prefetch_medical_history()
+
     st.title("🏥 AI-Powered Healthcare Triage Assistant")
 
     # Initialize session state
@@ -338,6 +102,9 @@ def main():
         Current date and time: {datetime.now(timezone).strftime('%Y-%m-%d %H:%M %Z')}
         """
         st.session_state["messages"] = [SystemMessage(content=system_message)]
+        st.session_state["context"] = ConversationContext(system_message)
+        st.session_state["session_id"] = uuid.uuid4().hex
+    bind_session(st.session_state.session_id)
 
     # Example Queries at the top of UI
     with st.expander("📋 Example Queries", expanded=True):
@@ -370,21 +137,46 @@ def main():
         This system does not replace professional medical advice.
     """)
 
-    # Display chat history
-    for message in st.session_state.messages:
-        role = "assistant" if isinstance(message, (AIMessage, SystemMessage)) else "user"
-        with st.chat_message(role):
-            st.markdown(message.content)
+    # Display chat history (latest page only)
+    chat_history.render(st.session_state.messages)
 
     # Handle user input with visible routing
     if prompt := st.chat_input("Please describe your medical concern or request"):
+        received = time.perf_counter()
         # Add user message to chat
         st.chat_message("user").markdown(prompt)
         st.session_state.messages.append(HumanMessage(content=prompt))
+        st.session_state.context.add(st.session_state.messages[-1])
 
         # Process response
         with st.chat_message("assistant"):
-            model_choice = decide_model_from_prompt(st.session_state.messages)
+            if triage_api is not None:
+                response_text = reply_via_api(prompt)
+                st.session_state.messages.append(AIMessage(content=response_text))
+                st.session_state.context.add(st.session_state.messages[-1])
+                return
+
+            audit_log.record("message", text=prompt)
+            # Red flags get the emergency response at once, before any model call;
+            # the model still answers the message (routed to EXPENSIVE)
+            assessment = assess_emergency(prompt)
+            banner = ""
+            if assessment.emergency:
+                banner = emergency_response()
+                metrics.EMERGENCY_FAST_PATH.inc()
+                st.error(banner)
+                st.caption(f"Red flags: {', '.join(assessment.red_flags) or 'emergency phrase'} · "
+                           f"detected in {assessment.elapsed_ms:.1f} ms")
+                audit_log.record("emergency", red_flags=assessment.red_flags,
+                                 findings=[asdict(f) for f in assessment.findings])
+                db.add_triage_records([emergency_triage_record(assessment)])
+
+            speculation = None
+            if speculation_enabled():
+                model_choice, speculation = decide_model_speculatively(st.session_state.messages,
+                                                                       st.session_state.context)
+            else:
+                model_choice = decide_model_from_prompt(st.session_state.messages)
 
             # Show routing decision with clear visual indicator
             if model_choice.lower() == "cheap":
@@ -392,12 +184,19 @@ def main():
             else:
                 st.warning("🔴 Processing as Complex/Critical Query (Groq Model)")
 
-            response_text = ""
-            for chunk in prompt_ai(st.session_state.messages, model_choice):
-                response_text += str(chunk)
-                st.write(chunk)
+            timing = StreamTiming(model_choice, received=received)
+            response_text = st.write_stream(prompt_ai(st.session_state.messages, model_choice, timing=timing,
+                                                      context=st.session_state.context,
+                                                      speculation=speculation))
+            if timing.ttft is not None:
+                st.caption(latency_caption(timing.response_ttft, timing.routing, timing.ttft, timing.total))
+            audit_log.record("response", model=model_choice, text=response_text, ttft=timing.ttft,
+                             total=timing.total, routing=timing.routing, response_ttft=timing.response_ttft)
+            if banner:
+                response_text = f"{banner}\n\n{response_text}"
 
             st.session_state.messages.append(AIMessage(content=response_text))
+            st.session_state.context.add(st.session_state.messages[-1])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,336 @@
+"""
+Append-only audit log for triage decisions, routing choices and tool calls.
+
+record() only appends to an in-memory buffer; a background writer drains it
+in batches into JSONL segment files, so logging adds no I/O to the chat
+path. Segments are never rewritten: a new one is started on each run and
+whenever the current one reaches its size or age limit. Every batch also
+appends one line to the segment's sparse index (byte range, time range and
+the sessions in the batch), which lets read() seek straight to the batches
+that can match a time window or session.
+
+Usage:
+    python audit_log.py query --session 3f2a... --since 2025-01-01T00:00
+"""
+import argparse
+import atexit
+import contextvars
+import functools
+import glob
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from config_service import BASE_DIR, config_service
+import metrics
+
+FSYNC_POLICIES = ("batch", "interval", "never")
+_SEGMENT = re.compile(r"audit-(\d+)\.jsonl$")
+
+# Session the current thread/task is serving; set once per request
+_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("audit_session", default=None)
+
+
+def bind_session(session_id: Optional[str]) -> None:
+    """Attribute records from the current thread (or asyncio task) to a session"""
+    _session.set(session_id)
+
+
+class AuditLog:
+    def __init__(self, directory: str, batch_size: int = 256, flush_interval: float = 1.0,
+                 fsync: str = "batch", fsync_interval: float = 5.0, max_segment_bytes: int = 64 * 1024 * 1024,
+                 max_segment_seconds: float = 86400, max_buffer: int = 100_000, enabled: bool = True):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.max_buffer = max_buffer
+        self.enabled = enabled
+
+        # deque.append/popleft are atomic, so producers never take a lock
+        self._buffer: Deque[Any] = deque()
+        self._seq = itertools.count(1)
+        self._accepted = 0
+        self._dropped = 0
+        self._written = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self._segment = None
+        self._index = None
+        self._segment_opened = 0.0
+        self._last_fsync = 0.0
+
+    def record(self, event: str, session_id: Optional[str] = None, **fields: Any) -> bool:
+        """Queue one audit record; never blocks. Returns False if logging is off or the buffer is full."""
+        if not self.enabled or self._closed:
+            return False
+        if len(self._buffer) >= self.max_buffer:
+            self._dropped += 1
+            return False
+
+        self._buffer.append({"ts": time.time(), "seq": next(self._seq), "event": event,
+                             "session": session_id or _session.get(), **fields})
+        self._accepted += 1
+        if self._thread is None:
+            self._start()
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._write_pending()
+            except Exception as e:
+                # The failed batch is back in the buffer and is retried on the next pass
+                print(f"Error writing audit log: {str(e)}")
+                metrics.ERRORS.inc(component="audit_log")
+                if self._closed:
+                    # Shutting down with the log unwritable: count what is left as dropped
+                    while self._buffer:
+                        item = self._buffer.popleft()
+                        if isinstance(item, threading.Event):
+                            item.set()
+                        else:
+                            self._dropped += 1
+                    break
+            if self._closed and not self._buffer:
+                break
+        self._close_segment()
+
+    def _write_pending(self) -> None:
+        while self._buffer:
+            batch, markers = [], []
+            while self._buffer and len(batch) < self.batch_size:
+                item = self._buffer.popleft()
+                if isinstance(item, threading.Event):
+                    markers.append(item)  # flush() marker: everything before it is in this batch
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    self._write_batch(batch)
+                    self._written += len(batch)
+            except Exception:
+                # Put the batch (and the flush markers waiting on it) back in
+                # front; a fresh segment is opened for the retry
+                self._buffer.extendleft(reversed(batch + markers))
+                self._close_segment()
+                raise
+            for marker in markers:
+                marker.set()
+
+        if self.fsync == "interval" and self._segment is not None \
+                and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._sync()
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(r, default=str, separators=(",", ":")) + "\n" for r in batch).encode()
+        if self._segment is None or self._segment.tell() + len(data) > self.max_segment_bytes \
+                or time.monotonic() - self._segment_opened >= self.max_segment_seconds:
+            self._rotate()
+
+        offset = self._segment.tell()
+        self._segment.write(data)
+        self._segment.flush()
+        sessions = sorted({r["session"] for r in batch if r["session"] is not None})
+        self._index.write(json.dumps({"offset": offset, "length": len(data), "count": len(batch),
+                                      "first_ts": min(r["ts"] for r in batch),
+                                      "last_ts": max(r["ts"] for r in batch),
+                                      "sessions": sessions}) + "\n")
+        self._index.flush()
+        if self.fsync == "batch":
+            self._sync()
+
+    def _sync(self) -> None:
+        os.fsync(self._segment.fileno())
+        os.fsync(self._index.fileno())
+        self._last_fsync = time.monotonic()
+
+    def _rotate(self) -> None:
+        self._close_segment()
+        while True:
+            numbers = [int(m.group(1)) for m in map(_SEGMENT.search, os.listdir(self.directory)) if m]
+            path = os.path.join(self.directory, f"audit-{max(numbers, default=0) + 1:06d}.jsonl")
+            try:
+                # "xb": segments are append-only and never reopened or overwritten
+                self._segment = open(path, "xb")
+                break
+            except FileExistsError:
+                # Another process sharing the directory took this number first
+                continue
+        self._index = open(path[:-len(".jsonl")] + ".idx", "x")
+        self._segment_opened = time.monotonic()
+
+    def _close_segment(self) -> None:
+        if self._segment is not None:
+            try:
+                if self.fsync != "never":
+                    self._sync()
+            finally:
+                self._segment.close()
+                if self._index is not None:
+                    self._index.close()
+                self._segment = self._index = None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything recorded so far is written; True if it was within the timeout"""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        marker = threading.Event()
+        self._buffer.append(marker)
+        self._wake.set()
+        return marker.wait(timeout)
+
+    def close(self) -> None:
+        """Write out the buffer and close the current segment"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._wake.set()
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"accepted": self._accepted, "written": self._written, "dropped": self._dropped,
+                "buffered": len(self._buffer), "fsync": self.fsync}
+
+    def segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "audit-*.jsonl")))
+
+    def read(self, since: Optional[float] = None, until: Optional[float] = None,
+             session_id: Optional[str] = None, event: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Records matching every given filter, oldest first (times are UNIX timestamps)"""
+        for path in self.segments():
+            for record in self._read_segment(path, since, until, session_id):
+                if (since is not None and record["ts"] < since) or (until is not None and record["ts"] > until):
+                    continue
+                if session_id is not None and record.get("session") != session_id:
+                    continue
+                if event is not None and record.get("event") != event:
+                    continue
+                yield record
+
+    @staticmethod
+    def _read_segment(path: str, since: Optional[float], until: Optional[float],
+                      session_id: Optional[str]) -> Iterator[Dict[str, Any]]:
+        try:
+            with open(path[:-len(".jsonl")] + ".idx", "r") as f:
+                index = [json.loads(line) for line in f if line.endswith("\n")]
+        except OSError:
+            index = None
+
+        with open(path, "rb") as f:
+            if index is None:
+                # No index (e.g. written by a crashed process): scan the whole segment
+                chunks = [f.read()]
+            else:
+                chunks = []
+                for entry in index:
+                    if (since is not None and entry["last_ts"] < since) \
+                            or (until is not None and entry["first_ts"] > until) \
+                            or (session_id is not None and session_id not in entry["sessions"]):
+                        continue
+                    f.seek(entry["offset"])
+                    chunks.append(f.read(entry["length"]))
+
+        for chunk in chunks:
+            for line in chunk.splitlines():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn final line after a crash
+
+
+def create_audit_log() -> AuditLog:
+    """Build the audit log configured under `audit` in settings.yaml"""
+    settings = config_service.settings.get("audit", {})
+    directory = os.getenv("AUDIT_LOG_DIR") or os.path.join(BASE_DIR, settings.get("directory", "data/audit"))
+    return AuditLog(
+        directory,
+        batch_size=int(settings.get("batch_size", 256)),
+        flush_interval=float(settings.get("flush_interval_seconds", 1.0)),
+        fsync=settings.get("fsync", "batch"),
+        fsync_interval=float(settings.get("fsync_interval_seconds", 5.0)),
+        max_segment_bytes=int(float(settings.get("max_segment_mb", 64)) * 1024 * 1024),
+        max_segment_seconds=float(settings.get("max_segment_seconds", 86400)),
+        max_buffer=int(settings.get("max_buffer", 100_000)),
+        enabled=bool(settings.get("enabled", True))
+    )
+
+
+# Create a singleton instance
+audit_log = create_audit_log()
+
+
+def audited(func: Callable) -> Callable:
+    """Record every call of a tool function (arguments, output, duration) in the audit log and metrics"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            metrics.TOOL_CALLS.inc(tool=func.__name__, status="error")
+            metrics.TOOL_LATENCY.observe(elapsed, tool=func.__name__)
+            audit_log.record("tool_call", tool=func.__name__, args=kwargs, error=repr(e),
+                             duration_ms=round(elapsed * 1000, 3))
+            raise
+        elapsed = time.perf_counter() - started
+        metrics.TOOL_CALLS.inc(tool=func.__name__, status="ok")
+        metrics.TOOL_LATENCY.observe(elapsed, tool=func.__name__)
+        audit_log.record("tool_call", tool=func.__name__, args=kwargs, output=result,
+                         duration_ms=round(elapsed * 1000, 3))
+        return result
+    return wrapper
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the triage audit log")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    query_parser = subparsers.add_parser("query", help="Print matching records as JSON lines")
+    query_parser.add_argument("--session")
+    query_parser.add_argument("--event")
+    query_parser.add_argument("--since", help="ISO time or UNIX timestamp")
+    query_parser.add_argument("--until", help="ISO time or UNIX timestamp")
+    args = parser.parse_args()
+
+    for record in audit_log.read(_timestamp(args.since), _timestamp(args.until), args.session, args.event):
+        print(json.dumps(record, default=str))
+
+
+if __name__ == "__main__":
+    main()
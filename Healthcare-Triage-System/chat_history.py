@@ -0,0 +1,81 @@
+import uuid
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+import streamlit as st
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from config_service import config_service
+
+VISIBLE_KEY = "history_visible"
+CACHE_KEY = "history_markdown"
+
+
+def ensure_id(message: BaseMessage) -> str:
+    """Give a message a stable id the first time it is rendered"""
+    if not message.id:
+        message.id = uuid.uuid4().hex
+    return message.id
+
+
+def to_markdown(message: BaseMessage) -> str:
+    """Display text of a message; chat models may return content as a list of parts"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "\n\n".join(part if isinstance(part, str) else str(part.get("text", part)) for part in content)
+
+
+class ChatHistoryView:
+    """
+    Renders only the most recent messages of a session.
+
+    A Streamlit rerun redraws every element, so drawing the whole history
+    makes each turn slower than the last. The view draws the latest
+    `page_size` messages (the system prompt is never shown) and a
+    "Load earlier" button that widens the window by one page. Prepared
+    markdown is cached per message id in the session, bounded to
+    `cache_size` entries.
+    """
+
+    def __init__(self, page_size: Optional[int] = None, cache_size: Optional[int] = None):
+        system = config_service.settings.get("system", {})
+        self.page_size = page_size or int(system.get("history_page_size", 12))
+        self.cache_size = cache_size or int(system.get("history_cache_size", 500))
+
+    def _cache(self) -> "OrderedDict[str, str]":
+        if CACHE_KEY not in st.session_state:
+            st.session_state[CACHE_KEY] = OrderedDict()
+        return st.session_state[CACHE_KEY]
+
+    def markdown(self, message: BaseMessage) -> str:
+        cache = self._cache()
+        key = ensure_id(message)
+        text = cache.get(key)
+        if text is None:
+            text = cache[key] = to_markdown(message)
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return text
+
+    def window(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """The visible tail of the conversation, without the system prompt"""
+        visible = st.session_state.get(VISIBLE_KEY, self.page_size)
+        conversation = [m for m in messages if not isinstance(m, SystemMessage)]
+        return conversation[-visible:]
+
+    def render(self, messages: Sequence[BaseMessage]) -> None:
+        window = self.window(messages)
+        hidden = sum(1 for m in messages if not isinstance(m, SystemMessage)) - len(window)
+        if hidden > 0 and st.button(f"⬆️ Load earlier messages ({hidden} hidden)", key="history_load_earlier"):
+            st.session_state[VISIBLE_KEY] = st.session_state.get(VISIBLE_KEY, self.page_size) + self.page_size
+            st.rerun()
+
+        for message in window:
+            role = "user" if isinstance(message, HumanMessage) else "assistant"
+            with st.chat_message(role):
+                st.markdown(self.markdown(message))
+
+
+# Create a singleton instance
+chat_history = ChatHistoryView()
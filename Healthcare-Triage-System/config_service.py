@@ -0,0 +1,98 @@
+import os
+import json
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Mapping, Tuple
+import yaml
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SETTINGS_PATH = os.path.join(BASE_DIR, 'settings.yaml')
+CONFIG_PATH = os.path.join(BASE_DIR, 'config.json')
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts to read-only mappings and lists to tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ConfigService:
+    """
+    Parses settings.yaml and config.json once into immutable objects and
+    hot-swaps them when either file changes on disk.
+
+    File mtimes are checked at most once per `check_interval` seconds, so a
+    lookup on the request path is normally just an attribute read. A reload
+    builds the new snapshot completely before publishing it with a single
+    reference assignment, so readers never see a half-updated configuration.
+    """
+
+    def __init__(self, settings_path: str = SETTINGS_PATH, config_path: str = CONFIG_PATH,
+                 check_interval: float = 1.0):
+        self.settings_path = settings_path
+        self.config_path = config_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._mtimes = (None, None)
+        # (version, settings, config) is replaced as a whole so readers always
+        # see a consistent pair
+        self._snapshot: Tuple[int, Mapping[str, Any], Mapping[str, Any]] = (
+            0, MappingProxyType({}), MappingProxyType({}))
+        self._reload()
+
+    def _current_mtimes(self):
+        return (os.stat(self.settings_path).st_mtime_ns, os.stat(self.config_path).st_mtime_ns)
+
+    def _reload(self) -> None:
+        mtimes = self._current_mtimes()
+        with open(self.settings_path, 'r') as f:
+            settings = freeze(yaml.safe_load(f) or {})
+        with open(self.config_path, 'r') as f:
+            config = freeze(json.load(f))
+
+        self._snapshot = (self._snapshot[0] + 1, settings, config)
+        self._mtimes = mtimes
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                if self._current_mtimes() != self._mtimes:
+                    self._reload()
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                # Keep serving the last good configuration if an edit is broken
+                print(f"Config reload failed, keeping previous version: {str(e)}")
+
+    def snapshot(self) -> Tuple[int, Mapping[str, Any], Mapping[str, Any]]:
+        """Current (version, settings, config); the version increases on every reload"""
+        self._maybe_reload()
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot[0]
+
+    @property
+    def settings(self) -> Mapping[str, Any]:
+        """Current settings.yaml contents (read-only)"""
+        return self.snapshot()[1]
+
+    @property
+    def config(self) -> Mapping[str, Any]:
+        """Current config.json contents (read-only)"""
+        return self.snapshot()[2]
+
+
+# Create a singleton instance
+config_service = ConfigService()
@@ -0,0 +1,224 @@
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from config_service import config_service
+from llm_clients import llm_clients
+from triage_lexicon import get_lexicon
+import metrics
+
+# Summaries are written off the request path; one pool, sized in settings, serves every session
+_summarizer_pool = ThreadPoolExecutor(
+    max_workers=int(config_service.settings.get("conversation", {}).get("summary_workers", 4)),
+    thread_name_prefix="summarizer")
+
+_SEVERITY = re.compile(r"\b(slight|mild|moderate|severe|worst|unbearable|excruciating)\b|\b(10|[0-9])\s*(?:/|out of)\s*10\b")
+_DURATION = re.compile(
+    r"\b(?:for|since|over|past|last)\s+(?:the\s+)?(?:past\s+|last\s+)?"
+    r"((?:\d+|a|an|one|two|three|four|five|six|seven|a few|few|several|a couple of|couple of)\s+"
+    r"(?:minutes?|hours?|days?|weeks?|months?|years?)"
+    r"|yesterday|last night|this morning|today|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b")
+_SEVERITY_WORDS = {"slight": "mild", "mild": "mild", "moderate": "moderate", "severe": "severe",
+                   "worst": "severe", "unbearable": "severe", "excruciating": "severe"}
+SYMPTOM_CATEGORIES = ("emergency", "symptom")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); no tokenizer is needed for budgeting"""
+    return len(text) // 4 + 1
+
+
+def message_role(message: BaseMessage) -> str:
+    return "Patient" if isinstance(message, HumanMessage) else "Assistant"
+
+
+@dataclass
+class ClinicalFacts:
+    """Structured facts pulled from what the patient has said so far"""
+    symptoms: List[str] = field(default_factory=list)
+    duration: Optional[str] = None
+    severity: Optional[str] = None
+
+    def update(self, text: str) -> None:
+        lowered = text.lower()
+        for match in get_lexicon().scan(text):
+            if match.category in SYMPTOM_CATEGORIES and match.term not in self.symptoms:
+                self.symptoms.append(match.term)
+
+        for word, scale in _SEVERITY.findall(lowered):
+            if word:
+                self.severity = _SEVERITY_WORDS[word]
+            else:
+                score = int(scale)
+                self.severity = "severe" if score >= 7 else "moderate" if score >= 4 else "mild"
+
+        durations = _DURATION.findall(lowered)
+        if durations:
+            self.duration = durations[-1]
+
+    def render(self) -> str:
+        parts = []
+        if self.symptoms:
+            parts.append(f"symptoms: {', '.join(self.symptoms)}")
+        if self.duration:
+            parts.append(f"duration: {self.duration}")
+        if self.severity:
+            parts.append(f"severity: {self.severity}")
+        return "; ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"symptoms": list(self.symptoms), "duration": self.duration, "severity": self.severity}
+
+
+def extractive_summary(summary: str, messages: List[BaseMessage], max_tokens: int) -> str:
+    """Fallback summary: the previous summary plus a clipped line per message, trimmed to the budget"""
+    lines = [summary] if summary else []
+    lines += [f"{message_role(m)}: {' '.join(m.content.split())[:200]}" for m in messages]
+    text = "\n".join(lines)
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else "..." + text[-max_chars:]
+
+
+def llm_summarizer(summary: str, messages: List[BaseMessage], max_tokens: int) -> str:
+    """Fold older turns into the running summary with the basic model"""
+    transcript = "\n".join(f"{message_role(m)}: {m.content}" for m in messages)
+    prompt = config_service.settings["prompts"]["summary_prompt"].format(
+        summary=summary or "(none yet)", transcript=transcript, max_words=int(max_tokens * 0.75))
+    return llm_clients.ollama().invoke(prompt).strip()
+
+
+class ConversationContext:
+    """
+    Bounded model context for one triage conversation.
+
+    The last `recent_turns` exchanges are kept verbatim. Older messages are
+    folded into a running summary by a background worker, one batch at a
+    time; until a batch is folded in, a clipped extract of it stands in, so
+    nothing is lost while the summary catches up. The model is only asked
+    once `summary_batch` messages have piled up; smaller remainders stay in
+    the extract. Clinical facts are extracted from every patient message as
+    it arrives. build_messages() returns a prompt that stays within
+    `token_budget`.
+    """
+
+    def __init__(self, system_prompt: str, settings: Optional[Mapping[str, Any]] = None,
+                 summarizer: Optional[Callable[[str, List[BaseMessage], int], str]] = None):
+        settings = settings if settings is not None else config_service.settings.get("conversation", {})
+        self.system_prompt = system_prompt
+        self.recent_turns = int(settings.get("recent_turns", 4))
+        self.token_budget = int(settings.get("token_budget", 1500))
+        self.summary_max_tokens = int(settings.get("summary_max_tokens", 300))
+        self.summary_batch = max(1, int(settings.get("summary_batch", 1)))
+        self.summarizer = summarizer or llm_summarizer
+        self.summary = ""
+        self.facts = ClinicalFacts()
+        self._recent: List[BaseMessage] = []
+        self._pending: List[BaseMessage] = []
+        self._in_flight: List[BaseMessage] = []
+        self._future: Optional[Future] = None
+        self._lock = threading.RLock()
+
+    def add(self, message: BaseMessage) -> None:
+        """Append a patient or assistant message (system messages are not part of the window)"""
+        if isinstance(message, SystemMessage):
+            return
+
+        with self._lock:
+            if isinstance(message, HumanMessage):
+                self.facts.update(message.content)
+            self._recent.append(message)
+            # A turn is a patient message and the reply to it
+            overflow = len(self._recent) - self.recent_turns * 2
+            if overflow > 0:
+                self._pending.extend(self._recent[:overflow])
+                del self._recent[:overflow]
+            self._collect()
+            self._schedule()
+
+    def _summarize(self, summary: str, batch: List[BaseMessage]) -> str:
+        try:
+            return self.summarizer(summary, batch, self.summary_max_tokens)
+        except Exception as e:
+            print(f"Conversation summary failed, using extract: {str(e)}")
+            metrics.FALLBACKS.inc(reason="summary_extractive")
+            return extractive_summary(summary, batch, self.summary_max_tokens)
+
+    def _schedule(self) -> None:
+        if self._future is None and len(self._pending) >= self.summary_batch:
+            self._in_flight, self._pending = self._pending, []
+            self._future = _summarizer_pool.submit(self._summarize, self.summary, self._in_flight)
+            self._future.add_done_callback(self._on_summary_done)
+
+    def _on_summary_done(self, future: Future) -> None:
+        # Fold the result in and start on whatever piled up meanwhile
+        with self._lock:
+            if self._future is future:
+                self._collect()
+                self._schedule()
+
+    def _collect(self) -> None:
+        if self._future is not None and self._future.done():
+            self.summary = self._future.result()
+            self._future = None
+            self._in_flight = []
+
+    def build_messages(self) -> List[BaseMessage]:
+        """System prompt (with summary and facts) followed by the recent turns, within the token budget"""
+        with self._lock:
+            self._collect()
+            self._schedule()
+            summary = self.summary
+            unsummarized = self._in_flight + self._pending
+            recent = list(self._recent)
+            facts = self.facts.render()
+
+        system = self._system_text(summary, unsummarized, facts)
+
+        # Drop the oldest verbatim messages first, never the latest one
+        used = estimate_tokens(system)
+        kept: List[BaseMessage] = []
+        for message in reversed(recent):
+            cost = estimate_tokens(message.content)
+            if kept and used + cost > self.token_budget:
+                break
+            kept.append(message)
+            used += cost
+
+        dropped = recent[:len(recent) - len(kept)]
+        if dropped:
+            # Dropped turns go to the summary queue so they are folded in, not lost
+            dropped_ids = {id(m) for m in dropped}
+            with self._lock:
+                self._pending.extend(m for m in self._recent if id(m) in dropped_ids)
+                self._recent = [m for m in self._recent if id(m) not in dropped_ids]
+                self._schedule()
+            system = self._system_text(summary, unsummarized + dropped, facts)
+            used = estimate_tokens(system) + sum(estimate_tokens(m.content) for m in kept)
+
+        # Last resort: shorten the system context itself
+        overflow = used - self.token_budget
+        if overflow > 0:
+            system = system[:max(len(self.system_prompt), len(system) - overflow * 4)]
+        return [SystemMessage(content=system)] + list(reversed(kept))
+
+    def _system_text(self, summary: str, unsummarized: List[BaseMessage], facts: str) -> str:
+        context = []
+        if summary or unsummarized:
+            context.append("Earlier in this conversation:\n" +
+                           extractive_summary(summary, unsummarized, self.summary_max_tokens))
+        if facts:
+            context.append(f"Known so far - {facts}")
+        return self.system_prompt + ("\n\n" + "\n\n".join(context) if context else "")
+
+    def as_prompt(self) -> str:
+        """The same context as a plain-text prompt, for completion-style models"""
+        messages = self.build_messages()
+        lines = [messages[0].content, ""]
+        lines += [f"{message_role(m)}: {m.content}" for m in messages[1:]]
+        lines.append("Assistant:")
+        return "\n".join(lines)
+
+    def token_count(self) -> int:
+        return sum(estimate_tokens(m.content) for m in self.build_messages())
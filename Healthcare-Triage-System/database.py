@@ -1,64 +1,379 @@
+import itertools
 import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+from config_service import BASE_DIR, config_service
+from scheduler import Scheduler
 
 
-class MockDatabase:
+class _ScheduledDatabase:
+    """Slot queries shared by both backends; bookings go through `self.scheduler`"""
+
+    scheduler: Scheduler
+
+    def hold_appointment(self, appointment_type: str, date: str) -> Dict[str, Any]:
+        """Reserve the earliest free slot while the patient confirms; pass hold_id to add_appointment"""
+        hold_id, slot = self.scheduler.hold(appointment_type, date)
+        return {"hold_id": hold_id, **slot.to_dict()}
+
+    def release_hold(self, hold_id: str) -> bool:
+        return self.scheduler.release(hold_id)
+
+    def get_available_slots(self, appointment_type: str, date: str, count: int = 5) -> List[Dict[str, Any]]:
+        """The next `count` free slots of this type on the date"""
+        return [slot.to_dict() for slot in self.scheduler.next_free_slots(appointment_type, date, count)]
+
+
+class MockDatabase(_ScheduledDatabase):
+    """
+    In-memory store; nothing survives a restart (useful for demos and tests).
+
+    Streamlit runs every session on its own thread, so IDs come from atomic
+    counters and each list is only touched under the lock; slot allocation
+    is already serialized per day by the scheduler.
+    """
+
     def __init__(self):
         self._data = {
             "appointments": [],
             "triage_records": [],
             "symptoms_history": []
         }
+        self._lock = threading.Lock()
+        self._ids = {name: itertools.count(1) for name in self._data}
+        self.scheduler = Scheduler()
 
-        # Load initial available slots from config
-        with open('config.json', 'r') as f:
-            config = json.load(f)
-            self._data["available_slots"] = config["mock_data"]["available_slots"]
-
-    def add_symptoms(self, symptoms: List[str], duration: str, severity: str) -> Dict[str, Any]:
+    def add_symptoms(self, symptoms: List[str], duration: str, severity: str,
+                     patient_id: Optional[str] = None) -> Dict[str, Any]:
         """Add a new symptoms record"""
         record = {
-            "id": len(self._data["symptoms_history"]) + 1,
+            "id": next(self._ids["symptoms_history"]),
+            "patient_id": patient_id,
             "symptoms": symptoms,
             "duration": duration,
             "severity": severity,
             "recorded_at": str(datetime.now()),
         }
-        self._data["symptoms_history"].append(record)
+        with self._lock:
+            self._data["symptoms_history"].append(record)
         return record
 
-    def add_appointment(self, appointment_type: str, date: str,
-                        symptoms_record_id: int = None) -> Dict[str, Any]:
-        """Add a new appointment"""
-        if not self._data["available_slots"].get(appointment_type):
-            raise ValueError(f"Invalid appointment type: {appointment_type}")
+    def add_symptoms_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert many symptoms records at once; returns the number written"""
+        recorded_at = str(datetime.now())
+        rows = [{
+            "id": next(self._ids["symptoms_history"]),
+            "patient_id": r.get("patient_id"),
+            "symptoms": list(r["symptoms"]),
+            "duration": r.get("duration"),
+            "severity": r.get("severity"),
+            "recorded_at": r.get("recorded_at", recorded_at),
+        } for r in records]
+        with self._lock:
+            self._data["symptoms_history"].extend(rows)
+        return len(rows)
+
+    def get_symptoms_history(self, patient_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """A patient's symptoms records, newest first"""
+        with self._lock:
+            records = [r for r in self._data["symptoms_history"] if r["patient_id"] == patient_id]
+        return sorted(records, key=lambda r: (r["recorded_at"], r["id"]), reverse=True)[:limit]
+
+    def add_triage_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Batch-insert triage decisions ({patient_id, urgency, model, summary})"""
+        recorded_at = str(datetime.now())
+        rows = [{
+            "id": next(self._ids["triage_records"]),
+            "patient_id": r.get("patient_id"),
+            "urgency": r["urgency"],
+            "model": r.get("model"),
+            "summary": r.get("summary"),
+            "recorded_at": r.get("recorded_at", recorded_at),
+        } for r in records]
+        with self._lock:
+            self._data["triage_records"].extend(rows)
+        return len(rows)
+
+    def get_triage_records(self, patient_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Triage decisions (optionally for one patient), newest first"""
+        with self._lock:
+            records = [r for r in self._data["triage_records"]
+                       if patient_id is None or r["patient_id"] == patient_id]
+        return sorted(records, key=lambda r: (r["recorded_at"], r["id"]), reverse=True)[:limit]
 
-        if not self._data["available_slots"][appointment_type]:
-            raise ValueError(f"No available slots for {appointment_type}")
+    def add_appointment(self, appointment_type: str, date: str, symptoms_record_id: int = None,
+                        patient_id: Optional[str] = None, hold_id: Optional[str] = None) -> Dict[str, Any]:
+        """Book the earliest free slot on the date, or confirm a previous hold"""
+        slot = self.scheduler.confirm(hold_id) if hold_id else self.scheduler.book(appointment_type, date)
 
         appointment = {
-            "id": len(self._data["appointments"]) + 1,
-            "type": appointment_type,
-            "date": date,
-            "time": self._data["available_slots"][appointment_type][0],
+            "id": next(self._ids["appointments"]),
+            "patient_id": patient_id,
+            "type": slot.appointment_type,
+            "date": slot.date,
+            "time": slot.time,
+            "clinician": slot.clinician,
             "symptoms_record_id": symptoms_record_id,
             "scheduled_at": str(datetime.now())
         }
-
-        self._data["appointments"].append(appointment)
-        self._data["available_slots"][appointment_type].pop(0)
+        with self._lock:
+            self._data["appointments"].append(appointment)
         return appointment
 
-    def get_medical_history(self, patient_id: str) -> Dict[str, Any]:
-        """Get patient medical history"""
+    def cancel_appointment(self, appointment_id: int) -> bool:
+        with self._lock:
+            for index, appointment in enumerate(self._data["appointments"]):
+                if appointment["id"] == appointment_id:
+                    del self._data["appointments"][index]
+                    break
+            else:
+                return False
+        return self.scheduler.cancel(appointment["type"], appointment["date"], appointment["time"],
+                                     appointment["clinician"])
+
+    def get_appointments(self, patient_id: Optional[str] = None, date: Optional[str] = None,
+                         appointment_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Appointments matching every given filter"""
+        with self._lock:
+            appointments = list(self._data["appointments"])
+        return [
+            appointment for appointment in appointments
+            if (patient_id is None or appointment["patient_id"] == patient_id)
+            and (date is None or appointment["date"] == date)
+            and (appointment_type is None or appointment["type"] == appointment_type)
+        ]
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS symptoms_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT,
+    symptoms TEXT NOT NULL,
+    duration TEXT,
+    severity TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_symptoms_patient ON symptoms_history (patient_id, recorded_at);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT,
+    type TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    clinician TEXT NOT NULL DEFAULT '',
+    symptoms_record_id INTEGER REFERENCES symptoms_history (id),
+    scheduled_at TEXT NOT NULL
+);
+-- One booking per slot, enforced across every process sharing the file
+CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_slot ON appointments (type, date, clinician, time);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments (patient_id, date);
+CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments (date);
+
+CREATE TABLE IF NOT EXISTS triage_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT,
+    urgency TEXT NOT NULL,
+    model TEXT,
+    summary TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_triage_patient ON triage_records (patient_id, recorded_at);
+"""
+
+# Statements are module constants so sqlite3's per-connection statement
+# cache reuses the compiled (prepared) form on every call
+_INSERT_SYMPTOMS = ("INSERT INTO symptoms_history (patient_id, symptoms, duration, severity, recorded_at) "
+                    "VALUES (?, ?, ?, ?, ?)")
+_INSERT_APPOINTMENT = ("INSERT INTO appointments (patient_id, type, date, time, clinician, symptoms_record_id, "
+                       "scheduled_at) VALUES (?, ?, ?, ?, ?, ?, ?)")
+_INSERT_TRIAGE = "INSERT INTO triage_records (patient_id, urgency, model, summary, recorded_at) VALUES (?, ?, ?, ?, ?)"
+_BOOKED_SLOTS = "SELECT time, clinician FROM appointments WHERE type = ? AND date = ?"
+
+
+class SQLiteDatabase(_ScheduledDatabase):
+    """
+    Persistent store on SQLite in WAL mode, with the same methods as
+    MockDatabase.
+
+    WAL lets readers proceed while one writer commits, so several Streamlit
+    sessions and several app replicas can share one database file. Each
+    thread gets its own connection; writers wait up to `busy_timeout_ms` for
+    the write lock instead of failing. Slots are allocated by the in-process
+    Scheduler, seeded from the bookings already stored; the unique index on
+    (type, date, clinician, time) rejects a slot that another process booked
+    in the meantime, and the next free slot is tried instead.
+    """
+
+    BOOKING_ATTEMPTS = 5
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._connection().executescript(SCHEMA)
+        self.scheduler = Scheduler(booked_loader=self._booked_slots)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                                   isolation_level=None, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front so
+        read-then-write sequences cannot interleave with another writer"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _symptoms_row(symptoms: List[str], duration: str, severity: str,
+                      patient_id: Optional[str], recorded_at: str) -> Tuple:
+        return patient_id, json.dumps(list(symptoms)), duration, severity, recorded_at
+
+    def add_symptoms(self, symptoms: List[str], duration: str, severity: str,
+                     patient_id: Optional[str] = None) -> Dict[str, Any]:
+        """Add a new symptoms record"""
+        recorded_at = str(datetime.now())
+        with self._transaction() as conn:
+            cursor = conn.execute(_INSERT_SYMPTOMS,
+                                  self._symptoms_row(symptoms, duration, severity, patient_id, recorded_at))
         return {
-            "recent_visits": ["2024-01-15: Regular checkup", "2023-12-01: Flu symptoms"],
-            "ongoing_conditions": ["Mild hypertension"],
-            "allergies": ["Penicillin"],
-            "current_medications": ["Lisinopril 10mg daily"]
+            "id": cursor.lastrowid,
+            "patient_id": patient_id,
+            "symptoms": symptoms,
+            "duration": duration,
+            "severity": severity,
+            "recorded_at": recorded_at,
         }
 
+    def add_symptoms_batch(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert many symptoms records in one transaction; returns the number written"""
+        recorded_at = str(datetime.now())
+        rows = [
+            self._symptoms_row(r["symptoms"], r.get("duration"), r.get("severity"), r.get("patient_id"),
+                               r.get("recorded_at", recorded_at))
+            for r in records
+        ]
+        with self._transaction() as conn:
+            conn.executemany(_INSERT_SYMPTOMS, rows)
+        return len(rows)
+
+    def _booked_slots(self, appointment_type: str, date: str) -> List[Tuple[str, str]]:
+        return [(row["time"], row["clinician"])
+                for row in self._connection().execute(_BOOKED_SLOTS, (appointment_type, date))]
+
+    def add_appointment(self, appointment_type: str, date: str, symptoms_record_id: int = None,
+                        patient_id: Optional[str] = None, hold_id: Optional[str] = None) -> Dict[str, Any]:
+        """Book the earliest free slot on the date, or confirm a previous hold"""
+        for _ in range(self.BOOKING_ATTEMPTS):
+            slot = self.scheduler.confirm(hold_id) if hold_id else self.scheduler.book(appointment_type, date)
+            hold_id = None
+            scheduled_at = str(datetime.now())
+            try:
+                with self._transaction() as conn:
+                    cursor = conn.execute(_INSERT_APPOINTMENT, (patient_id, slot.appointment_type, slot.date,
+                                                                slot.time, slot.clinician, symptoms_record_id,
+                                                                scheduled_at))
+            except sqlite3.IntegrityError:
+                # Booked by another process since this day was loaded; the
+                # scheduler keeps it marked as taken, so try the next slot
+                continue
+
+            return {
+                "id": cursor.lastrowid,
+                "patient_id": patient_id,
+                "type": slot.appointment_type,
+                "date": slot.date,
+                "time": slot.time,
+                "clinician": slot.clinician,
+                "symptoms_record_id": symptoms_record_id,
+                "scheduled_at": scheduled_at
+            }
+
+        raise ValueError(f"No available slots for {appointment_type} on {date}")
+
+    def cancel_appointment(self, appointment_id: int) -> bool:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT type, date, time, clinician FROM appointments WHERE id = ?",
+                               (appointment_id,)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM appointments WHERE id = ?", (appointment_id,))
+        return self.scheduler.cancel(row["type"], row["date"], row["time"], row["clinician"])
+
+    def add_triage_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Batch-insert triage decisions ({patient_id, urgency, model, summary})"""
+        recorded_at = str(datetime.now())
+        rows = [(r.get("patient_id"), r["urgency"], r.get("model"), r.get("summary"),
+                 r.get("recorded_at", recorded_at)) for r in records]
+        with self._transaction() as conn:
+            conn.executemany(_INSERT_TRIAGE, rows)
+        return len(rows)
+
+    def get_appointments(self, patient_id: Optional[str] = None, date: Optional[str] = None,
+                         appointment_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Appointments matching every given filter (served from the indexes)"""
+        clauses, params = [], []
+        for column, value in (("patient_id", patient_id), ("date", date), ("type", appointment_type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+
+        sql = "SELECT * FROM appointments"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY date, time"
+        return [dict(row) for row in self._connection().execute(sql, params)]
+
+    def get_symptoms_history(self, patient_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """A patient's symptoms records, newest first"""
+        rows = self._connection().execute(
+            "SELECT * FROM symptoms_history WHERE patient_id = ? ORDER BY recorded_at DESC, id DESC LIMIT ?",
+            (patient_id, limit))
+        return [dict(row, symptoms=json.loads(row["symptoms"])) for row in rows]
+
+    def get_triage_records(self, patient_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Triage decisions (optionally for one patient), newest first"""
+        sql = "SELECT * FROM triage_records"
+        params: List[Any] = []
+        if patient_id is not None:
+            sql += " WHERE patient_id = ?"
+            params.append(patient_id)
+        sql += " ORDER BY recorded_at DESC, id DESC LIMIT ?"
+        return [dict(row) for row in self._connection().execute(sql, params + [limit])]
+
+
+def create_database():
+    """Build the backend selected by `database` in settings.yaml"""
+    settings = config_service.settings.get("database", {})
+    if settings.get("backend", "sqlite") == "memory":
+        return MockDatabase()
+
+    path = os.getenv("TRIAGE_DB_PATH") or os.path.join(BASE_DIR, settings.get("path", "data/triage.db"))
+    return SQLiteDatabase(path, busy_timeout_ms=settings.get("busy_timeout_ms", 5000))
+
 
 # Create a singleton instance
-db = MockDatabase()
\ No newline at end of file
+db = create_database()
@@ -0,0 +1,300 @@
+"""
+Deterministic emergency detection, run on every patient message before any
+model is involved.
+
+Free text is mapped onto the symptom ontology in data/symptom_ontology.yaml
+with one Aho-Corasick pass (the matcher from triage_lexicon.py) that finds
+concepts, negation cues, severity modifiers and clause breaks together.
+A concept is a red flag when it is not negated and, for concepts marked
+`red_flag: severe`, when the nearest severity modifier in its clause is
+severe. Negation stops at coordinators and new subjects ("no fever and chest
+pain"), and a red-flag concept is only negated by a cue directly attached
+to it ("no chest pain", "never had crushing chest pain"). Mentions framed as
+history, family history, a question or uncertainty ("I had a heart attack in
+2019", "what are the warning signs of a stroke?") are reported but never a
+red flag. Assessing a message takes well under a millisecond and needs no
+network, so emergencies are answered even when Ollama and Groq are down.
+"""
+import bisect
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import yaml
+from config_service import BASE_DIR, config_service
+from constants import UrgencyLevel
+from triage_lexicon import AhoCorasick, get_lexicon, normalize_text
+import metrics
+
+_WORD = re.compile(r"\S+")
+_TOKEN = re.compile(r"[a-z0-9']+")
+# "heart attack in 2019": a year after a concept puts it in the past
+_PAST_YEAR = re.compile(r"\b(?:in|back in|around|since) (?:19|20)\d\d\b")
+
+# Payload kinds in the automaton
+CONCEPT, NEGATION, PSEUDO, MODIFIER, BREAK = "concept", "negation", "pseudo", "modifier", "break"
+SCOPE, REVOKE = "scope", "revoke"
+FRAME_BEFORE, FRAME_AFTER = "frame_before", "frame_after"
+
+
+@dataclass(frozen=True)
+class Finding:
+    concept: str
+    text: str
+    negated: bool
+    severity: Optional[str]
+    red_flag: bool
+    framed: bool = False
+
+
+@dataclass(frozen=True)
+class Assessment:
+    emergency: bool
+    findings: Tuple[Finding, ...]
+    elapsed_ms: float
+
+    @property
+    def red_flags(self) -> List[str]:
+        return [f.concept for f in self.findings if f.red_flag]
+
+    @property
+    def present(self) -> List[str]:
+        """Concepts the patient reports having (not negated, not history or a question)"""
+        return [f.concept for f in self.findings if not f.negated and not f.framed]
+
+
+@dataclass
+class _Match:
+    kind: str
+    value: str
+    start: int
+    end: int
+    clause: int = 0
+    first_word: int = 0
+    last_word: int = 0
+
+
+class SymptomOntology:
+    """Compiled symptom ontology; build once, then call assess() from any thread"""
+
+    def __init__(self, ontology: Mapping[str, Any]):
+        self.response: str = ontology.get("response", "").strip()
+        negation = ontology.get("negation", {})
+        severity = ontology.get("severity", {})
+        breaks = ontology.get("clause_breaks", {})
+        framing = ontology.get("framing", {})
+        self.negation_window = int(negation.get("window", 5))
+        self.fillers = frozenset(str(word) for word in negation.get("fillers", ()))
+        self.framing_fillers = frozenset(str(word) for word in framing.get("fillers", ()))
+        self.severity_window = int(severity.get("window", 4))
+        self.red_flag: Dict[str, Optional[str]] = {}
+        self._punctuation = re.compile("[" + re.escape(breaks.get("punctuation", ".;!?\n")) + "]")
+
+        self._automaton = AhoCorasick()
+        for name, concept in ontology.get("concepts", {}).items():
+            self.red_flag[name] = concept.get("red_flag")
+            for synonym in concept.get("synonyms", ()):
+                self._automaton.add(synonym, (CONCEPT, name))
+        for cue in negation.get("cues", ()):
+            self._automaton.add(cue, (NEGATION, cue))
+        for phrase in negation.get("pseudo", ()):
+            self._automaton.add(phrase, (PSEUDO, phrase))
+        for word in negation.get("scope_breaks", ()):
+            self._automaton.add(word, (SCOPE, word))
+        for word in negation.get("revoked_by", ()):
+            self._automaton.add(word, (REVOKE, word))
+        for phrase in framing.get("before", ()):
+            self._automaton.add(phrase, (FRAME_BEFORE, phrase))
+        for phrase in framing.get("after", ()):
+            self._automaton.add(phrase, (FRAME_AFTER, phrase))
+        for level, words in severity.get("modifiers", {}).items():
+            for word in words:
+                self._automaton.add(str(word), (MODIFIER, level))
+        for word in breaks.get("words", ()):
+            self._automaton.add(word, (BREAK, word))
+        self._automaton.build()
+
+    def _scan(self, text: str) -> List[_Match]:
+        """All automaton matches with clause and word positions; punctuation splits clauses"""
+        matches: List[_Match] = []
+        clause = 0
+        position = 0
+        for piece in self._punctuation.split(text):
+            word_starts = [m.start() for m in _WORD.finditer(piece)]
+            found = list(self._automaton.iter_matches(piece))
+            found += [(m.start(), m.end(), (FRAME_AFTER, m.group())) for m in _PAST_YEAR.finditer(piece)]
+            found.sort(key=lambda m: (m[0], -m[1]))
+            for start, end, (kind, value) in found:
+                if kind == BREAK:
+                    clause += 1
+                    continue
+                matches.append(_Match(kind, value, position + start, position + end, clause,
+                                      bisect.bisect_right(word_starts, start) - 1,
+                                      bisect.bisect_right(word_starts, end - 1) - 1))
+            clause += 1
+            position += len(piece) + 1
+        return matches
+
+    @staticmethod
+    def _drop_nested(matches: List[_Match]) -> List[_Match]:
+        """Keep the longest of overlapping concept matches ("chest pain" over "pain")"""
+        kept: List[_Match] = []
+        for match in sorted(matches, key=lambda m: (m.start, -(m.end - m.start))):
+            if kept and match.start < kept[-1].end:
+                continue
+            kept.append(match)
+        return kept
+
+    @staticmethod
+    def _only_fillers(text: str, start: int, end: int, fillers: frozenset, modifiers: List[_Match],
+                      numbers: bool = False) -> bool:
+        """True if text[start:end] holds nothing but filler words and severity modifiers (and numbers)"""
+        gap = list(text[start:end])
+        for modifier in modifiers:
+            if start <= modifier.start and modifier.end <= end:
+                gap[modifier.start - start:modifier.end - start] = " " * (modifier.end - modifier.start)
+        return all(word in fillers or (numbers and word.isdigit()) for word in _TOKEN.findall("".join(gap)))
+
+    def _attached(self, text: str, cue: _Match, concept: _Match, modifiers: List[_Match]) -> bool:
+        """True if only filler words and severity modifiers sit between the cue and the concept"""
+        return self._only_fillers(text, cue.end, concept.start, self.fillers, modifiers)
+
+    def _framed(self, text: str, concept: _Match, frames: List[_Match], modifiers: List[_Match]) -> bool:
+        """
+        True if a framing cue is directly attached to the concept: before it
+        ("history of stroke") or after it ("stroke two years ago").
+        """
+        for frame in frames:
+            if frame.clause != concept.clause:
+                continue
+            if frame.kind == FRAME_BEFORE and frame.end <= concept.start:
+                start, end = frame.end, concept.start
+            elif frame.kind == FRAME_AFTER and frame.start >= concept.end:
+                start, end = concept.end, frame.start
+            else:
+                continue
+            if self._only_fillers(text, start, end, self.framing_fillers, modifiers, numbers=True):
+                return True
+        return False
+
+    def _negated(self, text: str, concept: _Match, cues: List[_Match], scopes: List[_Match],
+                 revokers: List[_Match], modifiers: List[_Match]) -> bool:
+        # "never had chest pain until today": the negation is taken back
+        if any(r.clause == concept.clause and r.start >= concept.end
+               and r.first_word - concept.last_word <= self.negation_window for r in revokers):
+            return False
+
+        for cue in cues:
+            if cue.clause != concept.clause or cue.end > concept.start \
+                    or concept.first_word - cue.last_word > self.negation_window:
+                continue
+            # "and", "or" and a new subject end the negation's scope
+            if any(cue.end <= s.start and s.end <= concept.start for s in scopes):
+                continue
+            # A missed red flag costs far more than a false alarm: only a cue
+            # directly attached to it ("no chest pain") may suppress it
+            if self.red_flag.get(concept.value) and not self._attached(text, cue, concept, modifiers):
+                continue
+            return True
+        return False
+
+    def assess(self, text: str) -> Assessment:
+        started = time.perf_counter()
+        normalized = normalize_text(text)
+        matches = self._scan(normalized)
+        concepts = self._drop_nested([m for m in matches if m.kind == CONCEPT])
+        # Cues inside a pseudo-negation or a concept ("not breathing") negate nothing
+        covering = [m for m in matches if m.kind == PSEUDO] + concepts
+        cues = [m for m in matches if m.kind == NEGATION
+                and not any(c.start <= m.start and m.end <= c.end for c in covering)]
+        modifiers = [m for m in matches if m.kind == MODIFIER]
+        scopes = [m for m in matches if m.kind == SCOPE]
+        revokers = [m for m in matches if m.kind == REVOKE]
+        frames = [m for m in matches if m.kind in (FRAME_BEFORE, FRAME_AFTER)]
+
+        findings = []
+        for concept in concepts:
+            negated = self._negated(normalized, concept, cues, scopes, revokers, modifiers)
+            framed = self._framed(normalized, concept, frames, modifiers)
+
+            # Nearest modifier in the same clause; on a tie the one before wins
+            severity, best = None, None
+            for modifier in modifiers:
+                if modifier.clause != concept.clause or concept.start <= modifier.start < concept.end:
+                    continue
+                if modifier.end <= concept.start:
+                    distance = (concept.first_word - modifier.last_word, 0)
+                else:
+                    distance = (modifier.first_word - concept.last_word, 1)
+                if distance[0] <= self.severity_window and (best is None or distance < best):
+                    severity, best = modifier.value, distance
+
+            rule = self.red_flag.get(concept.value)
+            red_flag = not negated and not framed \
+                and (rule == "always" or (rule == "severe" and severity == "severe"))
+            findings.append(Finding(concept.value, normalized[concept.start:concept.end],
+                                    negated, severity, red_flag, framed))
+
+        return Assessment(any(f.red_flag for f in findings), tuple(findings),
+                          (time.perf_counter() - started) * 1000)
+
+
+_ontology_lock = threading.Lock()
+_ontology: Optional[SymptomOntology] = None
+_ontology_key: Optional[Tuple[str, int]] = None
+
+
+def get_ontology() -> Optional[SymptomOntology]:
+    """Return the compiled ontology (rebuilt if the file changes), or None if it cannot be loaded"""
+    global _ontology, _ontology_key
+    settings = config_service.settings.get("emergency", {})
+    path = os.path.join(BASE_DIR, settings.get("ontology_path", "data/symptom_ontology.yaml"))
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except OSError as e:
+        print(f"Symptom ontology unavailable: {str(e)}")
+        return None
+
+    if _ontology_key != key:
+        with _ontology_lock:
+            if _ontology_key != key:
+                try:
+                    with open(path, "r") as f:
+                        _ontology = SymptomOntology(yaml.safe_load(f) or {})
+                except Exception as e:
+                    # Keep the last good ontology; retry once the file changes
+                    print(f"Error loading symptom ontology: {str(e)}")
+                    metrics.ERRORS.inc(component="emergency_ontology")
+                _ontology_key = key
+    return _ontology
+
+
+def assess(text: str) -> Assessment:
+    """Assess one message; without an ontology, falls back to the lexicon's emergency phrases"""
+    ontology = get_ontology()
+    if ontology is not None:
+        return ontology.assess(text)
+
+    metrics.FALLBACKS.inc(reason="emergency_lexicon")
+    started = time.perf_counter()
+    emergency = get_lexicon().has_category(text, "emergency")
+    return Assessment(emergency, (), (time.perf_counter() - started) * 1000)
+
+
+def is_emergency(text: str) -> bool:
+    return assess(text).emergency
+
+
+def emergency_triage_record(assessment: Assessment, patient_id: Optional[str] = None) -> Dict[str, Any]:
+    """Triage record (database.add_triage_records) for a message caught by the detector, not a model"""
+    return {"patient_id": patient_id, "urgency": UrgencyLevel.EMERGENCY.value, "model": None,
+            "summary": "Red flags: " + (", ".join(assessment.red_flags) or "emergency phrase")}
+
+
+def emergency_response() -> str:
+    ontology = get_ontology()
+    if ontology is not None and ontology.response:
+        return ontology.response
+    return "🚨 **This may be a medical emergency.** Call 911 or your local emergency number now."
@@ -0,0 +1,131 @@
+import os
+import threading
+from typing import Any, Dict, Mapping, Optional, Tuple
+import httpx
+from langchain_groq import ChatGroq
+from langchain_ollama import OllamaLLM
+from config_service import config_service
+import metrics
+
+
+class LLMClientRegistry:
+    """
+    Process-wide cache of model clients.
+
+    Each (provider, model) pair is built once and shared by every Streamlit
+    session and thread. Both providers talk HTTP through an httpx client with
+    a keep-alive connection pool, so consecutive messages reuse open
+    connections instead of reconnecting. httpx clients are thread-safe, so no
+    locking is needed once a client exists.
+    """
+
+    def __init__(self, settings: Optional[Mapping[str, Any]] = None):
+        self._settings = settings
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._warmed: set = set()
+
+    @property
+    def settings(self) -> Mapping[str, Any]:
+        if self._settings is not None:
+            return self._settings
+        return config_service.settings.get("llm_clients", {})
+
+    def _pool_kwargs(self) -> Dict[str, Any]:
+        pool = self.settings.get("pool", {})
+        return {
+            "limits": httpx.Limits(
+                max_connections=pool.get("max_connections", 20),
+                max_keepalive_connections=pool.get("max_keepalive_connections", 10),
+                keepalive_expiry=pool.get("keepalive_expiry", 60)
+            ),
+            "timeout": httpx.Timeout(pool.get("timeout", 60), connect=pool.get("connect_timeout", 5))
+        }
+
+    def _get_or_create(self, key: Tuple[str, str], factory):
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = factory()
+                self._clients[key] = client
+        return client
+
+    def ollama(self, model: Optional[str] = None) -> OllamaLLM:
+        """Basic-tier client (also used by the LLM router)"""
+        model = model or os.getenv('OLLAMA_MODEL')
+        ollama_settings = self.settings.get("ollama", {})
+        return self._get_or_create(("ollama", model), lambda: OllamaLLM(
+            model=model,
+            base_url=os.getenv('OLLAMA_BASE_URL', ollama_settings.get("base_url", "http://localhost:11434")),
+            keep_alive=ollama_settings.get("keep_alive", "30m"),
+            client_kwargs=self._pool_kwargs()
+        ))
+
+    def groq(self, model: Optional[str] = None) -> ChatGroq:
+        """Advanced-tier client"""
+        model = model or os.getenv('GROQ_MODEL')
+
+        def factory():
+            kwargs = {}
+            base_url = os.getenv('GROQ_BASE_URL')
+            if base_url:
+                kwargs["base_url"] = base_url
+            return ChatGroq(
+                api_key=os.getenv('GROQ_API_KEY'),
+                model_name=model,
+                http_client=httpx.Client(**self._pool_kwargs()),
+                http_async_client=httpx.AsyncClient(**self._pool_kwargs()),
+                **kwargs
+            )
+
+        return self._get_or_create(("groq", model), factory)
+
+    def warm_up(self, model: Optional[str] = None) -> None:
+        """
+        Load the Ollama model into memory ahead of the first query. An empty
+        prompt makes Ollama load the model and return without generating;
+        keep_alive keeps it resident between messages.
+        """
+        model = model or os.getenv('OLLAMA_MODEL')
+        if not model:
+            print("Ollama warm-up skipped: OLLAMA_MODEL is not set")
+            return
+        with self._lock:
+            if model in self._warmed:
+                return
+            self._warmed.add(model)
+
+        try:
+            # The client's keep_alive goes with the request, so the model stays loaded
+            self.ollama(model).invoke("")
+        except Exception as e:
+            print(f"Ollama warm-up failed: {str(e)}")
+            metrics.ERRORS.inc(component="ollama_warm_up")
+            with self._lock:
+                self._warmed.discard(model)
+
+    def warm_up_in_background(self, model: Optional[str] = None) -> Optional[threading.Thread]:
+        model = model or os.getenv('OLLAMA_MODEL')
+        if model in self._warmed or not self.settings.get("ollama", {}).get("warm_up", True):
+            return None
+        thread = threading.Thread(target=self.warm_up, args=(model,), name="ollama-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        """Close all pooled connections (used by benchmarks and tests of the registry)"""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            self._warmed.clear()
+        for client in clients.values():
+            http_client = getattr(client, "http_client", None) or getattr(getattr(client, "_client", None), "_client", None)
+            if http_client is not None:
+                http_client.close()
+
+
+# Create a singleton instance
+llm_clients = LLMClientRegistry()
@@ -0,0 +1,123 @@
+"""
+Before/after benchmark for the pooled LLM client registry, run against the
+local stub servers.
+
+"before" builds a new OllamaLLM / ChatGroq per message, as the app used to;
+"after" uses the shared clients from llm_clients.py, with the Ollama model
+warmed up first. For each tier the script reports per-message latency and
+how many TCP connections the stubs accepted.
+
+Usage:
+    python loadtest/bench_clients.py --messages 40 --concurrency 4 --connect-delay 0.03
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from langchain_groq import ChatGroq
+from langchain_ollama import OllamaLLM
+from llm_clients import LLMClientRegistry
+from stub_servers import StubConfig, server_url, start_stub_servers
+
+OLLAMA_MODEL = "stub-basic"
+GROQ_MODEL = "stub-advanced"
+PROMPT = "I need to schedule a routine checkup"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _run(call: Callable[[], object], messages: int, concurrency: int) -> Dict[str, float]:
+    def timed(_):
+        started = time.perf_counter()
+        call()
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(messages)))
+
+    return {
+        "first_ms": latencies[0],
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-message and pooled LLM clients")
+    parser.add_argument("--messages", type=int, default=40, help="Messages per tier and mode")
+    parser.add_argument("--concurrency", type=int, default=4, help="Simulated concurrent sessions")
+    parser.add_argument("--connect-delay", type=float, default=0.03,
+                        help="Simulated cost of each new connection (TLS/RTT), seconds")
+    parser.add_argument("--load-time", type=float, default=1.0, help="Simulated Ollama model load, seconds")
+    parser.add_argument("--first-token-latency", type=float, default=0.02)
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    args = parser.parse_args()
+
+    config = StubConfig(first_token_latency=args.first_token_latency, tokens_per_second=args.tokens_per_second,
+                        load_time=args.load_time, connect_delay=args.connect_delay)
+    state, ollama_server, groq_server = start_stub_servers(config)
+    ollama_url, groq_url = server_url(ollama_server), server_url(groq_server)
+
+    results = {}
+
+    # Before: a new client object (and HTTP connection) for every message.
+    # The old community Ollama wrapper did not set keep_alive, so Ollama's
+    # default 5 minutes applied and the first message paid the model load.
+    state.reset()
+    results["before", "ollama"] = _run(
+        lambda: OllamaLLM(model=OLLAMA_MODEL, base_url=ollama_url).invoke(PROMPT),
+        args.messages, args.concurrency)
+    results["before", "ollama"]["connections"] = state.connections["ollama"]
+
+    def groq_per_message():
+        with httpx.Client() as http_client:
+            ChatGroq(api_key="stub", model_name=GROQ_MODEL, base_url=groq_url,
+                     http_client=http_client).invoke(PROMPT)
+
+    results["before", "groq"] = _run(groq_per_message, args.messages, args.concurrency)
+    results["before", "groq"]["connections"] = state.connections["groq"]
+
+    # After: shared pooled clients, model warmed up before the first message
+    state.reset()
+    os.environ["OLLAMA_BASE_URL"] = ollama_url
+    os.environ["GROQ_BASE_URL"] = groq_url
+    os.environ["GROQ_API_KEY"] = "stub"
+    registry = LLMClientRegistry()
+    started = time.perf_counter()
+    registry.warm_up(OLLAMA_MODEL)
+    warm_up_ms = (time.perf_counter() - started) * 1000
+
+    results["after", "ollama"] = _run(lambda: registry.ollama(OLLAMA_MODEL).invoke(PROMPT),
+                                      args.messages, args.concurrency)
+    results["after", "ollama"]["connections"] = state.connections["ollama"]
+    results["after", "groq"] = _run(lambda: registry.groq(GROQ_MODEL).invoke(PROMPT),
+                                    args.messages, args.concurrency)
+    results["after", "groq"]["connections"] = state.connections["groq"]
+    registry.close()
+
+    print(f"{args.messages} messages per tier, concurrency {args.concurrency}, "
+          f"connect delay {args.connect_delay * 1000:.0f} ms, model load {args.load_time * 1000:.0f} ms")
+    print(f"warm-up at startup (off the request path): {warm_up_ms:.1f} ms\n")
+    print(f"{'mode':<8}{'tier':<8}{'first':>10}{'mean':>10}{'p50':>10}{'p95':>10}{'conns':>8}")
+    for (mode, tier), r in results.items():
+        print(f"{mode:<8}{tier:<8}{r['first_ms']:>10.1f}{r['mean_ms']:>10.1f}{r['p50_ms']:>10.1f}"
+              f"{r['p95_ms']:>10.1f}{r['connections']:>8}")
+
+    ollama_server.shutdown()
+    groq_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Open-loop load test for routing and model streaming.
+
+Messages from a corpus are replayed with Poisson arrivals at a fixed rate
+through decide_model_from_prompt and prompt_ai, exactly as the app calls
+them, with Ollama and Groq replaced by the local stub servers (or pointed at
+real endpoints with --no-stubs). Latency is measured from each message's
+scheduled arrival, so queueing under overload shows up in the numbers.
+
+Reported per tier: throughput, end-to-end latency p50/p95/p99, time to
+first token, router latency and the CHEAP/EXPENSIVE split. --speculate
+starts the CHEAP model while the LLM router decides (see
+decide_model_speculatively) and reports how many speculations were wasted.
+--out saves the
+summary as JSON; --baseline compares against a saved summary and exits
+non-zero when a p95 regresses by more than --tolerance.
+
+Usage:
+    python loadtest/load_router.py --rate 20 --duration 30
+    python loadtest/load_router.py --rate 20 --duration 30 --out baseline.json
+    python loadtest/load_router.py --rate 20 --duration 30 --speculate
+    python loadtest/load_router.py --rate 20 --duration 30 --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from stub_servers import StubConfig, server_url, start_stub_servers
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "triage_messages.txt")
+
+
+@dataclass
+class Result:
+    tier: str
+    scheduled: float
+    router_ms: float
+    ttft_ms: Optional[float]
+    latency_ms: float
+    error: Optional[str] = None
+
+
+def load_corpus(path: str) -> List[str]:
+    """JSONL with a "text" field per line, or plain text with one message per line"""
+    texts = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            texts.append(json.loads(line)["text"] if line.startswith("{") else line)
+    if not texts:
+        raise ValueError(f"No messages in {path}")
+    return texts
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def handle(text: str, scheduled: float, speculate: bool = False) -> Result:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from ai_router import decide_model_from_prompt, decide_model_speculatively, prompt_ai
+    from streaming import StreamTiming
+
+    messages = [SystemMessage(content="You are an AI healthcare triage assistant."), HumanMessage(content=text)]
+    started = time.perf_counter()
+    speculation = None
+    if speculate:
+        tier, speculation = decide_model_speculatively(messages)
+    else:
+        tier = decide_model_from_prompt(messages)
+    router_ms = (time.perf_counter() - started) * 1000
+
+    timing = StreamTiming(tier)
+    error = None
+    try:
+        for _ in prompt_ai(messages, tier, timing=timing, speculation=speculation):
+            pass
+    except Exception as e:
+        error = repr(e)
+
+    # prompt_ai answers some messages (wait time, symptom intake) without a model
+    if timing.finished is None:
+        tier = "FAST_PATH"
+    ttft_ms = None if timing.first_token is None else (timing.first_token - scheduled) * 1000
+    return Result(tier, scheduled, router_ms, ttft_ms, (time.perf_counter() - scheduled) * 1000, error)
+
+
+def run(corpus: List[str], rate: float, duration: float, workers: int, seed: int,
+        speculate: bool = False) -> Tuple[List[Result], float]:
+    """Submit messages with exponential inter-arrival times; returns results and wall time"""
+    rng = random.Random(seed)
+    results: List[Result] = []
+    lock = threading.Lock()
+
+    def task(text: str, scheduled: float) -> None:
+        result = handle(text, scheduled, speculate)
+        with lock:
+            results.append(result)
+
+    started = time.perf_counter()
+    next_arrival = started
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while next_arrival - started < duration:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(task, rng.choice(corpus), next_arrival)
+            next_arrival += rng.expovariate(rate)
+    return results, time.perf_counter() - started
+
+
+def summarize(results: List[Result], wall: float, rate: float) -> Dict[str, Any]:
+    def stats(group: List[Result]) -> Dict[str, Any]:
+        latencies = [r.latency_ms for r in group]
+        ttfts = [r.ttft_ms for r in group if r.ttft_ms is not None]
+        routers = [r.router_ms for r in group]
+        return {
+            "count": len(group),
+            "errors": sum(1 for r in group if r.error),
+            "throughput_per_s": len(group) / wall if wall else 0.0,
+            **{f"latency_p{p}_ms": percentile(latencies, p) for p in (50, 95, 99)},
+            **{f"ttft_p{p}_ms": percentile(ttfts, p) for p in (50, 95, 99)},
+            **{f"router_p{p}_ms": percentile(routers, p) for p in (50, 95, 99)}
+        }
+
+    tiers = sorted({r.tier for r in results})
+    routed = [r for r in results if r.tier != "FAST_PATH"]
+    return {
+        "offered_rate_per_s": rate,
+        "wall_s": wall,
+        "overall": stats(results),
+        "tiers": {tier: stats([r for r in results if r.tier == tier]) for tier in tiers},
+        "split": {tier: len([r for r in routed if r.tier == tier]) / len(routed) if routed else 0.0
+                  for tier in tiers if tier != "FAST_PATH"}
+    }
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    def ms(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.1f}"
+
+    overall = summary["overall"]
+    print(f"offered {summary['offered_rate_per_s']:.1f} msg/s, completed {overall['count']} in "
+          f"{summary['wall_s']:.1f}s ({overall['throughput_per_s']:.1f} msg/s), errors {overall['errors']}")
+    print("split: " + ", ".join(f"{tier} {share:.0%}" for tier, share in summary["split"].items()))
+    if "speculation" in summary:
+        speculation = summary["speculation"]
+        print(f"speculation: {speculation['committed']:.0f} committed, {speculation['wasted']:.0f} wasted")
+    print()
+
+    header = f"{'tier':<11}{'n':>6}" + "".join(f"{name:>10}" for name in (
+        "lat p50", "lat p95", "lat p99", "ttft p50", "ttft p95", "ttft p99", "rtr p50", "rtr p95", "rtr p99"))
+    print(header)
+    for tier, s in list(summary["tiers"].items()) + [("all", overall)]:
+        print(f"{tier:<11}{s['count']:>6}" + "".join(f"{ms(s[key]):>10}" for key in (
+            "latency_p50_ms", "latency_p95_ms", "latency_p99_ms", "ttft_p50_ms", "ttft_p95_ms", "ttft_p99_ms",
+            "router_p50_ms", "router_p95_ms", "router_p99_ms")))
+
+
+def compare(summary: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_delta_ms: float) -> List[str]:
+    """p95 metrics that got worse than the baseline by more than `tolerance` (and `min_delta_ms`)"""
+    regressions = []
+    for tier, current in list(summary["tiers"].items()) + [("all", summary["overall"])]:
+        before = baseline["overall"] if tier == "all" else baseline["tiers"].get(tier)
+        if before is None:
+            continue
+        for key in ("latency_p95_ms", "ttft_p95_ms", "router_p95_ms"):
+            if before.get(key) is None or current.get(key) is None:
+                continue
+            if current[key] > before[key] * (1 + tolerance) and current[key] - before[key] > min_delta_ms:
+                regressions.append(f"{tier} {key}: {before[key]:.1f} -> {current[key]:.1f}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay triage messages at a Poisson arrival rate")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--rate", type=float, default=10.0, help="Mean arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of arrivals")
+    parser.add_argument("--workers", type=int, default=256, help="Maximum messages in flight")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-stubs", action="store_true",
+                        help="Use OLLAMA_BASE_URL/GROQ_BASE_URL from the environment instead of stubs")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="Stub first-token delay, s")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Stub token rate")
+    parser.add_argument("--load-time", type=float, default=2.0, help="Stub Ollama model load, s")
+    parser.add_argument("--router-expensive-share", type=float, default=0.3,
+                        help="Share of LLM-routed messages the stub router sends to EXPENSIVE")
+    parser.add_argument("--tool-call-share", type=float, default=0.0,
+                        help="Share of EXPENSIVE replies for which the stub first asks for tool calls")
+    parser.add_argument("--speculate", action="store_true",
+                        help="Start the CHEAP model while the LLM router decides")
+    parser.add_argument("--out", help="Write the summary as JSON")
+    parser.add_argument("--baseline", help="Summary JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 increase over the baseline")
+    parser.add_argument("--min-delta-ms", type=float, default=25.0,
+                        help="Ignore p95 increases smaller than this (scheduling noise)")
+    args = parser.parse_args()
+
+    if not args.no_stubs:
+        config = StubConfig(first_token_latency=args.first_token_latency, tokens_per_second=args.tokens_per_second,
+                            load_time=args.load_time, router_expensive_share=args.router_expensive_share,
+                            tool_call_share=args.tool_call_share)
+        _, ollama_server, groq_server = start_stub_servers(config)
+        os.environ["OLLAMA_BASE_URL"] = server_url(ollama_server)
+        os.environ["GROQ_BASE_URL"] = server_url(groq_server)
+        os.environ.setdefault("GROQ_API_KEY", "stub")
+        os.environ.setdefault("OLLAMA_MODEL", "stub-basic")
+        os.environ.setdefault("GROQ_MODEL", "stub-advanced")
+
+    # Keep the run's records and audit trail out of the real data directory
+    scratch = tempfile.mkdtemp(prefix="triage-load-")
+    os.environ["TRIAGE_DB_PATH"] = os.path.join(scratch, "triage.db")
+    os.environ["AUDIT_LOG_DIR"] = os.path.join(scratch, "audit")
+
+    from llm_clients import llm_clients
+    llm_clients.warm_up()
+
+    corpus = load_corpus(args.corpus)
+    results, wall = run(corpus, args.rate, args.duration, args.workers, args.seed, args.speculate)
+    summary = summarize(results, wall, args.rate)
+    if args.speculate:
+        import metrics
+        summary["speculation"] = {outcome: metrics.SPECULATIONS.value(outcome=outcome)
+                                  for outcome in ("committed", "wasted")}
+    print_summary(summary)
+
+    for error in sorted({r.error for r in results if r.error})[:5]:
+        print(f"error: {error}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(summary, json.load(f), args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
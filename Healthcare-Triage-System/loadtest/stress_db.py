@@ -0,0 +1,162 @@
+"""
+Concurrency stress run for the triage data layer.
+
+Hundreds of simulated sessions (one thread each, as Streamlit runs them)
+record symptoms, query free slots, hold/confirm/release, book and cancel
+appointments and move patients through the triage queue at the same time.
+Afterwards the script checks the invariants that races would break:
+
+  - every record and appointment ID is unique
+  - no (type, date, clinician, time) slot is booked twice
+  - bookings never exceed the day's capacity
+  - the stored appointments match what the sessions were told
+
+Usage:
+    python loadtest/stress_db.py --sessions 300 --backend both
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import MockDatabase, SQLiteDatabase
+from triage_queue import TriageQueue
+
+TYPES = ("virtual", "in-person", "specialist")
+URGENCIES = ("routine", "routine", "routine", "urgent", "emergency")
+
+
+def run_session(db, queue: TriageQueue, session: int, dates: List[str], actions: int,
+                results: Dict[str, list], lock: threading.Lock) -> None:
+    rng = random.Random(session)
+    patient_id = f"patient-{session}"
+    booked, cancelled, symptom_ids, errors = [], [], [], []
+
+    for _ in range(actions):
+        appointment_type, date = rng.choice(TYPES), rng.choice(dates)
+        action = rng.random()
+        try:
+            if action < 0.25:
+                symptom_ids.append(db.add_symptoms(["cough", "fever"], "2 days", "mild", patient_id)["id"])
+            elif action < 0.55:
+                booked.append(db.add_appointment(appointment_type, date, patient_id=patient_id))
+            elif action < 0.70:
+                hold = db.hold_appointment(appointment_type, date)
+                if rng.random() < 0.7:
+                    booked.append(db.add_appointment(appointment_type, date, patient_id=patient_id,
+                                                     hold_id=hold["hold_id"]))
+                else:
+                    db.release_hold(hold["hold_id"])
+            elif action < 0.80 and booked:
+                appointment = booked.pop(rng.randrange(len(booked)))
+                if db.cancel_appointment(appointment["id"]):
+                    cancelled.append(appointment)
+            elif action < 0.90:
+                db.get_available_slots(appointment_type, date, 5)
+            else:
+                ticket = queue.enqueue(rng.choice(URGENCIES), patient_id)
+                queue.estimate(ticket.urgency)
+                started = queue.start_next()
+                if started is not None:
+                    queue.complete(started.id)
+        except ValueError as e:
+            # Fully booked days are expected; anything else is a failure
+            if "No available slots" not in str(e):
+                errors.append(repr(e))
+        except Exception as e:
+            errors.append(repr(e))
+
+    with lock:
+        results["booked"].extend(booked)
+        results["symptom_ids"].extend(symptom_ids)
+        results["errors"].extend(errors)
+
+
+def check(db, results: Dict[str, list], dates: List[str]) -> List[str]:
+    problems = []
+    booked = results["booked"]
+
+    duplicate_ids = [i for i, n in Counter(a["id"] for a in booked).items() if n > 1]
+    if duplicate_ids:
+        problems.append(f"duplicate appointment ids: {duplicate_ids[:5]}")
+
+    duplicate_symptoms = [i for i, n in Counter(results["symptom_ids"]).items() if n > 1]
+    if duplicate_symptoms:
+        problems.append(f"duplicate symptom record ids: {duplicate_symptoms[:5]}")
+
+    stored = db.get_appointments()
+    slots = Counter((a["type"], a["date"], a["clinician"], a["time"]) for a in stored)
+    double_booked = [slot for slot, n in slots.items() if n > 1]
+    if double_booked:
+        problems.append(f"double-booked slots: {double_booked[:5]}")
+
+    if {a["id"] for a in stored} != {a["id"] for a in booked}:
+        problems.append(f"stored appointments ({len(stored)}) differ from confirmed bookings ({len(booked)})")
+
+    for appointment_type in TYPES:
+        for date in dates:
+            # Every slot still free plus every booked one must add up to the day's capacity
+            free = len(db.get_available_slots(appointment_type, date, 10_000))
+            taken = sum(1 for a in stored if a["type"] == appointment_type and a["date"] == date)
+            capacity = len(db.scheduler._day(appointment_type, date)._state)
+            if free + taken > capacity or taken > capacity:
+                problems.append(f"{appointment_type} {date}: {taken} booked + {free} free > {capacity} slots")
+
+    problems.extend(f"session error: {e}" for e in results["errors"][:10])
+    return problems
+
+
+def stress(db, name: str, sessions: int, actions: int, days: int) -> bool:
+    dates = [f"2030-01-{day:02d}" for day in range(1, days + 1)]
+    queue = TriageQueue()
+    results = {"booked": [], "symptom_ids": [], "errors": []}
+    lock = threading.Lock()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for session in range(sessions):
+            pool.submit(run_session, db, queue, session, dates, actions, results, lock)
+    elapsed = time.perf_counter() - started
+
+    problems = check(db, results, dates)
+    print(f"[{name}] {sessions} sessions x {actions} actions in {elapsed:.2f}s: "
+          f"{len(results['booked'])} appointments held, {len(results['symptom_ids'])} symptom records, "
+          f"queue {queue.snapshot()['waiting']}")
+    for problem in problems:
+        print(f"[{name}]   FAIL {problem}")
+    if not problems:
+        print(f"[{name}]   OK: unique ids, no double bookings, capacity respected")
+    return not problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stress the triage data layer with concurrent sessions")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--actions", type=int, default=40, help="Actions per session")
+    parser.add_argument("--days", type=int, default=3, help="Distinct dates to book on (fewer = more contention)")
+    parser.add_argument("--backend", choices=("memory", "sqlite", "both"), default="both")
+    args = parser.parse_args()
+
+    # Switch often so races show up within a short run
+    sys.setswitchinterval(1e-5)
+
+    ok = True
+    if args.backend in ("memory", "both"):
+        ok &= stress(MockDatabase(), "memory", args.sessions, args.actions, args.days)
+    if args.backend in ("sqlite", "both"):
+        with tempfile.TemporaryDirectory() as directory:
+            db = SQLiteDatabase(os.path.join(directory, "stress.db"), busy_timeout_ms=30000)
+            ok &= stress(db, "sqlite", args.sessions, args.actions, args.days)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
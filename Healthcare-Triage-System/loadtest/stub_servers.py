@@ -0,0 +1,354 @@
+"""
+Local stand-ins for the Ollama and Groq HTTP APIs, for benchmarking the
+triage system without real models.
+
+The Ollama stub serves /api/generate and /api/chat (NDJSON streaming), and
+simulates model load time: the first request for a model, or the first after
+its keep_alive has expired, pays `load_time` before any token. The Groq stub
+serves the OpenAI-compatible /openai/v1/chat/completions endpoint, including
+SSE streaming, and answers a share of tool-enabled requests with parallel
+tool calls (`tool_call_share`, `tool_calls`) before the final reply. Both
+emit tokens at a fixed rate after a first-token delay, support HTTP/1.1
+keep-alive, and count the TCP connections they accept, so connection reuse
+is visible. `connect_delay` adds a fixed cost to every new
+connection to stand in for TLS handshake and network round trips.
+
+Usage:
+    python loadtest/stub_servers.py --ollama-port 11435 --groq-port 8766
+    OLLAMA_BASE_URL=http://127.0.0.1:11435 GROQ_BASE_URL=http://127.0.0.1:8766 streamlit run app.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Tuple
+
+DEFAULT_REPLY = ("Thank you for reaching out. Based on what you have described, I recommend "
+                 "scheduling an appointment so a clinician can assess your symptoms. If they "
+                 "get worse or you develop chest pain or trouble breathing, seek emergency care.")
+
+
+@dataclass
+class StubConfig:
+    first_token_latency: float = 0.05  # seconds before the first token
+    tokens_per_second: float = 200.0
+    load_time: float = 2.0  # Ollama model load on a cold start
+    connect_delay: float = 0.0  # per new TCP connection
+    reply: str = DEFAULT_REPLY
+    # Share of LLM-router prompts the Ollama stub answers EXPENSIVE (chosen
+    # by a hash of the prompt, so a replayed message always routes the same)
+    router_expensive_share: float = 0.3
+    # Share of Groq requests offering tools that first get a turn of tool
+    # calls (again by hash of the last message), and the calls to make; only
+    # tools the request offers are called
+    tool_call_share: float = 0.0
+    tool_calls: Tuple[Tuple[str, str], ...] = (
+        ("estimate_wait_time", '{"urgency_level": "urgent"}'),
+        ("get_available_slots", '{"appointment_type": "in-person", "preferred_date": "2030-01-07", "count": 3}'),
+    )
+
+
+def _parse_keep_alive(value, default: float = 300.0) -> float:
+    """Ollama keep_alive: seconds as a number, or a duration string like "30m"; negative = forever"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)([smh]?)", str(value).strip())
+    if not match:
+        return default
+    amount = float(match.group(1))
+    if amount < 0:
+        return float("inf")
+    return amount * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+class StubState:
+    """Counters and Ollama model residency, shared by both stubs"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, float] = {}  # model -> unload deadline
+        self.connections = {"ollama": 0, "groq": 0}
+        self.requests = {"ollama": 0, "groq": 0}
+        self.model_loads = 0
+
+    def count(self, counter: Dict[str, int], name: str) -> None:
+        with self._lock:
+            counter[name] += 1
+
+    def ensure_loaded(self, model: str, keep_alive) -> None:
+        now = time.monotonic()
+        with self._lock:
+            cold = self._loaded.get(model, 0.0) <= now
+            if cold:
+                self.model_loads += 1
+        if cold:
+            time.sleep(self.config.load_time)
+        with self._lock:
+            self._loaded[model] = time.monotonic() + _parse_keep_alive(keep_alive)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded.clear()
+            self.connections = {"ollama": 0, "groq": 0}
+            self.requests = {"ollama": 0, "groq": 0}
+            self.model_loads = 0
+
+    def router_verdict(self, prompt: str) -> str:
+        expensive = zlib.crc32(prompt.encode()) % 1000 < self.config.router_expensive_share * 1000
+        return "EXPENSIVE" if expensive else "CHEAP"
+
+    def tool_calls(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Calls for a turn that should use tools; none once tool results are in the conversation"""
+        messages = request.get("messages") or [{}]
+        offered = {t.get("function", {}).get("name") for t in request.get("tools") or []}
+        if not offered or messages[-1].get("role") == "tool":
+            return []
+        if zlib.crc32(str(messages[-1].get("content")).encode()) % 1000 >= self.config.tool_call_share * 1000:
+            return []
+        return [{"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                 "function": {"name": name, "arguments": arguments}}
+                for name, arguments in self.config.tool_calls if name in offered]
+
+    def tokens(self, reply: str = None) -> Iterator[str]:
+        time.sleep(self.config.first_token_latency)
+        interval = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+        words = (reply or self.config.reply).split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(interval)
+            yield word if i == len(words) - 1 else word + " "
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    provider = ""
+    state: StubState = None
+
+    def setup(self):
+        super().setup()
+        self.state.count(self.state.connections, self.provider)
+        if self.state.config.connect_delay:
+            time.sleep(self.state.config.connect_delay)
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client closed a stream early, e.g. a cancelled speculation
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: str) -> None:
+        raw = data.encode("utf-8")
+        self.wfile.write(f"{len(raw):x}\r\n".encode("ascii") + raw + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class OllamaStubHandler(_StubHandler):
+    provider = "ollama"
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json({"version": "0.0.0-stub"})
+        elif self.path == "/api/tags":
+            self._send_json({"models": []})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if self.path not in ("/api/generate", "/api/chat"):
+            self._send_json({"error": "not found"}, 404)
+            return
+
+        self.state.count(self.state.requests, self.provider)
+        request = self._read_json()
+        model = request.get("model", "stub")
+        chat = self.path == "/api/chat"
+        started = time.perf_counter()
+        self.state.ensure_loaded(model, request.get("keep_alive"))
+
+        def chunk(text: str, done: bool) -> dict:
+            payload = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": done}
+            if chat:
+                payload["message"] = {"role": "assistant", "content": text}
+            else:
+                payload["response"] = text
+            if done:
+                payload.update(done_reason="stop", total_duration=int((time.perf_counter() - started) * 1e9))
+            return payload
+
+        # An empty prompt only loads the model (used for warm-up)
+        if not chat and not request.get("prompt"):
+            payload = chunk("", True)
+            payload["done_reason"] = "load"
+            self._send_json(payload)
+            return
+
+        # The LLM router's prompt gets a routing verdict instead of the canned reply
+        prompt = request.get("prompt") or ""
+        reply = self.state.router_verdict(prompt) if "CHEAP or EXPENSIVE" in prompt else None
+
+        if request.get("stream", True):
+            self._start_chunked("application/x-ndjson")
+            count = 0
+            for token in self.state.tokens(reply):
+                self._write_chunk(json.dumps(chunk(token, False)) + "\n")
+                count += 1
+            final = chunk("", True)
+            final["eval_count"] = count
+            self._write_chunk(json.dumps(final) + "\n")
+            self._end_chunked()
+        else:
+            text = "".join(self.state.tokens(reply))
+            self._send_json(chunk(text, True))
+
+
+class GroqStubHandler(_StubHandler):
+    provider = "groq"
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/openai/v1/chat/completions":
+            self._send_json({"error": {"message": "not found"}}, 404)
+            return
+
+        self.state.count(self.state.requests, self.provider)
+        request = self._read_json()
+        model = request.get("model", "stub")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+        tool_calls = self.state.tool_calls(request)
+
+        if request.get("stream") and tool_calls:
+            self._start_chunked("text/event-stream")
+            time.sleep(self.state.config.first_token_latency)
+            deltas = [{"role": "assistant", "content": None,
+                       "tool_calls": [{"index": i, **call} for i, call in enumerate(tool_calls)]}, {}]
+            for delta, finish_reason in zip(deltas, (None, "tool_calls")):
+                self._write_chunk("data: " + json.dumps({
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}]
+                }) + "\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self._end_chunked()
+        elif tool_calls:
+            time.sleep(self.state.config.first_token_latency)
+            self._send_json({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": None, "tool_calls": tool_calls},
+                             "finish_reason": "tool_calls", "logprobs": None}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tool_calls),
+                          "total_tokens": prompt_tokens + len(tool_calls)}
+            })
+        elif request.get("stream"):
+            self._start_chunked("text/event-stream")
+            count = 0
+            for token in self.state.tokens():
+                delta = {"content": token}
+                if count == 0:
+                    delta["role"] = "assistant"
+                self._write_chunk("data: " + json.dumps({
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None, "logprobs": None}]
+                }) + "\n\n")
+                count += 1
+            self._write_chunk("data: " + json.dumps({
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop", "logprobs": None}],
+                "x_groq": {"id": completion_id, "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": count,
+                                                          "total_tokens": prompt_tokens + count}}
+            }) + "\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self._end_chunked()
+        else:
+            tokens = list(self.state.tokens())
+            self._send_json({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                             "finish_reason": "stop", "logprobs": None}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                          "total_tokens": prompt_tokens + len(tokens)}
+            })
+
+
+def _serve(handler_base, state: StubState, host: str, port: int) -> ThreadingHTTPServer:
+    handler = type(handler_base.__name__, (handler_base,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"{handler_base.provider}-stub", daemon=True).start()
+    return server
+
+
+def start_stub_servers(config: StubConfig = None, host: str = "127.0.0.1", ollama_port: int = 0,
+                       groq_port: int = 0) -> Tuple[StubState, ThreadingHTTPServer, ThreadingHTTPServer]:
+    """Start both stubs on background threads; port 0 picks a free port"""
+    state = StubState(config or StubConfig())
+    return state, _serve(OllamaStubHandler, state, host, ollama_port), _serve(GroqStubHandler, state, host, groq_port)
+
+
+def server_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run stub Ollama and Groq servers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    parser.add_argument("--groq-port", type=int, default=8766)
+    parser.add_argument("--first-token-latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--load-time", type=float, default=2.0)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    parser.add_argument("--tool-call-share", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = StubConfig(first_token_latency=args.first_token_latency, tokens_per_second=args.tokens_per_second,
+                        load_time=args.load_time, connect_delay=args.connect_delay,
+                        tool_call_share=args.tool_call_share)
+    state, ollama_server, groq_server = start_stub_servers(config, args.host, args.ollama_port, args.groq_port)
+    print(f"Ollama stub: {server_url(ollama_server)}  (OLLAMA_BASE_URL)")
+    print(f"Groq stub:   {server_url(groq_server)}  (GROQ_BASE_URL)")
+
+    try:
+        while True:
+            time.sleep(10)
+            print(f"connections={state.connections} requests={state.requests} model_loads={state.model_loads}")
+    except KeyboardInterrupt:
+        ollama_server.shutdown()
+        groq_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Patient medical history behind a pluggable provider, with a shared cache.
+
+A real provider is a slow EHR lookup; HistoryCache sits in front of it so a
+conversation never asks the backend for the same patient twice. Entries
+live for `ttl_seconds` (longer than a session), concurrent lookups of one
+patient share a single backend call, and prefetch_todays_patients() loads
+everyone with an appointment today in one bulk request at startup.
+
+Lookups are only ever made for the patient bound to the current session
+(bind_patient), never for an ID taken from the chat.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from config_service import BASE_DIR, config_service
+from database import db
+import metrics
+
+# Patient the current thread/task is serving, as identified by the client
+# application (kiosk check-in, patient portal login); None when unknown
+_patient: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("patient", default=None)
+
+
+def bind_patient(patient_id: Optional[str]) -> None:
+    """Attribute tool calls from the current thread (or asyncio task) to an identified patient"""
+    _patient.set(patient_id)
+
+
+def current_patient() -> Optional[str]:
+    return _patient.get()
+
+
+class HistoryProvider:
+    """Backend interface: one lookup, and a bulk lookup for prefetching"""
+
+    def fetch(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """The patient's history, or None if the backend has no record"""
+        raise NotImplementedError
+
+    def fetch_many(self, patient_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Override when the backend has a batch endpoint; the default loops over fetch()"""
+        return {patient_id: self.fetch(patient_id) for patient_id in patient_ids}
+
+
+class FileHistoryProvider(HistoryProvider):
+    """
+    Local stand-in for an EHR: a JSON object of patient_id -> history. The
+    file is read on every call, like a remote lookup, and `lookup_delay`
+    adds the latency of one.
+    """
+
+    def __init__(self, path: str, lookup_delay: float = 0.0):
+        self.path = path
+        self.lookup_delay = lookup_delay
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self.lookup_delay:
+            time.sleep(self.lookup_delay)
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def fetch(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        return self._load().get(patient_id)
+
+    def fetch_many(self, patient_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        records = self._load()
+        return {patient_id: records.get(patient_id) for patient_id in patient_ids}
+
+
+class HistoryCache:
+    """
+    Per-patient TTL cache (bounded LRU) in front of a HistoryProvider.
+
+    "No record" answers are cached too. A lookup that misses registers a
+    Future for the patient; concurrent lookups of the same patient wait on
+    it instead of calling the backend again. Failed lookups are not cached.
+    """
+
+    def __init__(self, provider: HistoryProvider, ttl_seconds: float = 14400, max_entries: int = 10000,
+                 wait_timeout: float = 30.0):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._backend_calls = 0
+
+    def get(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            found, history = self._lookup(patient_id)
+            if found:
+                self._hits += 1
+                metrics.HISTORY_LOOKUPS.inc(result="hit")
+                return history
+            future = self._inflight.get(patient_id)
+            leader = future is None
+            if leader:
+                future = self._inflight[patient_id] = Future()
+                self._misses += 1
+                self._backend_calls += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            metrics.HISTORY_LOOKUPS.inc(result="coalesced")
+            return future.result(self.wait_timeout)
+
+        metrics.HISTORY_LOOKUPS.inc(result="miss")
+        self._resolve([patient_id], lambda: {patient_id: self.provider.fetch(patient_id)})
+        return future.result()
+
+    def prefetch(self, patient_ids: Iterable[str]) -> int:
+        """Load every patient not already cached or being fetched in one bulk call; returns how many"""
+        with self._lock:
+            wanted: List[str] = []
+            for patient_id in dict.fromkeys(patient_ids):
+                if not self._lookup(patient_id)[0] and patient_id not in self._inflight:
+                    self._inflight[patient_id] = Future()
+                    wanted.append(patient_id)
+            if wanted:
+                self._backend_calls += 1
+
+        if wanted:
+            self._resolve(wanted, lambda: self.provider.fetch_many(wanted))
+        return len(wanted)
+
+    def _lookup(self, patient_id: str) -> tuple:
+        """(found, history); call with the lock held"""
+        entry = self._entries.get(patient_id)
+        if entry is None:
+            return False, None
+        if entry[1] <= time.monotonic():
+            del self._entries[patient_id]
+            return False, None
+        self._entries.move_to_end(patient_id)
+        return True, entry[0]
+
+    def _resolve(self, patient_ids: List[str], fetch) -> None:
+        """Run one backend call for `patient_ids` and hand the results to everyone waiting on them"""
+        try:
+            results = fetch()
+        except Exception as e:
+            with self._lock:
+                futures = [self._inflight.pop(patient_id) for patient_id in patient_ids]
+            for future in futures:
+                future.set_exception(e)
+            raise
+
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            futures = []
+            for patient_id in patient_ids:
+                self._entries[patient_id] = (results.get(patient_id), expires)
+                self._entries.move_to_end(patient_id)
+                futures.append(self._inflight.pop(patient_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        for patient_id, future in zip(patient_ids, futures):
+            future.set_result(results.get(patient_id))
+
+    def invalidate(self, patient_id: str) -> None:
+        """Drop a patient's entry, e.g. after their record changed"""
+        with self._lock:
+            self._entries.pop(patient_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "backend_calls": self._backend_calls,
+                "hit_rate": round((self._hits + self._coalesced) / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries)
+            }
+
+
+def todays_patients() -> List[str]:
+    """Patients with an appointment today, in appointment order"""
+    today = datetime.now().strftime("%Y-%m-%d")
+    return list(dict.fromkeys(a["patient_id"] for a in db.get_appointments(date=today) if a.get("patient_id")))
+
+
+def prefetch_todays_patients() -> int:
+    try:
+        return medical_history.prefetch(todays_patients())
+    except Exception as e:
+        print(f"Medical history prefetch failed: {str(e)}")
+        metrics.ERRORS.inc(component="history_prefetch")
+        return 0
+
+
+_prefetch_lock = threading.Lock()
+_prefetch_started = False
+
+
+def prefetch_in_background() -> None:
+    """Start the bulk prefetch of today's patients once per process (if enabled in settings)"""
+    global _prefetch_started
+    if not config_service.settings.get("medical_history", {}).get("prefetch_on_start", True):
+        return
+    with _prefetch_lock:
+        if _prefetch_started:
+            return
+        _prefetch_started = True
+    threading.Thread(target=prefetch_todays_patients, name="history-prefetch", daemon=True).start()
+
+
+def create_history_cache() -> HistoryCache:
+    """Build the provider and cache configured under `medical_history` in settings.yaml"""
+    settings = config_service.settings.get("medical_history", {})
+    provider = FileHistoryProvider(os.path.join(BASE_DIR, settings.get("path", "data/medical_history.json")),
+                                   lookup_delay=float(settings.get("lookup_delay_seconds", 0.0)))
+    return HistoryCache(provider, ttl_seconds=float(settings.get("ttl_seconds", 14400)),
+                        max_entries=int(settings.get("max_entries", 10000)))
+
+
+# Create a singleton instance
+medical_history = create_history_cache()
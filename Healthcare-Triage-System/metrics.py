@@ -0,0 +1,230 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are plain Python objects guarded by a lock, cheap
+enough to update on every message. start_metrics_server() serves them on
+/metrics from a background thread (settings.yaml `metrics`); the HTTP API
+also exposes them on its own /metrics route.
+"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+from config_service import config_service
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+MODEL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, last = +Inf), sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+# Create a singleton instance
+registry = Registry()
+
+ROUTER_LATENCY = registry.histogram(
+    "triage_router_latency_seconds", "Time to decide the model tier for a message, by deciding stage",
+    ("source",))
+ROUTING_DECISIONS = registry.counter(
+    "triage_routing_decisions_total",
+    "Routing decisions by deciding stage (emergency, lexicon, cache, classifier, llm, default) and tier",
+    ("source", "tier"))
+FALLBACKS = registry.counter(
+    "triage_fallbacks_total", "Degraded paths taken because a dependency failed", ("reason",))
+SPECULATIONS = registry.counter(
+    "triage_speculations_total",
+    "CHEAP replies started while the LLM router decided: committed, or wasted on an EXPENSIVE route",
+    ("outcome",))
+MODEL_LATENCY = registry.histogram(
+    "triage_model_latency_seconds", "Model response time from request to last token", ("tier",), MODEL_BUCKETS)
+MODEL_TTFT = registry.histogram(
+    "triage_model_ttft_seconds", "Model time to first token", ("tier",), MODEL_BUCKETS)
+RESPONSE_TTFT = registry.histogram(
+    "triage_response_ttft_seconds", "Message arrival to first model token, including routing", ("tier",),
+    MODEL_BUCKETS)
+MODEL_RESPONSES = registry.counter(
+    "triage_model_responses_total", "Model responses streamed, by tier", ("tier",))
+MODEL_CHUNKS = registry.counter(
+    "triage_model_output_chunks_total", "Streamed output chunks (roughly tokens), by tier", ("tier",))
+TOOL_CALLS = registry.counter(
+    "triage_tool_calls_total", "Tool invocations by tool and outcome", ("tool", "status"))
+TOOL_ROUNDS = registry.counter(
+    "triage_tool_rounds_total", "EXPENSIVE model turns that requested tools (calls per round = tool calls / rounds)")
+TOOL_LATENCY = registry.histogram(
+    "triage_tool_latency_seconds", "Tool execution time", ("tool",))
+HISTORY_LOOKUPS = registry.counter(
+    "triage_history_lookups_total",
+    "Medical history lookups: cache hit, miss (backend call) or coalesced onto a lookup in flight", ("result",))
+EMERGENCY_FAST_PATH = registry.counter(
+    "triage_emergency_fast_path_total", "Messages given the local emergency response before any model call")
+API_REJECTIONS = registry.counter(
+    "triage_api_rejections_total", "HTTP API messages turned away because a tier was at capacity", ("tier",))
+ERRORS = registry.counter(
+    "triage_errors_total", "Errors by component", ("component",))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+_server_attempted = False
+
+
+def start_metrics_server(host: Optional[str] = None, port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics on a background thread; tried once per process, and only if enabled in settings"""
+    global _server, _server_attempted
+    settings = config_service.settings.get("metrics", {})
+    if _server_attempted or not settings.get("enabled", True):
+        return _server
+
+    with _server_lock:
+        if not _server_attempted:
+            _server_attempted = True
+            address = (host or settings.get("host", "127.0.0.1"),
+                       port if port is not None else int(settings.get("port", 9464)))
+            try:
+                server = ThreadingHTTPServer(address, _MetricsHandler)
+            except OSError as e:
+                print(f"Metrics endpoint not started: {str(e)}")
+                return None
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+            _server = server
+    return _server
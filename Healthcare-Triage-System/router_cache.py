@@ -0,0 +1,161 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from config_service import BASE_DIR, config_service
+from triage_lexicon import normalize_text
+
+_NUMBER = re.compile(r"\d+(?:[.,:]\d+)*")
+_NON_WORD = re.compile(r"[^a-z0-9#\s]+")
+
+# Function words that do not change a routing decision. Negations ("no",
+# "not", "never") are deliberately kept.
+STOPWORDS = frozenset("""
+    a an the and or but so if then than to of for in on at by with from about
+    i i'm im me my mine we our you your it its this that these those there
+    is are am was were be been being do does did have has had will would
+    can could should may might shall please just really very also
+    hi hello hey thanks thank what whats what's how when where which who
+""".split())
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key for a triage message: lowercased, punctuation stripped,
+    numbers masked and stopwords removed, so "What's the wait time?" and
+    "what is the wait time" share one entry.
+    """
+    text = _NUMBER.sub(" # ", normalize_text(text))
+    text = _NON_WORD.sub(" ", text.replace("'", ""))
+    return " ".join(token for token in text.split() if token not in STOPWORDS)
+
+
+class RouterCache:
+    """
+    Bounded LRU of routing decisions with a per-entry TTL.
+
+    One instance is shared by every Streamlit session in the process.
+    Expiry uses wall-clock time so entries persisted to disk keep their
+    remaining lifetime across restarts.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 86400,
+                 persist_path: Optional[str] = None, persist_every: int = 50):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.persist_every = persist_every
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._unsaved = 0
+
+        if persist_path:
+            self.load()
+            atexit.register(self.save)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: str, decision: str) -> None:
+        with self._lock:
+            self._entries[key] = (decision, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+            self._unsaved += 1
+            flush = self.persist_path and self._unsaved >= self.persist_every
+
+        if flush:
+            self.save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for monitoring the cache's effectiveness"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "evictions": self._evictions
+            }
+
+    def save(self) -> None:
+        """Write unexpired entries to `persist_path` (atomically replaced)"""
+        if not self.persist_path:
+            return
+
+        # One save at a time, so an older snapshot never replaces a newer one;
+        # the temp file is per process in case several share persist_path
+        with self._save_lock:
+            now = time.time()
+            with self._lock:
+                entries = [[key, decision, expires] for key, (decision, expires) in self._entries.items()
+                           if expires > now]
+                self._unsaved = 0
+
+            tmp_path = f"{self.persist_path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.persist_path), exist_ok=True)
+                with open(tmp_path, "w") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.persist_path)
+            except OSError as e:
+                print(f"Error saving router cache: {str(e)}")
+
+    def load(self) -> None:
+        try:
+            with open(self.persist_path, "r") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error loading router cache: {str(e)}")
+            return
+
+        now = time.time()
+        with self._lock:
+            # Saved in LRU order, so the most recent entries survive truncation
+            for key, decision, expires in entries[-self.max_entries:]:
+                if expires > now:
+                    self._entries[key] = (decision, expires)
+
+
+def _create_router_cache() -> Optional[RouterCache]:
+    settings = config_service.settings.get("router", {}).get("cache", {})
+    if not settings.get("enabled", False):
+        return None
+
+    persist_path = settings.get("persist_path")
+    return RouterCache(
+        max_entries=settings.get("max_entries", 4096),
+        ttl_seconds=settings.get("ttl_seconds", 86400),
+        persist_path=os.path.join(BASE_DIR, persist_path) if persist_path else None
+    )
+
+
+# Create a singleton instance
+router_cache = _create_router_cache()
@@ -0,0 +1,240 @@
+"""
+Local CHEAP/EXPENSIVE router: hashed word/char n-gram features with a
+logistic-regression model trained offline from a labeled JSONL file.
+
+Inference is a sparse dot product over a few dozen hashed features, well
+under a millisecond on CPU, so the LLM router is only needed for messages
+the model is not confident about.
+
+Training data format (one JSON object per line):
+    {"text": "What are your office hours?", "label": "CHEAP"}
+
+Usage:
+    python router_classifier.py train --data data/router_training.jsonl --out models/router_model.json
+    python router_classifier.py evaluate --data data/router_training.jsonl --model models/router_model.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from config_service import BASE_DIR, config_service
+from constants import ModelType
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+LABELS = (ModelType.BASIC.value, ModelType.ADVANCED.value)  # CHEAP = 0, EXPENSIVE = 1
+
+
+def featurize(text: str, dim_bits: int = 18) -> Dict[int, float]:
+    """Signed feature hashing of word unigrams, bigrams and character trigrams, L2-normalized"""
+    mask = (1 << dim_bits) - 1
+    tokens = _TOKEN.findall(text.lower())
+    grams = [f"w:{t}" for t in tokens]
+    grams += [f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for token in tokens:
+        padded = f"<{token}>"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+    features: Dict[int, float] = {}
+    for gram in grams:
+        h = zlib.crc32(gram.encode("utf-8"))
+        index = h & mask
+        sign = 1.0 if (h >> 31) & 1 else -1.0
+        features[index] = features.get(index, 0.0) + sign
+
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {index: value / norm for index, value in features.items()}
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class RouterClassifier:
+    """Sparse logistic-regression model over hashed n-gram features"""
+
+    def __init__(self, dim_bits: int = 18, weights: Optional[Dict[int, float]] = None, bias: float = 0.0):
+        self.dim_bits = dim_bits
+        self.weights: Dict[int, float] = weights or {}
+        self.bias = bias
+
+    def predict_proba(self, text: str) -> float:
+        """Probability that the message needs the EXPENSIVE model"""
+        weights = self.weights
+        z = self.bias + sum(weights.get(i, 0.0) * v for i, v in featurize(text, self.dim_bits).items())
+        return _sigmoid(z)
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """Return (label, confidence) where confidence is the probability of the chosen label"""
+        p = self.predict_proba(text)
+        return (LABELS[1], p) if p >= 0.5 else (LABELS[0], 1.0 - p)
+
+    def fit(self, examples: List[Tuple[str, str]], epochs: int = 30, learning_rate: float = 0.5,
+            l2: float = 1e-4, seed: int = 13) -> "RouterClassifier":
+        """Train with plain SGD on log loss; deterministic for a given seed"""
+        data = [(featurize(text, self.dim_bits), LABELS.index(label)) for text, label in examples]
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1.0 + epoch * 0.1)
+            for features, y in data:
+                z = self.bias + sum(self.weights.get(i, 0.0) * v for i, v in features.items())
+                gradient = _sigmoid(z) - y
+                for i, v in features.items():
+                    w = self.weights.get(i, 0.0)
+                    self.weights[i] = w - rate * (gradient * v + l2 * w)
+                self.bias -= rate * gradient
+
+        self.weights = {i: w for i, w in self.weights.items() if abs(w) > 1e-6}
+        return self
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "dim_bits": self.dim_bits,
+                "bias": round(self.bias, 6),
+                "weights": {str(i): round(w, 6) for i, w in sorted(self.weights.items())}
+            }, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "RouterClassifier":
+        with open(path, "r") as f:
+            data = json.load(f)
+        weights = {int(i): float(w) for i, w in data["weights"].items()}
+        return cls(dim_bits=data["dim_bits"], weights=weights, bias=data["bias"])
+
+
+def load_examples(path: str) -> List[Tuple[str, str]]:
+    examples = []
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            label = record["label"].upper()
+            if label not in LABELS:
+                raise ValueError(f"{path}:{line_number}: label must be one of {LABELS}")
+            examples.append((record["text"], label))
+    return examples
+
+
+def evaluate(model: RouterClassifier, examples: Iterable[Tuple[str, str]], threshold: float) -> Dict[str, float]:
+    """Accuracy overall and on the confident subset the router would actually answer"""
+    total = correct = confident = confident_correct = 0
+    true_pos = false_pos = false_neg = 0
+    started = time.perf_counter()
+
+    for text, label in examples:
+        predicted, confidence = model.classify(text)
+        total += 1
+        correct += predicted == label
+        if confidence >= threshold:
+            confident += 1
+            confident_correct += predicted == label
+        if predicted == LABELS[1] and label == LABELS[1]:
+            true_pos += 1
+        elif predicted == LABELS[1]:
+            false_pos += 1
+        elif label == LABELS[1]:
+            false_neg += 1
+
+    elapsed = time.perf_counter() - started
+    return {
+        "examples": total,
+        "accuracy": round(correct / total, 4) if total else 0.0,
+        "expensive_precision": round(true_pos / (true_pos + false_pos), 4) if true_pos + false_pos else 0.0,
+        "expensive_recall": round(true_pos / (true_pos + false_neg), 4) if true_pos + false_neg else 0.0,
+        "threshold": threshold,
+        "coverage": round(confident / total, 4) if total else 0.0,
+        "confident_accuracy": round(confident_correct / confident, 4) if confident else 0.0,
+        "mean_latency_ms": round(elapsed * 1000 / total, 4) if total else 0.0
+    }
+
+
+_model_lock = threading.Lock()
+_model: Optional[RouterClassifier] = None
+_model_key: Optional[Tuple[str, int]] = None
+
+
+def get_router_classifier() -> Optional[RouterClassifier]:
+    """Return the configured model (reloaded if the model file changes), or None if disabled/missing"""
+    global _model, _model_key
+    settings = config_service.settings.get("router", {}).get("classifier", {})
+    if not settings.get("enabled", False):
+        return None
+
+    path = os.path.join(BASE_DIR, settings.get("model_path", "models/router_model.json"))
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+    if _model_key != key:
+        with _model_lock:
+            if _model_key != key:
+                _model = RouterClassifier.load(path)
+                _model_key = key
+    return _model
+
+
+def classify_locally(text: str) -> Optional[str]:
+    """CHEAP/EXPENSIVE if the local model is confident enough, otherwise None"""
+    model = get_router_classifier()
+    if model is None:
+        return None
+
+    threshold = config_service.settings["router"]["classifier"].get("confidence_threshold", 0.8)
+    label, confidence = model.classify(text)
+    return label if confidence >= threshold else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train or evaluate the local triage router")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="Train a model from labeled JSONL")
+    train_parser.add_argument("--data", default=os.path.join(BASE_DIR, "data", "router_training.jsonl"))
+    train_parser.add_argument("--out", default=os.path.join(BASE_DIR, "models", "router_model.json"))
+    train_parser.add_argument("--epochs", type=int, default=30)
+    train_parser.add_argument("--holdout", type=float, default=0.2,
+                              help="Fraction held out for evaluation before the final fit on all data")
+    train_parser.add_argument("--threshold", type=float, default=0.8)
+
+    eval_parser = subparsers.add_parser("evaluate", help="Evaluate a trained model on labeled JSONL")
+    eval_parser.add_argument("--data", required=True)
+    eval_parser.add_argument("--model", default=os.path.join(BASE_DIR, "models", "router_model.json"))
+    eval_parser.add_argument("--threshold", type=float, default=0.8)
+
+    args = parser.parse_args()
+
+    if args.command == "train":
+        examples = load_examples(args.data)
+        if args.holdout > 0:
+            shuffled = examples[:]
+            random.Random(7).shuffle(shuffled)
+            split = int(len(shuffled) * (1 - args.holdout))
+            holdout_model = RouterClassifier().fit(shuffled[:split], epochs=args.epochs)
+            print("Holdout:", json.dumps(evaluate(holdout_model, shuffled[split:], args.threshold)))
+
+        model = RouterClassifier().fit(examples, epochs=args.epochs)
+        model.save(args.out)
+        print("Training:", json.dumps(evaluate(model, examples, args.threshold)))
+        print(f"Saved model with {len(model.weights)} non-zero weights to {args.out}")
+    else:
+        model = RouterClassifier.load(args.model)
+        print(json.dumps(evaluate(model, load_examples(args.data), args.threshold), indent=2))
+
+
+if __name__ == "__main__":
+    main()
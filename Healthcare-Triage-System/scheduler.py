@@ -0,0 +1,263 @@
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from config_service import config_service
+
+# (start minute, clinician) - ordered so the heap yields the earliest slot,
+# ties broken by clinician name
+SlotKey = Tuple[int, str]
+
+FREE, HELD, BOOKED = "free", "held", "booked"
+
+
+def to_minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def to_clock(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def settings_key(appointment_type: str) -> str:
+    """settings.yaml spells appointment types with underscores ("in-person" -> "in_person")"""
+    return appointment_type.replace("-", "_")
+
+
+@dataclass(frozen=True)
+class Slot:
+    appointment_type: str
+    date: str
+    time: str
+    clinician: str
+    duration: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.appointment_type, "date": self.date, "time": self.time,
+                "clinician": self.clinician, "duration": self.duration}
+
+
+class DaySchedule:
+    """
+    Free slots of one appointment type on one day, across all clinicians.
+
+    Free slots live in a min-heap keyed by start time. Booking or holding a
+    slot only changes its state; stale heap entries are discarded when they
+    reach the top, so every operation is O(log n) amortized. Each day has its
+    own lock, so bookings for different days or types never contend.
+    """
+
+    def __init__(self, appointment_type: str, date: str, slots: Iterable[SlotKey], duration: int):
+        self.appointment_type = appointment_type
+        self.date = date
+        self.duration = duration
+        self.lock = threading.Lock()
+        self._state: Dict[SlotKey, str] = {}
+        self._holds: Dict[str, Tuple[SlotKey, float]] = {}
+        self._hold_expiry: List[Tuple[float, str]] = []
+        for key in slots:
+            self._state[key] = FREE
+        self._free: List[SlotKey] = sorted(self._state)  # a sorted list is a valid heap
+
+    def _slot(self, key: SlotKey) -> Slot:
+        return Slot(self.appointment_type, self.date, to_clock(key[0]), key[1], self.duration)
+
+    def _expire_holds(self, now: float) -> None:
+        while self._hold_expiry and self._hold_expiry[0][0] <= now:
+            _, hold_id = heapq.heappop(self._hold_expiry)
+            hold = self._holds.get(hold_id)
+            if hold is not None and hold[1] <= now:
+                self._release(hold_id)
+
+    def _release(self, hold_id: str) -> None:
+        key, _ = self._holds.pop(hold_id)
+        if self._state.get(key) == HELD:
+            self._state[key] = FREE
+            heapq.heappush(self._free, key)
+
+    def _pop_free(self) -> Optional[SlotKey]:
+        while self._free:
+            key = heapq.heappop(self._free)
+            if self._state.get(key) == FREE:
+                return key
+        return None
+
+    def book_earliest(self, now: float) -> Optional[Slot]:
+        self._expire_holds(now)
+        key = self._pop_free()
+        if key is None:
+            return None
+        self._state[key] = BOOKED
+        return self._slot(key)
+
+    def hold_earliest(self, hold_id: str, expires_at: float, now: float) -> Optional[Slot]:
+        self._expire_holds(now)
+        key = self._pop_free()
+        if key is None:
+            return None
+        self._state[key] = HELD
+        self._holds[hold_id] = (key, expires_at)
+        heapq.heappush(self._hold_expiry, (expires_at, hold_id))
+        return self._slot(key)
+
+    def confirm_hold(self, hold_id: str, now: float) -> Optional[Slot]:
+        self._expire_holds(now)
+        hold = self._holds.pop(hold_id, None)
+        if hold is None:
+            return None
+        self._state[hold[0]] = BOOKED
+        return self._slot(hold[0])
+
+    def release_hold(self, hold_id: str) -> bool:
+        if hold_id not in self._holds:
+            return False
+        self._release(hold_id)
+        return True
+
+    def mark_booked(self, key: SlotKey) -> None:
+        """Record a booking made elsewhere (another process, or loaded from storage)"""
+        if key in self._state:
+            self._state[key] = BOOKED
+
+    def cancel(self, key: SlotKey) -> bool:
+        if self._state.get(key) != BOOKED:
+            return False
+        self._state[key] = FREE
+        heapq.heappush(self._free, key)
+        return True
+
+    def next_free(self, count: int, now: float) -> List[Slot]:
+        """The `count` earliest free slots, without changing anything"""
+        self._expire_holds(now)
+        taken = []
+        while len(taken) < count:
+            key = self._pop_free()
+            if key is None:
+                break
+            taken.append(key)
+        for key in taken:
+            heapq.heappush(self._free, key)
+        return [self._slot(key) for key in taken]
+
+
+class Scheduler:
+    """
+    Slot allocation for every appointment type and day.
+
+    Each clinician's day is cut into slots of `default_duration` followed by
+    `buffer_time` (settings.yaml appointment_types), between
+    scheduling.day_start and day_end. A day is built on first use; if a
+    `booked_loader` is given it is asked for the slots already taken in
+    storage, so several processes can share one database.
+    """
+
+    def __init__(self, booked_loader: Optional[Callable[[str, str], Iterable[Tuple[str, str]]]] = None,
+                 settings: Optional[Mapping[str, Any]] = None):
+        self._settings = settings
+        self._booked_loader = booked_loader
+        self._days: Dict[Tuple[str, str], DaySchedule] = {}
+        self._days_lock = threading.Lock()
+        self._holds: Dict[str, Tuple[str, str]] = {}
+        self._holds_lock = threading.Lock()
+        self._hold_ids = itertools.count(1)
+
+    @property
+    def settings(self) -> Mapping[str, Any]:
+        return self._settings if self._settings is not None else config_service.settings
+
+    def _day(self, appointment_type: str, date: str) -> DaySchedule:
+        day = self._days.get((appointment_type, date))
+        if day is not None:
+            return day
+
+        with self._days_lock:
+            day = self._days.get((appointment_type, date))
+            if day is None:
+                day = self._build_day(appointment_type, date)
+                self._days[(appointment_type, date)] = day
+        return day
+
+    def _build_day(self, appointment_type: str, date: str) -> DaySchedule:
+        type_settings = self.settings.get("appointment_types", {}).get(settings_key(appointment_type))
+        scheduling = self.settings.get("scheduling", {})
+        clinicians = scheduling.get("clinicians", {}).get(settings_key(appointment_type))
+        if type_settings is None or not clinicians:
+            raise ValueError(f"Invalid appointment type: {appointment_type}")
+
+        duration = int(type_settings["default_duration"])
+        step = duration + int(type_settings.get("buffer_time", 0))
+        day_start = to_minutes(scheduling.get("day_start", "08:00"))
+        day_end = to_minutes(scheduling.get("day_end", "17:00"))
+        starts = range(day_start, day_end - duration + 1, step)
+
+        day = DaySchedule(appointment_type, date, ((start, clinician) for clinician in clinicians
+                                                   for start in starts), duration)
+        if self._booked_loader is not None:
+            for slot_time, clinician in self._booked_loader(appointment_type, date):
+                day.mark_booked((to_minutes(slot_time), clinician))
+        return day
+
+    def book(self, appointment_type: str, date: str) -> Slot:
+        """Book the earliest free slot of this type on the date"""
+        day = self._day(appointment_type, date)
+        with day.lock:
+            slot = day.book_earliest(time.monotonic())
+        if slot is None:
+            raise ValueError(f"No available slots for {appointment_type} on {date}")
+        return slot
+
+    def hold(self, appointment_type: str, date: str, hold_seconds: Optional[float] = None) -> Tuple[str, Slot]:
+        """Reserve the earliest free slot until confirmed, released or expired; returns (hold_id, slot)"""
+        if hold_seconds is None:
+            hold_seconds = self.settings.get("scheduling", {}).get("hold_seconds", 300)
+        hold_id = f"hold-{next(self._hold_ids)}"
+        day = self._day(appointment_type, date)
+        now = time.monotonic()
+        with day.lock:
+            slot = day.hold_earliest(hold_id, now + hold_seconds, now)
+        if slot is None:
+            raise ValueError(f"No available slots for {appointment_type} on {date}")
+        with self._holds_lock:
+            self._holds[hold_id] = (appointment_type, date)
+        return hold_id, slot
+
+    def confirm(self, hold_id: str) -> Slot:
+        """Turn a hold into a booking"""
+        with self._holds_lock:
+            location = self._holds.pop(hold_id, None)
+        if location is None:
+            raise ValueError(f"Unknown hold: {hold_id}")
+        day = self._day(*location)
+        with day.lock:
+            slot = day.confirm_hold(hold_id, time.monotonic())
+        if slot is None:
+            raise ValueError(f"Hold {hold_id} has expired")
+        return slot
+
+    def release(self, hold_id: str) -> bool:
+        with self._holds_lock:
+            location = self._holds.pop(hold_id, None)
+        if location is None:
+            return False
+        day = self._day(*location)
+        with day.lock:
+            return day.release_hold(hold_id)
+
+    def cancel(self, appointment_type: str, date: str, slot_time: str, clinician: str) -> bool:
+        """Free a booked slot so it can be booked again"""
+        day = self._day(appointment_type, date)
+        with day.lock:
+            return day.cancel((to_minutes(slot_time), clinician))
+
+    def mark_booked(self, appointment_type: str, date: str, slot_time: str, clinician: str) -> None:
+        day = self._day(appointment_type, date)
+        with day.lock:
+            day.mark_booked((to_minutes(slot_time), clinician))
+
+    def next_free_slots(self, appointment_type: str, date: str, count: int = 5) -> List[Slot]:
+        day = self._day(appointment_type, date)
+        with day.lock:
+            return day.next_free(count, time.monotonic())
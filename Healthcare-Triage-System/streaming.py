@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, AsyncIterable, Deque, Dict, Generator, Iterable, Optional
+import metrics
+
+
+@dataclass
+class StreamTiming:
+    """
+    Latency of one model response: time to first token and total duration.
+    `started` is when the model was asked (during routing for a speculative
+    reply); `received` is when the patient's message arrived, if known, and
+    `routed` when the route was decided.
+    """
+    tier: str
+    started: float = field(default_factory=time.perf_counter)
+    first_token: Optional[float] = None
+    finished: Optional[float] = None
+    chunks: int = 0
+    received: Optional[float] = None
+    routed: float = field(default_factory=time.perf_counter)
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Model time to first token"""
+        return None if self.first_token is None else self.first_token - self.started
+
+    @property
+    def routing(self) -> Optional[float]:
+        """Message arrival to route decision (emergency check and router)"""
+        return None if self.received is None else self.routed - self.received
+
+    @property
+    def response_ttft(self) -> Optional[float]:
+        """Message arrival to first token, as the patient sees it"""
+        if self.first_token is None:
+            return None
+        return self.first_token - (self.started if self.received is None else self.received)
+
+    @property
+    def total(self) -> Optional[float]:
+        return None if self.finished is None else self.finished - self.started
+
+
+_recent_lock = threading.Lock()
+_recent: Deque[StreamTiming] = deque(maxlen=1000)
+
+
+def chunk_text(chunk: Any) -> str:
+    """Text of a streamed chunk: LLMs yield str, chat models yield message chunks"""
+    if isinstance(chunk, str):
+        return chunk
+    content = getattr(chunk, "content", chunk)
+    return content if isinstance(content, str) else str(content)
+
+
+def timed_stream(chunks: Iterable[Any], timing: StreamTiming) -> Generator[str, None, None]:
+    """
+    Re-yield model output as text while recording time to first token.
+    Empty chunks (role-only deltas, keep-alives) do not count as the first
+    token. The timing is recorded when the stream ends, even if it fails.
+    """
+    try:
+        for chunk in chunks:
+            text = chunk_text(chunk)
+            if not text:
+                continue
+            if timing.first_token is None:
+                timing.first_token = time.perf_counter()
+            timing.chunks += 1
+            yield text
+    finally:
+        _finish(timing)
+
+
+async def atimed_stream(chunks: AsyncIterable[Any], timing: StreamTiming) -> AsyncGenerator[str, None]:
+    """Async counterpart of timed_stream for astream() output"""
+    try:
+        async for chunk in chunks:
+            text = chunk_text(chunk)
+            if not text:
+                continue
+            if timing.first_token is None:
+                timing.first_token = time.perf_counter()
+            timing.chunks += 1
+            yield text
+    finally:
+        _finish(timing)
+
+
+def _finish(timing: StreamTiming) -> None:
+    timing.finished = time.perf_counter()
+    with _recent_lock:
+        _recent.append(timing)
+    # Streams that failed before any output are counted as errors, not latency
+    if timing.ttft is not None:
+        metrics.MODEL_TTFT.observe(timing.ttft, tier=timing.tier)
+        metrics.MODEL_LATENCY.observe(timing.total, tier=timing.tier)
+        metrics.MODEL_RESPONSES.inc(tier=timing.tier)
+        metrics.MODEL_CHUNKS.inc(timing.chunks, tier=timing.tier)
+        if timing.received is not None:
+            metrics.RESPONSE_TTFT.observe(timing.response_ttft, tier=timing.tier)
+
+
+def latency_summary() -> Dict[str, Dict[str, float]]:
+    """p50/p95 time to first token and total time per tier over recent responses"""
+    with _recent_lock:
+        timings = list(_recent)
+
+    summary = {}
+    for tier in sorted({t.tier for t in timings}):
+        ttfts = sorted(t.ttft for t in timings if t.tier == tier and t.ttft is not None)
+        totals = sorted(t.total for t in timings if t.tier == tier and t.total is not None)
+        if not ttfts:
+            continue
+        summary[tier] = {
+            "responses": len(ttfts),
+            "ttft_p50": ttfts[len(ttfts) // 2],
+            "ttft_p95": ttfts[min(len(ttfts) - 1, int(len(ttfts) * 0.95))],
+            "total_p50": totals[len(totals) // 2]
+        }
+    return summary
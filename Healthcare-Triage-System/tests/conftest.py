@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+# Keep test runs out of the real database and audit trail
+_scratch = tempfile.mkdtemp(prefix="triage-tests-")
+os.environ.setdefault("TRIAGE_DB_PATH", os.path.join(_scratch, "triage.db"))
+os.environ.setdefault("AUDIT_LOG_DIR", os.path.join(_scratch, "audit"))
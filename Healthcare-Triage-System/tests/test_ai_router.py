@@ -0,0 +1,57 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+import ai_router
+from constants import ModelType
+
+
+def _messages(text):
+    return [SystemMessage(content="You are a triage assistant."), HumanMessage(content=text)]
+
+
+def test_llm_route_with_cache_disabled(monkeypatch):
+    # router.cache.enabled: false leaves router_cache as None
+    monkeypatch.setattr(ai_router, "router_cache", None)
+    monkeypatch.setattr(ai_router, "classify_locally", lambda text: None)
+    monkeypatch.setattr(ai_router, "_route_with_llm", lambda messages: ModelType.ADVANCED.value)
+
+    text = "my knee clicks when I climb stairs"
+    assert ai_router.decide_model_from_prompt(_messages(text)) == ModelType.ADVANCED.value
+    route, speculation = ai_router.decide_model_speculatively(_messages(text))
+    assert route == ModelType.ADVANCED.value and speculation is None
+
+
+def test_medical_history_tool_takes_no_patient_id():
+    tools = {tool.name: tool for tool in ai_router.TRIAGE_TOOLS}
+    assert tools["get_medical_history"].args == {}
+
+
+def test_llm_decisions_are_keyed_on_the_conversation(monkeypatch):
+    from langchain_core.messages import AIMessage
+    from router_cache import RouterCache
+
+    monkeypatch.setattr(ai_router, "router_cache", RouterCache())
+    monkeypatch.setattr(ai_router, "classify_locally", lambda text: None)
+    # The router answers from the whole recent conversation, as the real prompt does
+    monkeypatch.setattr(ai_router, "_route_with_llm", lambda messages: ModelType.ADVANCED.value
+                        if "chest" in messages[-2].content else ModelType.BASIC.value)
+
+    booking = _messages("can I book a flu shot") + [AIMessage(content="Would Tuesday work?"),
+                                                    HumanMessage(content="yes")]
+    chest = _messages("my chest feels heavy") + [AIMessage(content="Is the chest pain spreading?"),
+                                                 HumanMessage(content="yes")]
+    assert ai_router.decide_model_from_prompt(booking) == ModelType.BASIC.value
+    assert ai_router.decide_model_from_prompt(chest) == ModelType.ADVANCED.value
+    # Same conversation again: answered from the cache
+    assert ai_router._decide_fast(booking) == (ModelType.BASIC.value, "cache")
+
+
+def test_scheduling_fast_path_answers_when_the_model_fails(monkeypatch):
+    def unavailable(model):
+        raise ConnectionError("ollama is down")
+
+    monkeypatch.setattr(ai_router, "_model_for", unavailable)
+    messages = _messages("I'd like to schedule a virtual visit")
+    # Scheduling fast paths leave the message to the model, so speculation is not skipped
+    assert ai_router.get_lexicon().fast_path(messages[-1].content) not in ai_router.ANSWER_FAST_PATHS
+
+    reply = "".join(ai_router.prompt_ai(messages, ModelType.BASIC.value))
+    assert "virtual appointments are free today" in reply and "available_slots" in reply
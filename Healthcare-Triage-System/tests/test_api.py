@@ -0,0 +1,56 @@
+import json
+from fastapi.testclient import TestClient
+import api
+from constants import ModelType
+
+
+def _events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_emergency_banner_is_followed_by_an_answer(monkeypatch):
+    async def answer(messages, model, timing=None, context=None):
+        yield f"answered by {model}"
+
+    monkeypatch.setattr(api, "aprompt_ai", answer)
+    monkeypatch.setattr(api.llm_clients, "warm_up_in_background", lambda model=None: None)
+    with TestClient(api.app) as client:
+        session_id = client.post("/sessions").json()["session_id"]
+        response = client.post(f"/sessions/{session_id}/messages", json={"text": "crushing chest pain"})
+        events = _events(response.text)
+        history = client.get(f"/sessions/{session_id}/messages").json()
+
+    assert [event for event, _ in events] == ["emergency", "route", "token", "done"]
+    assert events[1][1]["model"] == ModelType.ADVANCED.value
+    assert history[-1]["text"].startswith(events[0][1]["text"])
+    assert history[-1]["text"].endswith("answered by EXPENSIVE")
+
+
+def test_first_token_latency_includes_routing(monkeypatch):
+    import time
+    from streaming import atimed_stream
+
+    def slow_router(messages):
+        time.sleep(0.05)
+        return ModelType.BASIC.value
+
+    async def tokens():
+        yield "hello"
+
+    def answer(messages, model, timing=None, context=None):
+        return atimed_stream(tokens(), timing)
+
+    monkeypatch.setattr(api, "decide_model_from_prompt", slow_router)
+    monkeypatch.setattr(api, "aprompt_ai", answer)
+    monkeypatch.setattr(api.llm_clients, "warm_up_in_background", lambda model=None: None)
+    with TestClient(api.app) as client:
+        session_id = client.post("/sessions").json()["session_id"]
+        done = _events(client.post(f"/sessions/{session_id}/messages", json={"text": "office hours?"}).text)[-1][1]
+
+    assert done["routing"] >= 0.05
+    assert done["response_ttft"] >= done["routing"]
+    assert done["ttft"] < 0.05
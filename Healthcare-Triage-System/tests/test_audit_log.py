@@ -0,0 +1,46 @@
+import os
+import audit_log as audit_module
+from audit_log import AuditLog
+
+
+def _log(directory):
+    return AuditLog(str(directory), flush_interval=0.01, fsync="never")
+
+
+def test_processes_sharing_a_directory_do_not_lose_records(tmp_path, monkeypatch):
+    first, second = _log(tmp_path), _log(tmp_path)
+    first.record("message", text="from the app")
+    assert first.flush(5)
+
+    # The second process listed the directory just before the first created its segment
+    listdir = os.listdir
+    calls = []
+
+    def stale_listdir(path):
+        calls.append(path)
+        return [] if len(calls) == 1 else listdir(path)
+
+    monkeypatch.setattr(audit_module.os, "listdir", stale_listdir)
+    second.record("message", text="from the api")
+    assert second.flush(5)
+
+    assert sorted(r["text"] for r in first.read()) == ["from the api", "from the app"]
+    assert len(first.segments()) == 2
+    assert second.stats()["written"] == 1 and second.stats()["dropped"] == 0
+
+
+def test_failed_batch_is_retried(tmp_path, monkeypatch):
+    log = _log(tmp_path)
+    write_batch = log._write_batch
+    failures = iter([OSError("disk full")])
+
+    def flaky(batch):
+        error = next(failures, None)
+        if error:
+            raise error
+        write_batch(batch)
+
+    monkeypatch.setattr(log, "_write_batch", flaky)
+    log.record("message", text="kept")
+    assert log.flush(5)
+    assert [r["text"] for r in log.read()] == ["kept"]
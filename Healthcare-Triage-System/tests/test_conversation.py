@@ -0,0 +1,52 @@
+import threading
+from langchain_core.messages import AIMessage, HumanMessage
+from conversation import ConversationContext
+
+
+def test_messages_over_budget_are_summarized():
+    batches = []
+    summarized = threading.Event()
+
+    def summarizer(summary, batch, max_tokens):
+        batches.append([m.content for m in batch])
+        summarized.set()
+        return "summary"
+
+    context = ConversationContext("system", {"recent_turns": 4, "token_budget": 200, "summary_max_tokens": 50},
+                                  summarizer=summarizer)
+    messages = [HumanMessage(content="first question " + "detail " * 60),
+                AIMessage(content="first answer " + "detail " * 60),
+                HumanMessage(content="second question")]
+    for message in messages:
+        context.add(message)
+
+    prompt = context.build_messages()
+    verbatim = [m.content for m in prompt[1:]]
+    assert messages[0].content not in verbatim
+
+    # What no longer fits is handed to the summarizer instead of vanishing
+    assert summarized.wait(5)
+    assert any(messages[0].content in batch for batch in batches)
+    assert "first question" in prompt[0].content
+
+
+def test_summary_waits_for_a_full_batch():
+    batches = []
+    summarized = threading.Event()
+
+    def summarizer(summary, batch, max_tokens):
+        batches.append([m.content for m in batch])
+        summarized.set()
+        return "summary"
+
+    context = ConversationContext("system", {"recent_turns": 1, "summary_batch": 4}, summarizer=summarizer)
+    for i in range(4):
+        context.add(HumanMessage(content=f"question {i}"))
+        context.add(AIMessage(content=f"answer {i}"))
+
+    # Six messages have left the window: one batch of four goes to the model,
+    # the other two wait for more and are carried in the extract meanwhile
+    assert summarized.wait(5)
+    system = context.build_messages()[0].content
+    assert batches == [["question 0", "answer 0", "question 1", "answer 1"]]
+    assert "question 2" in system and "answer 2" in system
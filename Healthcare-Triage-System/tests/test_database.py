@@ -0,0 +1,34 @@
+import pytest
+import tools
+from database import MockDatabase, SQLiteDatabase
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def database(request, tmp_path):
+    if request.param == "memory":
+        return MockDatabase()
+    return SQLiteDatabase(str(tmp_path / "triage.db"))
+
+
+def test_backends_are_interchangeable(database):
+    assert database.add_symptoms_batch([
+        {"patient_id": "P001", "symptoms": ["cough"], "duration": "2 days", "severity": "mild",
+         "recorded_at": "2025-01-01 09:00:00"},
+        {"patient_id": "P001", "symptoms": ["fever", "cough"], "duration": "1 day", "severity": "moderate",
+         "recorded_at": "2025-01-02 09:00:00"},
+        {"patient_id": "P002", "symptoms": ["rash"]},
+    ]) == 3
+    history = database.get_symptoms_history("P001")
+    assert [r["symptoms"] for r in history] == [["fever", "cough"], ["cough"]]
+
+    assert database.add_triage_records([{"patient_id": "P001", "urgency": "routine", "model": "EXPENSIVE",
+                                         "summary": "cough"}]) == 1
+    records = database.get_triage_records("P001")
+    assert [(r["urgency"], r["model"], r["summary"]) for r in records] == [("routine", "EXPENSIVE", "cough")]
+
+
+def test_symptom_check_writes_a_triage_record(monkeypatch):
+    database = MockDatabase()
+    monkeypatch.setattr(tools, "db", database)
+    tools.check_symptoms.invoke({"symptoms": ["sore throat"], "duration": "2 days", "severity": "mild"})
+    assert [r["urgency"] for r in database.get_triage_records()] == ["routine"]
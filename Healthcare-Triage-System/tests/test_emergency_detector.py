@@ -0,0 +1,48 @@
+import pytest
+from emergency_detector import assess
+
+
+@pytest.mark.parametrize("text", [
+    # Negation must not carry across a coordinator or a new subject
+    "I have no appetite and crushing chest pain",
+    "no fever and chest pain",
+    "not eating and I cannot breathe",
+    "I never had chest pain until today, now it is crushing",
+    # Always red flags, whatever the severity
+    "I am vomiting blood",
+    "coughing up blood since this morning",
+    "he is not breathing",
+    "she stopped breathing",
+    "his lips are blue",
+    "the baby is turning blue",
+    "I cannot breathe",
+    # Framing only covers the concept it is attached to
+    "I had a heart attack in 2019 and now I have chest pain",
+    "what is a good remedy for chest pain",
+    "she is showing signs of a stroke",
+    "I think I'm having a stroke, what are the signs?",
+    "chest pain in the past hour",
+    "I had a seizure this morning",
+])
+def test_emergency(text):
+    assert assess(text).emergency
+
+
+@pytest.mark.parametrize("text", [
+    "no chest pain",
+    "denies shortness of breath",
+    "I don't have any chest pain",
+    "I do not have crushing chest pain",
+    "never had chest pain",
+    "not having chest pain, just a cough",
+    "mild headache since yesterday",
+    # History, family history, questions and uncertainty are not current red flags
+    "what are the warning signs of a stroke?",
+    "I had a heart attack in 2019 and want a checkup",
+    "my mother died of a stroke, should I be screened?",
+    "I cannot breathe through my nose, stuffy",
+    "I am not sure if it is chest pain",
+    "my back pain is 9/10 when I sit",
+])
+def test_not_emergency(text):
+    assert not assess(text).emergency
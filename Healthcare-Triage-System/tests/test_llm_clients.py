@@ -0,0 +1,8 @@
+from llm_clients import LLMClientRegistry
+
+
+def test_warm_up_without_a_model_does_not_raise(monkeypatch):
+    monkeypatch.delenv("OLLAMA_MODEL", raising=False)
+    registry = LLMClientRegistry()
+    registry.warm_up()
+    assert registry._clients == {}
@@ -0,0 +1,29 @@
+import contextvars
+import json
+from datetime import datetime
+import tools
+from medical_history import bind_patient, todays_patients
+
+
+def _in_session(patient_id, func, *args):
+    """Run func as one request of a session bound to patient_id"""
+    def run():
+        bind_patient(patient_id)
+        return func(*args)
+    return contextvars.copy_context().run(run)
+
+
+def test_history_is_read_for_the_bound_patient_only():
+    history = json.loads(_in_session("P001", tools.get_medical_history.invoke, {}))
+    assert history["allergies"] == ["Penicillin"]
+
+    unbound = json.loads(_in_session(None, tools.get_medical_history.invoke, {}))
+    assert "error" in unbound
+
+
+def test_bookings_carry_the_patient_for_prefetch():
+    today = datetime.now().strftime("%Y-%m-%d")
+    result = _in_session("P002", tools.schedule_appointment.invoke,
+                         {"appointment_type": "virtual", "preferred_date": today})
+    assert json.loads(result)["appointment_details"]["patient_id"] == "P002"
+    assert "P002" in todays_patients()
@@ -0,0 +1,20 @@
+import json
+import threading
+from router_cache import RouterCache
+
+
+def test_concurrent_saves(tmp_path, capsys):
+    path = tmp_path / "router_cache.json"
+    cache = RouterCache(persist_path=str(path))
+    for i in range(100):
+        cache.put(f"query {i}", "CHEAP")
+
+    threads = [threading.Thread(target=lambda: [cache.save() for _ in range(20)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert "Error saving router cache" not in capsys.readouterr().out
+    assert len(json.loads(path.read_text())) == 100
+    assert [p.name for p in tmp_path.iterdir()] == ["router_cache.json"]
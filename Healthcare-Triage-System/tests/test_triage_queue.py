@@ -0,0 +1,41 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+import api
+import tools
+from triage_queue import TriageQueue
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = TriageQueue()
+    monkeypatch.setattr(tools, "triage_queue", queue)
+    monkeypatch.setattr(api, "triage_queue", queue)
+    return queue
+
+
+def _routine_wait():
+    return json.loads(tools.estimate_wait_time.invoke({"urgency_level": "routine"}))
+
+
+def test_wait_estimate_follows_the_queue(queue):
+    assert _routine_wait()["estimated_wait"] == "2-3 hours"
+
+    for _ in range(8):
+        tools.check_symptoms.invoke({"symptoms": ["sore throat"], "duration": "2 days", "severity": "mild"})
+    estimate = _routine_wait()
+    # 8 routine patients at 15 minutes each, shared by 4 clinicians
+    assert estimate["patients_ahead"] == 8
+    assert estimate["estimated_minutes"] == 30.0
+
+    client = TestClient(api.app)
+    ticket = client.post("/queue/next").json()
+    assert client.post(f"/queue/{ticket['ticket_id']}/complete").status_code == 204
+    assert _routine_wait()["patients_ahead"] == 7
+    assert client.post(f"/queue/{ticket['ticket_id']}/complete").status_code == 404
+
+
+def test_emergencies_are_called_first(queue):
+    tools.check_symptoms.invoke({"symptoms": ["cough"], "duration": "1 day", "severity": "mild"})
+    tools.check_symptoms.invoke({"symptoms": ["chest pain"], "duration": "1 hour", "severity": "severe"})
+    assert queue.start_next().urgency == "emergency"
@@ -2,11 +2,15 @@ import json
 from typing import List, Optional
 from langchain_core.tools import tool
 from database import db
-from utils import analyze_symptoms_severity, validate_appointment_request
-from constants import UrgencyLevel, AppointmentType
+from medical_history import current_patient, medical_history
+from triage_queue import triage_queue
+from audit_log import audit_log, audited
+from utils import analyze_symptoms_severity, validate_appointment_request, load_settings
+from constants import UrgencyLevel, AppointmentType, ModelType
 
 
 @tool
+@audited
 def check_symptoms(symptoms: List[str], duration: str, severity: str) -> str:
     """
     Records and analyzes patient symptoms
@@ -17,19 +21,31 @@ def check_symptoms(symptoms: List[str], duration: str, severity: str) -> str:
     Returns:
         str: Initial assessment and recommendations
     """
-    symptom_record = db.add_symptoms(symptoms, duration, severity)
+    patient_id = current_patient()
+    symptom_record = db.add_symptoms(symptoms, duration, severity, patient_id=patient_id)
+    urgent = analyze_symptoms_severity(symptoms, severity)
+    urgency = UrgencyLevel.EMERGENCY if urgent else UrgencyLevel.ROUTINE
+    # The assessed patient joins the live queue that wait estimates are based on
+    ticket = triage_queue.enqueue(urgency, patient_id)
+    audit_log.record("triage", record_id=symptom_record["id"], symptoms=symptoms, duration=duration,
+                     severity=severity, urgency=urgency, ticket_id=ticket.id)
+    # Tools are only bound to the EXPENSIVE tier, so that model made this decision
+    db.add_triage_records([{"patient_id": patient_id, "urgency": urgency, "model": ModelType.ADVANCED.value,
+                            "summary": f"{', '.join(symptoms)} ({severity}, {duration})"}])
 
-    if analyze_symptoms_severity(symptoms, severity):
+    if urgent:
         return "URGENT: Please seek immediate medical attention or call emergency services."
 
     return json.dumps({
         "assessment": "Symptoms recorded and assessed",
         "record_id": symptom_record["id"],
+        "queue_ticket": ticket.id,
         "recommendation": "Based on initial assessment, scheduling a consultation is recommended."
     })
 
 
 @tool
+@audited
 def schedule_appointment(
         appointment_type: AppointmentType,
         preferred_date: str,
@@ -46,7 +62,8 @@ def schedule_appointment(
     """
     try:
         validate_appointment_request(appointment_type, preferred_date)
-        appointment = db.add_appointment(appointment_type, preferred_date, symptoms_record_id)
+        appointment = db.add_appointment(appointment_type, preferred_date, symptoms_record_id,
+                                         patient_id=current_patient())
 
         return json.dumps({
             "status": "confirmed",
@@ -58,19 +75,48 @@ def schedule_appointment(
 
 
 @tool
-def get_medical_history(patient_id: str) -> str:
+@audited
+def get_available_slots(appointment_type: AppointmentType, preferred_date: str, count: int = 5) -> str:
     """
-    Retrieves patient's medical history
+    Lists the earliest free appointment slots on a date
     Args:
-        patient_id: Patient's identifier
+        appointment_type: Type of appointment needed
+        preferred_date: Date to search (YYYY-MM-DD)
+        count: Maximum number of slots to return
+    Returns:
+        str: JSON list of free slots (time and clinician)
+    """
+    try:
+        validate_appointment_request(appointment_type, preferred_date)
+        slots = db.get_available_slots(appointment_type, preferred_date, count)
+        return json.dumps({"date": preferred_date, "type": appointment_type, "available_slots": slots})
+    except Exception as e:
+        return f"Error finding available slots: {str(e)}"
+
+
+@tool
+@audited
+def get_medical_history() -> str:
+    """
+    Retrieves the medical history of the patient identified for this session
     Returns:
         str: JSON string of medical history
     """
-    history = db.get_medical_history(patient_id)
+    # Only the session's own patient: an ID from the chat is never looked up
+    patient_id = current_patient()
+    if patient_id is None:
+        return json.dumps({"error": "No patient is identified for this session"})
+    try:
+        history = medical_history.get(patient_id)
+    except Exception as e:
+        return f"Error retrieving medical history: {str(e)}"
+    if history is None:
+        return json.dumps({"patient_id": patient_id, "error": "No medical history on file"})
     return json.dumps(history)
 
 
 @tool
+@audited
 def estimate_wait_time(urgency_level: UrgencyLevel) -> str:
     """
     Estimates current wait time based on urgency
@@ -79,15 +125,22 @@ def estimate_wait_time(urgency_level: UrgencyLevel) -> str:
     Returns:
         str: Estimated wait time
     """
-    with open('settings.yaml', 'r') as f:
-        settings = yaml.safe_load(f)
-        wait_times = {
-            level: data['wait_time']
-            for level, data in settings['triage']['urgency_levels'].items()
-        }
+    # Emergencies are never told to wait, whatever the queue looks like
+    if triage_queue.has_live_data and urgency_level != UrgencyLevel.EMERGENCY:
+        estimate = triage_queue.estimate(urgency_level)
+        return json.dumps({
+            **estimate,
+            "note": "Live estimate from the current triage queue; it may change as new patients arrive"
+        })
+
+    settings = load_settings()
+    wait_times = {
+        level: data['wait_time']
+        for level, data in settings['triage']['urgency_levels'].items()
+    }
 
     return json.dumps({
         "urgency": urgency_level,
         "estimated_wait": wait_times[urgency_level],
         "note": "Wait times are estimates and may vary based on current patient volume"
-    })
\ No newline at end of file
+    })
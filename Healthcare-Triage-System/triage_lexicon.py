@@ -0,0 +1,184 @@
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterator, List, Mapping, Optional, Tuple
+from config_service import config_service
+
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "`": "'"})
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, unify apostrophes and collapse whitespace"""
+    return _WHITESPACE.sub(" ", text.lower().translate(_APOSTROPHES)).strip()
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "'"
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: all patterns are found in a single pass over the
+    text, independent of how many patterns are loaded.
+
+    Patterns are added with an arbitrary payload; a trailing '*' on a pattern
+    lets it match any continuation of the last word ("schedul*" matches
+    "schedule" and "scheduling"). Matches must otherwise start and end on
+    word boundaries, so "severe" does not fire inside "persevere".
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Hashable, bool]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, payload: Hashable) -> None:
+        if self._built:
+            raise RuntimeError("Cannot add patterns after the automaton is built")
+
+        prefix = pattern.endswith("*")
+        pattern = normalize_text(pattern.rstrip("*"))
+        if not pattern:
+            return
+
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].append((len(pattern), payload, prefix))
+
+    def build(self) -> "AhoCorasick":
+        queue = deque()
+        for nxt in self._goto[0].values():
+            queue.append(nxt)
+
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Hashable]]:
+        """Yield (start, end, payload) for every word-bounded match in normalized text"""
+        if not self._built:
+            self.build()
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        length = len(text)
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for size, payload, prefix in out[state]:
+                start = i - size + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if prefix:
+                    end = i + 1
+                    while end < length and _is_word_char(text[end]):
+                        end += 1
+                elif i + 1 < length and _is_word_char(text[i + 1]):
+                    continue
+                else:
+                    end = i + 1
+                yield start, end, payload
+
+
+@dataclass(frozen=True)
+class LexiconMatch:
+    category: str
+    term: str
+    priority: int
+    start: int
+    end: int
+
+
+class TriageLexicon:
+    """
+    Compiled triage vocabulary. Every routing, emergency and fast-path phrase
+    (with its synonyms) lives in one automaton, so a single scan of a message
+    returns all matched categories regardless of lexicon size.
+    """
+
+    def __init__(self, lexicon: Mapping[str, Any]):
+        self.categories: Dict[str, Mapping[str, Any]] = dict(lexicon.get("categories", {}))
+        synonyms = lexicon.get("synonyms", {})
+        self._automaton = AhoCorasick()
+
+        for name, category in self.categories.items():
+            for term in category.get("phrases", ()):
+                self._automaton.add(term, (name, term))
+                for synonym in synonyms.get(term, ()):
+                    self._automaton.add(synonym, (name, term))
+        self._automaton.build()
+
+    def scan(self, text: str) -> List[LexiconMatch]:
+        """Return every lexicon match in the text, ordered by category priority then position"""
+        matches = [
+            LexiconMatch(name, term, int(self.categories[name].get("priority", 99)), start, end)
+            for start, end, (name, term) in self._automaton.iter_matches(normalize_text(text))
+        ]
+        return sorted(matches, key=lambda m: (m.priority, m.start))
+
+    def matched_categories(self, text: str) -> Dict[str, int]:
+        """Map of matched category -> priority, highest priority (lowest number) first"""
+        found: Dict[str, int] = {}
+        for match in self.scan(text):
+            found.setdefault(match.category, match.priority)
+        return found
+
+    def route(self, text: str) -> Optional[str]:
+        """Model route (CHEAP/EXPENSIVE) of the highest-priority routing category, if any"""
+        for name in self.matched_categories(text):
+            route = self.categories[name].get("route")
+            if route:
+                return route
+        return None
+
+    def fast_path(self, text: str) -> Optional[str]:
+        """Fast-path action of the highest-priority matched category that defines one"""
+        for name in self.matched_categories(text):
+            action = self.categories[name].get("fast_path")
+            if action:
+                return action
+        return None
+
+    def has_category(self, text: str, category: str) -> bool:
+        return category in self.matched_categories(text)
+
+
+_lexicon_lock = threading.Lock()
+_lexicon: Optional[TriageLexicon] = None
+_lexicon_version = -1
+
+
+def get_lexicon() -> TriageLexicon:
+    """Return the compiled lexicon, rebuilding it only when settings.yaml has changed"""
+    global _lexicon, _lexicon_version
+    version, settings, _ = config_service.snapshot()
+    if _lexicon is not None and _lexicon_version == version:
+        return _lexicon
+
+    with _lexicon_lock:
+        if _lexicon is None or _lexicon_version != version:
+            _lexicon = TriageLexicon(settings.get("lexicon", {}))
+            _lexicon_version = version
+    return _lexicon
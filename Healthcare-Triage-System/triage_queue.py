@@ -0,0 +1,172 @@
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from config_service import config_service
+
+
+@dataclass
+class Ticket:
+    id: int
+    urgency: str
+    priority: int
+    patient_id: Optional[str]
+    enqueued_at: float
+    started_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ticket_id": self.id, "urgency": self.urgency, "priority": self.priority,
+                "patient_id": self.patient_id}
+
+
+def format_wait(minutes: float) -> str:
+    if minutes < 1:
+        return "Immediate attention"
+    if minutes < 90:
+        return f"about {round(minutes)} minutes"
+    hours, rest = divmod(round(minutes), 60)
+    return f"about {hours} h {rest:02d} min"
+
+
+class TriageQueue:
+    """
+    Live triage queue ordered by urgency priority (settings.yaml
+    triage.urgency_levels, lower number first), then arrival.
+
+    Per-level queue depths and an exponentially weighted moving average of
+    service time per level are updated in O(1) (heap operations are
+    O(log n)), so a wait estimate only sums over the handful of urgency
+    levels and is cheap enough to recompute on every message.
+    """
+
+    def __init__(self, settings: Optional[Mapping[str, Any]] = None):
+        self._settings = settings
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._heap: List[Tuple[int, int]] = []  # (priority, ticket id); ids increase with arrival
+        self._waiting: Dict[int, Ticket] = {}
+        self._in_service: Dict[int, Ticket] = {}
+        self._depth: Dict[int, int] = {}  # waiting patients per priority
+        self._busy: Dict[str, int] = {}  # visits in progress per urgency
+        self._service_seconds: Dict[str, float] = {}
+        self._observations = 0
+
+    @property
+    def settings(self) -> Mapping[str, Any]:
+        return self._settings if self._settings is not None else config_service.settings
+
+    def _levels(self) -> Mapping[str, Any]:
+        return self.settings["triage"]["urgency_levels"]
+
+    def _queue_settings(self) -> Mapping[str, Any]:
+        return self.settings["triage"].get("queue", {})
+
+    def _mean_service(self, urgency: str) -> float:
+        mean = self._service_seconds.get(urgency)
+        if mean is None:
+            mean = float(self._levels()[urgency].get("service_minutes", 15)) * 60
+        return mean
+
+    def enqueue(self, urgency: str, patient_id: Optional[str] = None) -> Ticket:
+        """Add a checked-in patient to the queue"""
+        level = self._levels().get(urgency)
+        if level is None:
+            raise ValueError(f"Invalid urgency level: {urgency}")
+
+        with self._lock:
+            ticket = Ticket(next(self._ids), urgency, int(level["priority"]), patient_id, time.monotonic())
+            self._waiting[ticket.id] = ticket
+            heapq.heappush(self._heap, (ticket.priority, ticket.id))
+            self._depth[ticket.priority] = self._depth.get(ticket.priority, 0) + 1
+        return ticket
+
+    def start_next(self) -> Optional[Ticket]:
+        """Move the most urgent waiting patient into service"""
+        with self._lock:
+            while self._heap:
+                _, ticket_id = heapq.heappop(self._heap)
+                ticket = self._waiting.pop(ticket_id, None)
+                if ticket is None:
+                    continue  # cancelled while waiting
+                self._depth[ticket.priority] -= 1
+                ticket.started_at = time.monotonic()
+                self._in_service[ticket.id] = ticket
+                self._busy[ticket.urgency] = self._busy.get(ticket.urgency, 0) + 1
+                return ticket
+        return None
+
+    def complete(self, ticket_id: int) -> None:
+        """Finish a visit and fold its duration into the service-time average"""
+        alpha = float(self._queue_settings().get("ewma_alpha", 0.2))
+        with self._lock:
+            ticket = self._in_service.pop(ticket_id, None)
+            if ticket is None:
+                raise ValueError(f"Ticket {ticket_id} is not in service")
+            self._busy[ticket.urgency] -= 1
+            duration = time.monotonic() - ticket.started_at
+            # The configured service_minutes acts as the prior for the first visits
+            previous = self._mean_service(ticket.urgency)
+            self._service_seconds[ticket.urgency] = previous + alpha * (duration - previous)
+            self._observations += 1
+
+    def cancel(self, ticket_id: int) -> bool:
+        """Remove a waiting patient (left, or redirected); the heap entry is skipped later"""
+        with self._lock:
+            ticket = self._waiting.pop(ticket_id, None)
+            if ticket is None:
+                return False
+            self._depth[ticket.priority] -= 1
+            return True
+
+    @property
+    def has_live_data(self) -> bool:
+        return self._observations > 0 or bool(self._waiting) or bool(self._in_service)
+
+    def estimate(self, urgency: str) -> Dict[str, Any]:
+        """
+        Expected wait for a patient arriving now at this urgency: the work
+        queued at the same or higher priority plus half of the visits in
+        progress, shared across the clinicians on duty.
+        """
+        levels = self._levels()
+        if urgency not in levels:
+            raise ValueError(f"Invalid urgency level: {urgency}")
+        priority = int(levels[urgency]["priority"])
+        clinicians = max(1, int(self._queue_settings().get("clinicians_on_duty", 1)))
+
+        with self._lock:
+            ahead = 0
+            work = 0.0
+            for name, level in levels.items():
+                depth = self._depth.get(int(level["priority"]), 0)
+                if int(level["priority"]) <= priority and depth:
+                    ahead += depth
+                    work += depth * self._mean_service(name)
+            # Visits in progress are on average half done; with free
+            # clinicians nobody waits for them
+            if len(self._in_service) >= clinicians:
+                work += sum(count * self._mean_service(name) for name, count in self._busy.items()) / 2
+
+        minutes = work / clinicians / 60
+        return {
+            "urgency": urgency,
+            "patients_ahead": ahead,
+            "estimated_minutes": round(minutes, 1),
+            "estimated_wait": format_wait(minutes)
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "waiting": {name: self._depth.get(int(level["priority"]), 0)
+                            for name, level in self._levels().items()},
+                "in_service": len(self._in_service),
+                "mean_service_minutes": {name: round(self._mean_service(name) / 60, 1)
+                                         for name in self._levels()}
+            }
+
+
+# Create a singleton instance
+triage_queue = TriageQueue()
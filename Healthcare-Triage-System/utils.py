@@ -1,14 +1,19 @@
-import yaml
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Mapping
 from datetime import datetime
 import pytz
 from constants import ModelType, ErrorMessages
+from config_service import config_service
+from emergency_detector import is_emergency
 
 
-def load_settings() -> Dict[str, Any]:
-    """Load application settings from YAML"""
-    with open('settings.yaml', 'r') as f:
-        return yaml.safe_load(f)
+def load_settings() -> Mapping[str, Any]:
+    """Return the cached, read-only application settings (reloaded when settings.yaml changes)"""
+    return config_service.settings
+
+
+def load_config() -> Mapping[str, Any]:
+    """Return the cached, read-only config.json contents"""
+    return config_service.config
 
 
 def get_formatted_datetime(timezone_str: str) -> str:
@@ -27,11 +32,8 @@ def analyze_symptoms_severity(symptoms: List[str], severity: str) -> bool:
     Analyze symptoms and severity to determine if urgent care is needed
     Returns: True if urgent care is needed, False otherwise
     """
-    urgent_symptoms = ["chest pain", "difficulty breathing", "severe pain"]
-    return (
-            severity.lower() == "severe" or
-            any(urgent in [s.lower() for s in symptoms] for urgent in urgent_symptoms)
-    )
+    # Each symptom is assessed on its own so a negation in one cannot hide another
+    return severity.lower() == "severe" or any(is_emergency(symptom) for symptom in symptoms)
 
 
 def validate_appointment_request(appointment_type: str, preferred_date: str) -> None: